@@ -5,8 +5,13 @@ set -e
 echo "Applying database migrations..."
 python poll_project/manage.py migrate --noinput
 
+echo "Building OpenAPI schema..."
+python poll_project/manage.py build_openapi_schema
+
 echo "Collecting static files..."
 python poll_project/manage.py collectstatic --noinput
 
 echo "Starting Django server..."
-gunicorn poll_project.wsgi:application --chdir poll_project --bind 0.0.0.0:$PORT
\ No newline at end of file
+# Workers, threads and the per-worker warm-up are set in poll_project/gunicorn.conf.py
+# (the config path is resolved after --chdir)
+gunicorn poll_project.wsgi:application --chdir poll_project --config gunicorn.conf.py
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""
+bench_async_views.py
+
+Compares concurrent-request throughput of the vote and results endpoints:
+gunicorn with sync workers serving the DRF views (WSGI) against uvicorn
+serving the async views (ASGI), with the same number of worker processes.
+
+The script seeds a benchmark poll in the configured database (removed again
+when the run ends), starts each server in turn on a local port and drives it
+with a pool of client threads.
+Pass --cache-url dummycache:// to bypass the results cache so every results
+request waits on the database.
+
+Usage (from poll_project/):
+    python benchmarks/bench_async_views.py --workers 2 --concurrency 64 --requests 2000
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'poll_project.settings')
+
+
+def seed(user):
+    from polls.models import Vote
+    from benchmarks.seed import seed_poll
+
+    poll = seed_poll(user, "Benchmark poll", questions=10, choices=5, votes=500)
+    question = poll.questions.order_by('id').last()
+    choice = question.choices.order_by('id').first()
+    # The benchmark client always votes from 127.0.0.1, which then exercises the duplicate check
+    Vote.objects.create(question=question, choice=choice, ip_address='127.0.0.1')
+    return poll.id, question.id, choice.id
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(('127.0.0.1', port)) == 0:
+                return
+        time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def run_load(method, url, body, concurrency, total):
+    def one(_):
+        start = time.perf_counter()
+        response = requests.request(method, url, json=body, timeout=30)
+        response.content
+        return time.perf_counter() - start, response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(sample[0] for sample in samples)
+    errors = sum(1 for sample in samples if sample[1] >= 500)
+    return {
+        'rps': total / elapsed,
+        'p50': statistics.median(latencies) * 1000,
+        'p99': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--cache-url', default=None, help='CACHE_URL for the servers, e.g. dummycache://')
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+    from benchmarks.seed import benchmark_user
+
+    with benchmark_user() as user:
+        run(args, *seed(user))
+
+
+def run(args, poll_id, question_id, choice_id):
+    env = dict(os.environ)
+    if args.cache_url:
+        env['CACHE_URL'] = args.cache_url
+
+    servers = {
+        'gunicorn (sync)': (
+            ['gunicorn', 'poll_project.wsgi:application', '--workers', str(args.workers),
+             '--bind', f'127.0.0.1:{args.port}'],
+            {'results': f'/api/polls/{poll_id}/results/', 'vote': f'/api/questions/{question_id}/vote/'},
+        ),
+        'uvicorn (async)': (
+            ['uvicorn', 'poll_project.asgi:application', '--workers', str(args.workers),
+             '--port', str(args.port), '--log-level', 'warning'],
+            {'results': f'/api/polls/{poll_id}/results/async/', 'vote': f'/api/questions/{question_id}/vote/async/'},
+        ),
+    }
+
+    print(f"{'server':<18}{'endpoint':<10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'5xx':>6}")
+    for name, (command, paths) in servers.items():
+        process = subprocess.Popen(command, cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for_port(args.port)
+            base = f'http://127.0.0.1:{args.port}'
+            for endpoint, method, body in (('results', 'GET', None), ('vote', 'POST', {'choice': choice_id})):
+                stats = run_load(method, base + paths[endpoint], body, args.concurrency, args.requests)
+                print(f"{name:<18}{endpoint:<10}{stats['rps']:>10.1f}{stats['p50']:>10.1f}"
+                      f"{stats['p99']:>10.1f}{stats['errors']:>6}")
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
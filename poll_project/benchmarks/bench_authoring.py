@@ -0,0 +1,90 @@
+"""
+bench_authoring.py
+
+Measures the time to author a survey of --questions questions with
+--choices choices each:
+- one-by-one: a POST per poll, question and choice to the poll, question
+  and choice endpoints (1 + 30 + 150 = 181 requests for 30 x 5);
+- nested: a single POST of the whole survey to the poll endpoint.
+
+Requests run in-process through Django's test client against the
+configured database, authenticated as a benchmark user that is deleted,
+with the polls it authored, when the run ends.
+
+Usage (from poll_project/):
+    python benchmarks/bench_authoring.py --rounds 5 --questions 30 --choices 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'poll_project.settings')
+
+
+def one_by_one(client, survey):
+    response = client.post('/api/polls/', {'title': survey['title'], 'expiry': survey['expiry']}, format='json')
+    assert response.status_code == 201, response.content
+    poll_id = response.data['id']
+    for question in survey['questions']:
+        response = client.post('/api/questions/', {'text': question['text'], 'poll': poll_id}, format='json')
+        assert response.status_code == 201, response.content
+        question_id = response.data['id']
+        for choice in question['choices']:
+            choice_response = client.post('/api/choices/', {'text': choice['text'], 'question': question_id}, format='json')
+            assert choice_response.status_code == 201, choice_response.content
+
+
+def nested(client, survey):
+    response = client.post('/api/polls/', survey, format='json')
+    assert response.status_code == 201, response.content
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=5, help='Surveys authored per mode.')
+    parser.add_argument('--questions', type=int, default=30)
+    parser.add_argument('--choices', type=int, default=5)
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+    from benchmarks.seed import benchmark_user
+
+    with benchmark_user() as user:
+        run(args, user)
+
+
+def run(args, user):
+    from django.utils import timezone
+    from rest_framework.test import APIClient
+
+    client = APIClient(HTTP_HOST='localhost')
+    client.force_authenticate(user=user)
+    survey = {
+        'title': "Authoring benchmark",
+        'expiry': (timezone.now() + timedelta(days=1)).isoformat(),
+        'questions': [
+            {'text': f"Question {i}?", 'choices': [{'text': f"Choice {j}"} for j in range(args.choices)]}
+            for i in range(args.questions)
+        ],
+    }
+
+    requests = 1 + args.questions * (1 + args.choices)
+    print(f"{'mode':<12}{'requests':>10}{'median ms':>12}")
+    for name, author, count in (('one-by-one', one_by_one, requests), ('nested', nested, 1)):
+        timings = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            author(client, survey)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{name:<12}{count:>10}{statistics.median(timings):>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
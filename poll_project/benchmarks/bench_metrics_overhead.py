@@ -0,0 +1,76 @@
+"""
+bench_metrics_overhead.py
+
+Measures the per-request cost of MetricsMiddleware: latency and status
+recording, the execute_wrapper that counts queries, and the periodic
+snapshot write to POLLS_METRICS_DIR.
+
+A view running --queries trivial queries is called in-process through the
+middleware and directly, and the difference in mean time per request is
+compared against the overhead budget. Exits with status 1 when the budget
+is exceeded, so it can gate changes to the instrumentation.
+
+Usage (from poll_project/):
+    python benchmarks/bench_metrics_overhead.py --requests 20000 --queries 3 --budget-us 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'poll_project.settings')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=3, help='Queries run by the benchmark view.')
+    parser.add_argument('--budget-us', type=float, default=50.0, help='Allowed overhead per request.')
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+    from django.db import connection
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+    from django.test.utils import override_settings
+    from django.urls import resolve
+    from polls.metrics import MetricsMiddleware
+
+    def view(request):
+        with connection.cursor() as cursor:
+            for _ in range(args.queries):
+                cursor.execute('SELECT 1')
+        return HttpResponse('ok')
+
+    request = RequestFactory().get('/api/polls/1/results/')
+    request.resolver_match = resolve('/api/polls/1/results/')
+
+    def timed(handler):
+        for _ in range(1000):
+            handler(request)
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            handler(request)
+        return (time.perf_counter() - start) / args.requests * 1e6
+
+    with tempfile.TemporaryDirectory() as directory, override_settings(POLLS_METRICS_DIR=directory):
+        instrumented = MetricsMiddleware(view)
+        # Alternate the runs so drift in machine load affects both sides alike
+        runs = [(timed(view), timed(instrumented)) for _ in range(3)]
+        bare_us = min(bare for bare, _ in runs)
+        metered_us = min(metered for _, metered in runs)
+
+    overhead = metered_us - bare_us
+    print(f"{'bare':<14}{bare_us:>10.1f} us/request")
+    print(f"{'instrumented':<14}{metered_us:>10.1f} us/request")
+    print(f"{'overhead':<14}{overhead:>10.1f} us/request (budget {args.budget_us:.0f} us)")
+    sys.exit(0 if overhead <= args.budget_us else 1)
+
+
+if __name__ == '__main__':
+    main()
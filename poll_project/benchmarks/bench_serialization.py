@@ -0,0 +1,96 @@
+"""
+bench_serialization.py
+
+Measures the per-request cost of turning a poll into response bytes, at
+10, 100 and 1000 nested questions and choices per poll, for:
+- fields: ModelSerializer's per-field machinery and DRF's JSONRenderer
+  (the behaviour before the flat serializers and FastJSONRenderer);
+- flat: the flat PollSerializer path and FastJSONRenderer.
+
+Polls are seeded in the configured database (removed again when the run
+ends) and loaded once with the same prefetches as PollViewSet, so only
+serialization and rendering are timed.
+Both paths are checked to produce the same bytes.
+
+Usage (from poll_project/):
+    python benchmarks/bench_serialization.py --repeat 200
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from unittest import mock
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'poll_project.settings')
+
+CHOICES_PER_QUESTION = 4
+
+
+def seed(user, nested):
+    """Create a poll with `nested` questions and choices in total."""
+    from benchmarks.seed import seed_poll
+
+    poll = seed_poll(
+        user, f"Serialization benchmark ({nested})",
+        questions=max(1, nested // (CHOICES_PER_QUESTION + 1)), choices=CHOICES_PER_QUESTION,
+        question_text="Question {i} with a realistic amount of text?", choice_text="Choice {j} ünïcode",
+    )
+    return poll.pk
+
+
+def timed(render, repeat):
+    render()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        render()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=200, help='Renders per size and path.')
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+    from benchmarks.seed import benchmark_user
+
+    with benchmark_user() as user:
+        run(args, user)
+
+
+def run(args, user):
+    from rest_framework import serializers
+    from rest_framework.renderers import JSONRenderer
+    from polls.renderers import FastJSONRenderer
+    from polls.serializers import PollSerializer, QuestionSerializer, ChoiceSerializer
+    from polls.views import PollViewSet
+
+    fields_path = serializers.ModelSerializer.to_representation
+    json_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+
+    print(f"{'nested':>8}{'fields us':>12}{'flat us':>12}{'speedup':>10}")
+    for nested in (10, 100, 1000):
+        poll = PollViewSet.queryset.get(pk=seed(user, nested))
+
+        def flat():
+            return fast_renderer.render(PollSerializer(poll).data)
+
+        def fields():
+            return json_renderer.render(PollSerializer(poll).data)
+
+        with mock.patch.object(PollSerializer, 'to_representation', fields_path), \
+                mock.patch.object(QuestionSerializer, 'to_representation', fields_path), \
+                mock.patch.object(ChoiceSerializer, 'to_representation', fields_path):
+            before_us = timed(fields, args.repeat)
+            expected = fields()
+        after_us = timed(flat, args.repeat)
+        assert flat() == expected, "flat output differs"
+        print(f"{nested:>8}{before_us:>12.1f}{after_us:>12.1f}{before_us / after_us:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+bench_vote_dedup.py
+
+Measures vote latency through VoteAPIView with the duplicate-vote
+pre-check off, with in-process Bloom filters and with cache-backed ones.
+
+The script seeds a question with --existing votes in the configured
+database (removed again when the run ends), then casts --requests
+first-time votes per mode through the Django test client (no network), each
+from a new IP address, and reports latency percentiles and queries per vote.
+
+Usage (from poll_project/):
+    python benchmarks/bench_vote_dedup.py --existing 100000 --requests 2000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'poll_project.settings')
+
+
+def run_votes(mode, question_id, choice_id, total, offset):
+    from django.db import connection, reset_queries
+    from django.test import Client
+    from django.test.utils import override_settings
+    from polls.dedup import might_have_voted, reset_voter_filter
+
+    latencies = []
+    queries = 0
+    with override_settings(POLLS_VOTE_FILTER=mode, DEBUG=True):
+        reset_voter_filter()
+        might_have_voted(question_id, '0.0.0.0')  # Build outside the timed loop
+        url = f'/api/questions/{question_id}/vote/'
+        for i in range(total):
+            n = offset + i
+            client = Client(HTTP_HOST='localhost')
+            reset_queries()
+            start = time.perf_counter()
+            response = client.post(
+                url, {'choice': choice_id}, content_type='application/json',
+                REMOTE_ADDR=f"172.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}",
+            )
+            latencies.append(time.perf_counter() - start)
+            queries += len(connection.queries)
+            assert response.status_code == 201, response.content
+
+    latencies.sort()
+    return {
+        'p50': statistics.median(latencies) * 1000,
+        'p99': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        'queries': queries / total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--existing', type=int, default=100000, help='Votes already on the question.')
+    parser.add_argument('--requests', type=int, default=2000, help='Votes cast per mode.')
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+    from benchmarks.seed import benchmark_user, seed_poll
+
+    with benchmark_user() as user:
+        poll = seed_poll(user, "Dedup benchmark poll", votes=args.existing)
+        question = poll.questions.get()
+        run(args, question.id, question.choices.order_by('id').first().id)
+
+
+def run(args, question_id, choice_id):
+    print(f"{'filter':<8}{'p50 ms':>10}{'p99 ms':>10}{'queries/vote':>14}")
+    for index, mode in enumerate(('off', 'local', 'cache')):
+        stats = run_votes(mode, question_id, choice_id, args.requests, index * args.requests)
+        print(f"{mode:<8}{stats['p50']:>10.2f}{stats['p99']:>10.2f}{stats['queries']:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
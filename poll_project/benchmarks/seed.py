@@ -0,0 +1,61 @@
+"""
+seed.py
+
+Data setup shared by the benchmark scripts.
+
+The benchmarks run against the configured database, which may hold real
+data. Everything a benchmark seeds or creates is owned by the user from
+benchmark_user(), which deletes that user, and with it their polls,
+questions, choices and votes, when the benchmark ends or fails.
+"""
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+SEED_BATCH_SIZE = 5000
+
+
+@contextmanager
+def benchmark_user():
+    """Yield a new user for a benchmark run and delete it, with everything it owns, afterwards."""
+    from polls.models import User
+
+    user = User.objects.create(username=f'bench-{uuid.uuid4().hex[:12]}', email='bench@example.com')
+    try:
+        yield user
+    finally:
+        user.delete()
+
+
+def seed_poll(user, title, questions=1, choices=5, votes=0,
+              question_text="Question {i}", choice_text="Choice {j}"):
+    """
+    Create an open poll with its questions and choices in bulk.
+
+    Args:
+        votes: Votes per question, spread over its choices, each from its
+            own 10.x.x.x address.
+
+    Returns:
+        Poll: The poll; its questions and choices are ordered by id.
+    """
+    from django.utils import timezone
+    from polls.models import Poll, Question, Choice, Vote
+
+    poll = Poll.objects.create(title=title, user=user, expiry=timezone.now() + timedelta(days=1))
+    created_questions = Question.objects.bulk_create(
+        Question(poll=poll, text=question_text.format(i=i)) for i in range(questions)
+    )
+    created_choices = Choice.objects.bulk_create(
+        Choice(question=question, text=choice_text.format(j=j))
+        for question in created_questions for j in range(choices)
+    )
+    for index, question in enumerate(created_questions):
+        question_choices = created_choices[index * choices:(index + 1) * choices]
+        for start in range(0, votes, SEED_BATCH_SIZE):
+            Vote.objects.bulk_create(
+                Vote(question=question, choice=question_choices[k % choices],
+                     ip_address=f"10.{k >> 16 & 255}.{k >> 8 & 255}.{k & 255}")
+                for k in range(start, min(start + SEED_BATCH_SIZE, votes))
+            )
+    return poll
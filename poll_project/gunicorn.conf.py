@@ -0,0 +1,64 @@
+"""
+gunicorn.conf.py
+
+Gunicorn settings for the WSGI deployment (see entrypoint.sh).
+
+Workers are processes running requests on a few threads each: requests to
+this app mostly wait on the database, so threads keep a worker busy while
+one of them waits, and each thread keeps its own persistent database
+connection (or shares the worker's pool with POLLS_DB_POOL). Keep
+workers * threads within what the database accepts, and size
+POLLS_DB_POOL_MAX_SIZE to GUNICORN_THREADS when pooling.
+
+Every worker warms up (polls.warmup) before it accepts requests, so first
+requests do not pay for imports or voter filters, nor for connections when
+pooling with POLLS_DB_POOL; without the pool every thread still opens its
+own connection on its first request.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Keep connections from the load balancer open between requests
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+
+# Recycle workers now and then, staggered so they do not all restart together
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+
+
+def post_worker_init(worker):
+    from polls.warmup import warm_up
+
+    report = warm_up()
+    for alias, result in report.items():
+        if isinstance(result, Exception):
+            worker.log.warning("Warm-up of database %r failed: %s", alias, result)
+        elif alias == 'voter_filters':
+            worker.log.info("Warm-up built %d voter filters", result)
+        else:
+            worker.log.info("Warm-up of database %r took %.1f ms", alias, result * 1000)
+
+
+def worker_exit(server, worker):
+    from polls import metrics
+
+    # Write out what the worker counted since its last flush
+    metrics.flush(force=True)
+
+
+def child_exit(server, worker):
+    # Runs in the master, which has not loaded Django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'poll_project.settings')
+    from polls import metrics
+
+    metrics.retire_process(worker.pid)
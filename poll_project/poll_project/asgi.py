@@ -2,6 +2,8 @@
 ASGI config for poll_project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Live results streams (``/api/polls/<pk>/stream/``) are served here directly;
+all other requests go to Django.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -13,4 +15,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'poll_project.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from polls.streaming import ResultsStreamRouter  # noqa: E402  (needs the app registry)
+
+application = ResultsStreamRouter(django_application)
@@ -54,9 +54,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'polls.metrics.MetricsMiddleware',
+    'polls.routers.ReadYourWritesMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'polls.snapshots.SnapshotWhiteNoiseMiddleware',  # WhiteNoise, plus results snapshots
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -104,6 +106,13 @@ DATABASES = {
     }
 }
 
+# Cache
+# Use a shared backend (e.g. CACHE_URL=redis://...) when running several workers
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -152,7 +161,24 @@ AUTH_USER_MODEL = 'polls.User'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.TokenAuthentication',
-    ]
+    ],
+    # Sliding-window limits per client IP, session and user for views with a throttle_scope
+    'DEFAULT_THROTTLE_CLASSES': [
+        'polls.throttling.SlidingWindowThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'vote': env('POLLS_VOTE_RATE_LIMIT', default='30/min'),
+        'results': env('POLLS_RESULTS_RATE_LIMIT', default='300/min'),
+    },
+    # JSON goes through orjson when it is installed (same bytes as DRF's JSONRenderer)
+    'DEFAULT_RENDERER_CLASSES': [
+        'polls.renderers.FastJSONRenderer' if env.bool('POLLS_FAST_JSON', default=True)
+        else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # Trusted proxies in front of the app; client IPs are read from X-Forwarded-For accordingly.
+    # Unset, X-Forwarded-For is ignored: set it when running behind a proxy or load balancer
+    'NUM_PROXIES': env.int('NUM_PROXIES', default=None),
 }
 
 # Custom test runner to discover tests in the polls app
@@ -162,4 +188,140 @@ CSRF_TRUSTED_ORIGINS = [
     "https://alx-project-nexus-online-poll-kerich.onrender.com"
 ]
 
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
\ No newline at end of file
+STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+
+# Buffered vote ingestion: accept votes into a write buffer and flush them in batches
+POLLS_VOTE_BUFFERING = env.bool('POLLS_VOTE_BUFFERING', default=False)
+POLLS_VOTE_BUFFER_BATCH_SIZE = env.int('POLLS_VOTE_BUFFER_BATCH_SIZE', default=500)
+POLLS_VOTE_BUFFER_FLUSH_INTERVAL = env.float('POLLS_VOTE_BUFFER_FLUSH_INTERVAL', default=2.0)
+
+# Poll results cache: cache alias, entry lifetime, staleness window for very hot polls
+# and how long one worker may hold the recompute lock (all in seconds)
+POLLS_RESULTS_CACHE = env('POLLS_RESULTS_CACHE', default='default')
+POLLS_RESULTS_CACHE_TIMEOUT = env.int('POLLS_RESULTS_CACHE_TIMEOUT', default=3600)
+POLLS_RESULTS_STALE_SECONDS = env.float('POLLS_RESULTS_STALE_SECONDS', default=0)
+POLLS_RESULTS_LOCK_TIMEOUT = env.float('POLLS_RESULTS_LOCK_TIMEOUT', default=5)
+
+# Live results streams: seconds between checks for new votes (updates are coalesced
+# to this tick) and between keep-alive comments on idle connections
+POLLS_STREAM_TICK = env.float('POLLS_STREAM_TICK', default=1.0)
+POLLS_STREAM_HEARTBEAT = env.float('POLLS_STREAM_HEARTBEAT', default=15.0)
+
+# Serve the main vote and results routes with the async views (for ASGI deployments).
+# The async variants are always available under .../vote/async/ and .../results/async/
+POLLS_ASYNC_VIEWS = env.bool('POLLS_ASYNC_VIEWS', default=False)
+
+# Background Excel exports: output directory, and whether jobs run on a thread pool
+# inside the web worker or wait for `manage.py run_export_jobs`. Jobs still running this
+# many seconds after they started are marked failed by `run_export_jobs`
+POLLS_EXPORT_ROOT = env('POLLS_EXPORT_ROOT', default=os.path.join(BASE_DIR, 'exports'))
+POLLS_EXPORT_IN_PROCESS = env.bool('POLLS_EXPORT_IN_PROCESS', default=True)
+POLLS_EXPORT_WORKERS = env.int('POLLS_EXPORT_WORKERS', default=2)
+POLLS_EXPORT_TIMEOUT = env.int('POLLS_EXPORT_TIMEOUT', default=60 * 60)
+
+# Keyset pagination of the poll, question and choice listings: default and maximum
+# page size (clients pick within that range with ?page_size=)
+POLLS_PAGE_SIZE = env.int('POLLS_PAGE_SIZE', default=20)
+POLLS_MAX_PAGE_SIZE = env.int('POLLS_MAX_PAGE_SIZE', default=100)
+
+# Vote archival (`manage.py archive_votes`): where compressed vote archives are written,
+# and how long after expiry a poll's votes stay in the Vote table
+POLLS_ARCHIVE_ROOT = env('POLLS_ARCHIVE_ROOT', default=os.path.join(BASE_DIR, 'archives'))
+POLLS_ARCHIVE_GRACE_HOURS = env.float('POLLS_ARCHIVE_GRACE_HOURS', default=24)
+
+# Duplicate-vote pre-check: 'local' (Bloom filters in process memory), 'cache' (shared
+# through the results cache) or 'off'; sized per question for the given false positive rate.
+# 'local' keeps the filters of at most POLLS_VOTE_FILTER_MAX_FILTERS recently checked questions
+POLLS_VOTE_FILTER = env('POLLS_VOTE_FILTER', default='local')
+POLLS_VOTE_FILTER_CAPACITY = env.int('POLLS_VOTE_FILTER_CAPACITY', default=10000)
+POLLS_VOTE_FILTER_ERROR_RATE = env.float('POLLS_VOTE_FILTER_ERROR_RATE', default=0.01)
+POLLS_VOTE_FILTER_MAX_FILTERS = env.int('POLLS_VOTE_FILTER_MAX_FILTERS', default=1000)
+
+# Per-minute vote rollups (`manage.py rollup_votes`): votes are counted once they were inserted
+# this many seconds ago, so late-committing transactions are not skipped; votes per transaction
+POLLS_ROLLUP_LAG_SECONDS = env.float('POLLS_ROLLUP_LAG_SECONDS', default=60)
+POLLS_ROLLUP_CHUNK_SIZE = env.int('POLLS_ROLLUP_CHUNK_SIZE', default=5000)
+POLLS_ROLLUP_INTERVAL = env.float('POLLS_ROLLUP_INTERVAL', default=30)
+
+# Request metrics served at /metrics. With POLLS_METRICS_DIR set, every worker process
+# writes its snapshot there (at most every POLLS_METRICS_FLUSH_INTERVAL seconds) and
+# scrapes report the sum over all workers. POLLS_METRICS_TOKEN requires a bearer token.
+POLLS_METRICS_ENABLED = env.bool('POLLS_METRICS_ENABLED', default=True)
+POLLS_METRICS_DIR = env('POLLS_METRICS_DIR', default='')
+POLLS_METRICS_FLUSH_INTERVAL = env.float('POLLS_METRICS_FLUSH_INTERVAL', default=5)
+POLLS_METRICS_TOKEN = env('POLLS_METRICS_TOKEN', default='')
+
+# Read replicas: database URLs (e.g. postgres://... or sqlite:////path/to/replica.sqlite3)
+# added as replica1, replica2, ... Results, listings and admin exports read from them.
+# Replicas may trail the primary by POLLS_REPLICA_LAG_SECONDS: clients read from the primary
+# for that long after a write of their own, and PostgreSQL replicas lagging further are
+# skipped (replay lag is checked every POLLS_REPLICA_CHECK_INTERVAL seconds)
+POLLS_READ_REPLICA_URLS = env.list('POLLS_READ_REPLICA_URLS', default=[])
+for index, url in enumerate(POLLS_READ_REPLICA_URLS, start=1):
+    DATABASES[f'replica{index}'] = {**env.db_url_config(url), 'TEST': {'MIRROR': 'default'}}
+POLLS_READ_REPLICAS = [f'replica{index}' for index in range(1, len(POLLS_READ_REPLICA_URLS) + 1)]
+POLLS_REPLICA_LAG_SECONDS = env.float('POLLS_REPLICA_LAG_SECONDS', default=5)
+POLLS_REPLICA_CHECK_INTERVAL = env.float('POLLS_REPLICA_CHECK_INTERVAL', default=5)
+DATABASE_ROUTERS = ['polls.routers.ReplicaRouter']
+
+# Database connections. Connections are kept for POLLS_DB_CONN_MAX_AGE seconds and checked
+# before reuse. POLLS_DB_POOL switches PostgreSQL databases to a psycopg (3) connection pool
+# per process instead, which ASGI deployments should use: size it to the worker's threads.
+# DATABASE_URL, when set, replaces the default database.
+if env('DATABASE_URL', default=''):
+    DATABASES['default'] = env.db_url('DATABASE_URL')
+POLLS_DB_CONN_MAX_AGE = env.int('POLLS_DB_CONN_MAX_AGE', default=60)
+POLLS_DB_POOL = env.bool('POLLS_DB_POOL', default=False)
+POLLS_DB_POOL_MIN_SIZE = env.int('POLLS_DB_POOL_MIN_SIZE', default=2)
+POLLS_DB_POOL_MAX_SIZE = env.int('POLLS_DB_POOL_MAX_SIZE', default=8)
+POLLS_DB_POOL_TIMEOUT = env.float('POLLS_DB_POOL_TIMEOUT', default=10)
+for database in DATABASES.values():
+    database['CONN_HEALTH_CHECKS'] = True
+    if POLLS_DB_POOL and database['ENGINE'] == 'django.db.backends.postgresql':
+        # Pooled connections go back to the pool after each request
+        database['CONN_MAX_AGE'] = 0
+        database.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': POLLS_DB_POOL_MIN_SIZE,
+            'max_size': POLLS_DB_POOL_MAX_SIZE,
+            'timeout': POLLS_DB_POOL_TIMEOUT,
+        }
+    else:
+        database['CONN_MAX_AGE'] = POLLS_DB_CONN_MAX_AGE
+
+# Worker warm-up (polls.warmup, run by gunicorn.conf.py): voter filters are built for the
+# questions of this many most recent open polls
+POLLS_WARMUP_POLLS = env.int('POLLS_WARMUP_POLLS', default=20)
+
+# Rate limit counters (polls.throttling); use a shared cache so limits hold across workers
+POLLS_RATE_LIMIT_CACHE = env('POLLS_RATE_LIMIT_CACHE', default='default')
+
+# Trending polls (/api/polls/trending/): votes count half as much every
+# POLLS_TRENDING_HALF_LIFE seconds (changing it skews existing scores until they decay).
+# `manage.py compact_trending` drops polls whose decayed vote count fell below
+# POLLS_TRENDING_MIN_SCORE and keeps at most POLLS_TRENDING_CAPACITY scored polls
+POLLS_TRENDING_HALF_LIFE = env.float('POLLS_TRENDING_HALF_LIFE', default=6 * 60 * 60)
+POLLS_TRENDING_SIZE = env.int('POLLS_TRENDING_SIZE', default=20)
+POLLS_TRENDING_MIN_SCORE = env.float('POLLS_TRENDING_MIN_SCORE', default=0.5)
+POLLS_TRENDING_CAPACITY = env.int('POLLS_TRENDING_CAPACITY', default=1000)
+POLLS_TRENDING_COMPACT_INTERVAL = env.float('POLLS_TRENDING_COMPACT_INTERVAL', default=300)
+
+# Closing expired polls (`manage.py close_expired_polls`): polls are closed this many
+# seconds after their expiry, in batches; --loop wakes up for the next expiry, or every
+# POLLS_CLOSE_INTERVAL seconds at most
+POLLS_CLOSE_GRACE_SECONDS = env.float('POLLS_CLOSE_GRACE_SECONDS', default=30)
+POLLS_CLOSE_BATCH_SIZE = env.int('POLLS_CLOSE_BATCH_SIZE', default=100)
+POLLS_CLOSE_INTERVAL = env.float('POLLS_CLOSE_INTERVAL', default=60)
+
+# Static results snapshots of closed polls (polls.snapshots), served by WhiteNoise from
+# POLLS_SNAPSHOT_ROOT at POLLS_SNAPSHOT_URL. Share the directory between all app servers.
+# The results endpoints redirect there, and clients may cache the redirect this long.
+# Snapshot files are cached for POLLS_SNAPSHOT_MAX_AGE, then revalidated by ETag, so files
+# rewritten by `manage.py build_result_snapshots` reach clients within that time
+POLLS_SNAPSHOT_FILES = env.bool('POLLS_SNAPSHOT_FILES', default=True)
+POLLS_SNAPSHOT_ROOT = env('POLLS_SNAPSHOT_ROOT', default=os.path.join(BASE_DIR, 'snapshots'))
+POLLS_SNAPSHOT_URL = env('POLLS_SNAPSHOT_URL', default='/snapshots/')
+POLLS_SNAPSHOT_REDIRECT_MAX_AGE = env.int('POLLS_SNAPSHOT_REDIRECT_MAX_AGE', default=24 * 60 * 60)
+POLLS_SNAPSHOT_MAX_AGE = env.int('POLLS_SNAPSHOT_MAX_AGE', default=60 * 60)
+
+# Bulk poll import (/api/polls/import/): most polls accepted per request
+POLLS_IMPORT_MAX_POLLS = env.int('POLLS_IMPORT_MAX_POLLS', default=1000)
@@ -1,117 +1,84 @@
-from django.contrib import admin
-from django.db.models import Count
-from .models import User, Poll, Question, Choice, Vote
+from django.contrib import admin, messages
+from django.db.models import OuterRef, Subquery
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+from .models import User, Poll, Question, Choice, Vote, ExportJob, VoteArchive
+from .exports import (
+    QUESTION_VOTE_HEADERS, POLL_VOTE_HEADERS, RAW_VOTE_HEADERS,
+    question_vote_rows, poll_vote_rows, raw_vote_rows, start_export_job, export_path,
+)
+from .routers import read_alias, last_write_time
 import csv
-from django.http import HttpResponse
-import openpyxl
-from openpyxl.utils import get_column_letter
+
+class Echo:
+    """Pseudo-buffer for csv.writer that returns each row instead of storing it."""
+    def write(self, value):
+        return value
+
+def stream_csv(filename, headers, rows):
+    """
+    Stream rows as a CSV attachment.
+    Rows are encoded one at a time as the client reads them, so memory stays
+    flat however many rows the queryset iterator yields.
+    """
+    writer = csv.writer(Echo())
+
+    def content():
+        yield writer.writerow(headers)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(content(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+def start_excel_export(modeladmin, request, kind, queryset):
+    job = start_export_job(kind, queryset.values_list('pk', flat=True), user=request.user)
+    url = reverse('admin:polls_exportjob_change', args=[job.pk])
+    modeladmin.message_user(
+        request,
+        format_html('Excel export started in the background. <a href="{}">Track {}</a> and download it when done.', url, job),
+        messages.SUCCESS
+    )
+
+def export_source(request, queryset):
+    # CSV rows are read while the response streams, after the view returned,
+    # so the replica is picked up front rather than through replica_reads()
+    return queryset.using(read_alias(last_write_time(request)))
 
 # --- Export Actions for Questions ---
 
 def export_votes_csv(modeladmin, request, queryset):
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="votes.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow(['Poll', 'Question', 'Choice', 'Vote Count'])
-
-    for question in queryset:
-        for choice in question.choices.annotate(vote_count=Count('votes')):
-            writer.writerow([
-                question.poll.title,
-                question.text,
-                choice.text,
-                choice.vote_count
-            ])
-    return response
+    return stream_csv('votes.csv', QUESTION_VOTE_HEADERS, question_vote_rows(export_source(request, queryset)))
 export_votes_csv.short_description = "Export Votes as CSV"
 
 def export_votes_excel(modeladmin, request, queryset):
-    workbook = openpyxl.Workbook()
-    sheet = workbook.active
-    sheet.title = "Vote Stats"
-
-    headers = ['Poll', 'Question', 'Choice', 'Vote Count']
-    sheet.append(headers)
-
-    for question in queryset:
-        for choice in question.choices.annotate(vote_count=Count('votes')):
-            sheet.append([
-                question.poll.title,
-                question.text,
-                choice.text,
-                choice.vote_count
-            ])
-
-    for i, column in enumerate(sheet.columns, start=1):
-        max_length = max(len(str(cell.value or "")) for cell in column)
-        sheet.column_dimensions[get_column_letter(i)].width = max_length + 2
-
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename="votes.xlsx"'
-    workbook.save(response)
-    return response
-export_votes_excel.short_description = "Export Votes as Excel"
+    start_excel_export(modeladmin, request, ExportJob.QUESTION_VOTES, queryset)
+export_votes_excel.short_description = "Export Votes as Excel (background job)"
+
+def export_raw_votes_csv(modeladmin, request, queryset):
+    queryset = export_source(request, queryset)
+    votes = Vote.objects.using(queryset.db).filter(choice__question__in=queryset)
+    return stream_csv('raw_votes.csv', RAW_VOTE_HEADERS, raw_vote_rows(votes))
+export_raw_votes_csv.short_description = "Export Individual Votes as CSV"
 
 # --- Export Actions for Polls with Percentages ---
 
 def export_poll_votes_csv(modeladmin, request, queryset):
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="poll_vote_stats.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow(['Poll', 'Question', 'Choice', 'Votes', 'Percentage'])
-
-    for poll in queryset:
-        questions = poll.questions.all()
-        for question in questions:
-            choices = question.choices.annotate(vote_count=Count('votes'))
-            total_votes = sum(choice.vote_count for choice in choices)
-            for choice in choices:
-                percent = (choice.vote_count / total_votes * 100) if total_votes > 0 else 0
-                writer.writerow([
-                    poll.title,
-                    question.text,
-                    choice.text,
-                    choice.vote_count,
-                    f"{percent:.2f}%"
-                ])
-
-    return response
+    return stream_csv('poll_vote_stats.csv', POLL_VOTE_HEADERS, poll_vote_rows(export_source(request, queryset)))
 export_poll_votes_csv.short_description = "Export Poll Votes as CSV"
 
 def export_poll_votes_excel(modeladmin, request, queryset):
-    workbook = openpyxl.Workbook()
-    sheet = workbook.active
-    sheet.title = "Poll Vote Stats"
-
-    headers = ['Poll', 'Question', 'Choice', 'Votes', 'Percentage']
-    sheet.append(headers)
-
-    for poll in queryset:
-        questions = poll.questions.all()
-        for question in questions:
-            choices = question.choices.annotate(vote_count=Count('votes'))
-            total_votes = sum(choice.vote_count for choice in choices)
-            for choice in choices:
-                percent = (choice.vote_count / total_votes * 100) if total_votes > 0 else 0
-                sheet.append([
-                    poll.title,
-                    question.text,
-                    choice.text,
-                    choice.vote_count,
-                    f"{percent:.2f}%"
-                ])
-
-    for i, column in enumerate(sheet.columns, start=1):
-        max_length = max(len(str(cell.value or "")) for cell in column)
-        sheet.column_dimensions[get_column_letter(i)].width = max_length + 2
-
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename="poll_vote_stats.xlsx"'
-    workbook.save(response)
-    return response
-export_poll_votes_excel.short_description = "Export Poll Votes as Excel"
+    start_excel_export(modeladmin, request, ExportJob.POLL_VOTES, queryset)
+export_poll_votes_excel.short_description = "Export Poll Votes as Excel (background job)"
+
+def export_poll_raw_votes_csv(modeladmin, request, queryset):
+    queryset = export_source(request, queryset)
+    votes = Vote.objects.using(queryset.db).filter(choice__question__poll__in=queryset)
+    return stream_csv('poll_raw_votes.csv', RAW_VOTE_HEADERS, raw_vote_rows(votes))
+export_poll_raw_votes_csv.short_description = "Export Individual Votes as CSV"
 
 # --- Admin Registrations ---
 
@@ -122,25 +89,29 @@ class UserAdmin(admin.ModelAdmin):
 @admin.register(Poll)
 class PollAdmin(admin.ModelAdmin):
     list_display = ('id', 'title', 'created_at', 'total_votes')
-    actions = [export_poll_votes_csv, export_poll_votes_excel]
-
-    def get_queryset(self, request):
-        qs = super().get_queryset(request)
-        return qs.annotate(vote_count=Count('questions__choices__votes'))
+    actions = [export_poll_votes_csv, export_poll_votes_excel, export_poll_raw_votes_csv]
 
     def total_votes(self, obj):
         return obj.vote_count
+    total_votes.admin_order_field = 'vote_count'
     total_votes.short_description = 'Total Votes'
 
 @admin.register(Question)
 class QuestionAdmin(admin.ModelAdmin):
     list_display = ('id', 'poll', 'text', 'vote_count', 'get_winner')
     list_filter = ('poll',)
-    actions = [export_votes_csv, export_votes_excel]
+    list_select_related = ('poll',)
+    actions = [export_votes_csv, export_votes_excel, export_raw_votes_csv]
+
+    ordering = ('-vote_count',)
 
     def get_queryset(self, request):
-        qs = super().get_queryset(request)
-        return qs.annotate(vote_count=Count('choices__votes')).order_by('-vote_count')
+        # The winner is read from the choice counters in the changelist query itself
+        winner = Choice.objects.filter(question=OuterRef('pk')).order_by('-vote_count', 'id')
+        return super().get_queryset(request).annotate(
+            winner_text=Subquery(winner.values('text')[:1]),
+            winner_votes=Subquery(winner.values('vote_count')[:1]),
+        )
 
     def vote_count(self, obj):
         return obj.vote_count
@@ -148,20 +119,67 @@ class QuestionAdmin(admin.ModelAdmin):
     vote_count.short_description = 'Total Votes'
 
     def get_winner(self, obj):
-        winner = (
-            obj.choices.annotate(vote_count=Count('votes'))
-            .order_by('-vote_count')
-            .first()
-        )
-        if winner and winner.vote_count > 0:
-            return f"{winner.text} ({winner.vote_count} votes)"
+        if obj.winner_votes:
+            return f"{obj.winner_text} ({obj.winner_votes} votes)"
         return "No votes yet"
+    get_winner.admin_order_field = 'winner_votes'
     get_winner.short_description = "Winning Choice"
 
 @admin.register(Choice)
 class ChoiceAdmin(admin.ModelAdmin):
-    list_display = ('id', 'question', 'text')
+    list_display = ('id', 'question', 'text', 'vote_count')
+    list_select_related = ('question',)
 
 @admin.register(Vote)
 class VoteAdmin(admin.ModelAdmin):
     list_display = ('id', 'choice', 'user', 'voted_at')
+    list_select_related = ('choice', 'user')
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'progress_display', 'row_count', 'created_by', 'created_at', 'download_link')
+    list_filter = ('kind', 'status')
+    readonly_fields = [field.name for field in ExportJob._meta.fields] + ['download_link']
+
+    def has_add_permission(self, request):
+        return False
+
+    def progress_display(self, obj):
+        return f"{obj.progress}%"
+    progress_display.short_description = 'Progress'
+
+    def download_link(self, obj):
+        if obj.status != ExportJob.DONE:
+            return "-"
+        url = reverse('admin:polls_exportjob_download', args=[obj.pk])
+        return format_html('<a href="{}">Download</a>', url)
+    download_link.short_description = 'File'
+
+    def get_urls(self):
+        return [
+            path(
+                '<int:pk>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='polls_exportjob_download'
+            ),
+        ] + super().get_urls()
+
+    def download_view(self, request, pk):
+        job = get_object_or_404(ExportJob, pk=pk, status=ExportJob.DONE)
+        if not self.has_view_permission(request, job):
+            raise Http404
+        try:
+            export_file = open(export_path(job.file_name), 'rb')
+        except FileNotFoundError:
+            # Removed from the export directory, or written on another host
+            raise Http404("The export file no longer exists.")
+        return FileResponse(export_file, as_attachment=True, filename=job.file_name)
+
+@admin.register(VoteArchive)
+class VoteArchiveAdmin(admin.ModelAdmin):
+    list_display = ('id', 'poll', 'vote_count', 'deleted_count', 'created_at', 'completed_at')
+    list_select_related = ('poll',)
+    readonly_fields = [field.name for field in VoteArchive._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
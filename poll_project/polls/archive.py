@@ -0,0 +1,155 @@
+"""
+archive.py
+
+Moves the votes of expired polls out of the Vote table.
+
+Votes are written to a gzip-compressed JSON-lines file per poll, tallied
+per choice into ArchivedVoteCount, and then deleted from Vote in chunks.
+The vote counters on choices, questions and polls are left as they are,
+so results stay correct while the hot table and its unique indexes only
+hold votes of polls that can still be voted on.
+"""
+import gzip
+import json
+import os
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Poll, Vote, VoteArchive, ArchivedVoteCount
+
+ARCHIVE_CHUNK_SIZE = 2000
+
+ARCHIVE_FIELDS = ('id', 'question_id', 'choice_id', 'user_id', 'ip_address', 'session_key', 'voted_at')
+
+
+def archive_path(file_name):
+    return os.path.join(settings.POLLS_ARCHIVE_ROOT, file_name)
+
+
+def archivable_polls(expired_before):
+    """Return polls that expired before the given time and still have votes."""
+    return (
+        Poll.objects.filter(expiry__lt=expired_before, questions__choices__votes__isnull=False)
+        .distinct()
+        .order_by('id')
+    )
+
+
+def _poll_votes(poll_id, last_vote_id):
+    return Vote.objects.filter(choice__question__poll_id=poll_id, pk__lte=last_vote_id).order_by('id')
+
+
+def write_vote_archive(poll, chunk_size=ARCHIVE_CHUNK_SIZE):
+    """
+    Write the current votes of a poll to a new archive file.
+
+    Returns:
+        VoteArchive | None: The archive record, or None if the poll has no votes.
+    """
+    last_vote_id = (
+        Vote.objects.filter(choice__question__poll=poll).order_by('-id').values_list('id', flat=True).first()
+    )
+    if last_vote_id is None:
+        return None
+
+    stamp = timezone.now().strftime('%Y%m%d%H%M%S')
+    file_name = f"poll-{poll.pk}-votes-{stamp}-{last_vote_id}.jsonl.gz"
+    path = archive_path(file_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    count = 0
+    rows = _poll_votes(poll.pk, last_vote_id).values_list(*ARCHIVE_FIELDS)
+    # Written under a temporary name so a crash never leaves a partial archive
+    with open(path + '.part', 'wb') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb') as archive:
+            for row in rows.iterator(chunk_size=chunk_size):
+                record = dict(zip(ARCHIVE_FIELDS, row))
+                record['voted_at'] = record['voted_at'].isoformat()
+                archive.write(json.dumps(record).encode() + b'\n')
+                count += 1
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(path + '.part', path)
+
+    return VoteArchive.objects.create(
+        poll=poll, file_name=file_name, last_vote_id=last_vote_id, vote_count=count
+    )
+
+
+def purge_archived_votes(archive, chunk_size=ARCHIVE_CHUNK_SIZE):
+    """
+    Delete the votes covered by an archive from Vote, one chunk per transaction.
+
+    Each chunk's votes are added to the frozen per-choice tallies in the same
+    transaction that deletes them, so the tallies always match what left Vote.
+
+    Returns:
+        int: Number of votes deleted.
+    """
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            chunk = list(
+                _poll_votes(archive.poll_id, archive.last_vote_id)
+                .select_for_update(of=('self',))
+                .values_list('id', 'choice_id')[:chunk_size]
+            )
+            if not chunk:
+                break
+            removed, _ = Vote.objects.filter(pk__in=[vote_id for vote_id, _ in chunk]).delete(keep_counts=True)
+            if removed != len(chunk):
+                raise RuntimeError("Votes were deleted concurrently; chunk rolled back.")
+            _add_archived_counts(Counter(choice_id for _, choice_id in chunk))
+            VoteArchive.objects.filter(pk=archive.pk).update(deleted_count=F('deleted_count') + removed)
+        deleted += removed
+
+    VoteArchive.objects.filter(pk=archive.pk).update(completed_at=timezone.now())
+    return deleted
+
+
+def _add_archived_counts(per_choice):
+    existing = set(
+        ArchivedVoteCount.objects.filter(choice_id__in=per_choice).values_list('choice_id', flat=True)
+    )
+    ArchivedVoteCount.objects.bulk_create([
+        ArchivedVoteCount(choice_id=choice_id, vote_count=0)
+        for choice_id in per_choice if choice_id not in existing
+    ])
+    # One UPDATE per distinct increment rather than one per row
+    pks_by_delta = defaultdict(list)
+    for choice_id, count in sorted(per_choice.items()):
+        pks_by_delta[count].append(choice_id)
+    for count, pks in pks_by_delta.items():
+        ArchivedVoteCount.objects.filter(pk__in=pks).update(vote_count=F('vote_count') + count)
+
+
+def archive_poll_votes(poll, chunk_size=ARCHIVE_CHUNK_SIZE):
+    """
+    Archive and delete the votes of one poll.
+
+    Archives left incomplete by an interrupted run are finished first, without
+    rewriting their files. Votes that arrive after the last archive (for
+    example from a late buffer flush) go into a new file on the next run.
+
+    Returns:
+        int: Number of votes moved out of Vote.
+    """
+    moved = 0
+    for archive in VoteArchive.objects.filter(poll=poll, completed_at__isnull=True).order_by('id'):
+        moved += purge_archived_votes(archive, chunk_size)
+
+    archive = write_vote_archive(poll, chunk_size)
+    if archive is not None:
+        moved += purge_archived_votes(archive, chunk_size)
+    return moved
+
+
+def read_vote_archive(archive):
+    """Yield the vote records stored in an archive file."""
+    with gzip.open(archive_path(archive.file_name), 'rt', encoding='utf-8') as lines:
+        for line in lines:
+            yield json.loads(line)
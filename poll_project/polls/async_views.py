@@ -0,0 +1,121 @@
+"""
+async_views.py
+
+Async variants of the vote and results endpoints for deployments served
+through the ASGI entry point. They use Django's async ORM, cache and session
+APIs, so a request waiting on the database does not hold a worker thread.
+Responses match the sync DRF views.
+"""
+import json
+
+from django.db import IntegrityError
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from .models import Question, Choice, Vote
+from .dedup import amight_have_voted, arecord_voter
+from .conditional import poll_etag, acurrent_poll_version, etag_matches, not_modified
+from .results import aget_poll_results_entry
+from .routers import replica_reads, last_write_time
+from .throttling import acheck_rate_limits, throttled_detail
+from .snapshots import snapshot_url, snapshot_redirect
+
+
+async def _throttled(request, scope):
+    # Same limits and 429 response as the DRF throttle of the sync views
+    wait = await acheck_rate_limits(request, scope)
+    if wait is None:
+        return None
+    response = JsonResponse({"detail": throttled_detail(wait)}, status=429)
+    response['Retry-After'] = str(wait)
+    return response
+
+
+def _read_choice_id(request):
+    if request.content_type == 'application/json':
+        try:
+            return json.loads(request.body or b'{}').get('choice')
+        except (ValueError, AttributeError):
+            return None
+    return request.POST.get('choice')
+
+
+@csrf_exempt
+@require_POST
+async def vote_view(request, question_id):
+    """
+    Submit a vote for a question.
+    Prevents multiple votes from the same session or IP, like VoteAPIView.
+    """
+    throttled = await _throttled(request, 'vote')
+    if throttled is not None:
+        return throttled
+    question = await Question.objects.select_related('poll').filter(pk=question_id).afirst()
+    if question is None:
+        return JsonResponse({"detail": "No Question matches the given query."}, status=404)
+    poll = question.poll
+
+    # Check if poll expired or closed
+    if poll.has_expired():
+        return JsonResponse({"error": "This poll has expired."}, status=400)
+
+    # IP detection; the voter filter skips the query for first-time voters
+    ip_address = request.META.get('REMOTE_ADDR')
+    if (
+        await amight_have_voted(question.id, ip_address)
+        and await Vote.objects.filter(question=question, ip_address=ip_address).aexists()
+    ):
+        return JsonResponse({"error": "You have already voted from this IP."}, status=400)
+
+    # Session detection
+    session_key = f"has_voted_question_{question.id}"
+    if await request.session.aget(session_key):
+        return JsonResponse({"error": "You have already voted in this session."}, status=400)
+
+    try:
+        choice = await Choice.objects.filter(pk=int(_read_choice_id(request)), question=question).afirst()
+    except (TypeError, ValueError):
+        choice = None
+    if choice is None:
+        return JsonResponse({"detail": "No Choice matches the given query."}, status=404)
+
+    try:
+        await Vote.objects.acreate(
+            question=question,
+            choice=choice,
+            ip_address=ip_address
+        )
+    except IntegrityError:
+        # Voted through another worker the filter has not heard of
+        return JsonResponse({"error": "You have already voted from this IP."}, status=400)
+    await arecord_voter(question.id, ip_address)
+    await request.session.aset(session_key, True)  # Set session flag
+
+    return JsonResponse({"message": "Vote submitted successfully."}, status=201)
+
+
+@require_GET
+async def poll_results_view(request, pk):
+    """Return vote counts and winners for each question in a poll, read from a replica like PollResultsAPIView."""
+    throttled = await _throttled(request, 'results')
+    if throttled is not None:
+        return throttled
+    url = snapshot_url(pk)
+    if url is not None:
+        return snapshot_redirect(url)
+
+    with replica_reads(last_write_time(request)):
+        if request.META.get('HTTP_IF_NONE_MATCH'):
+            version = await acurrent_poll_version(pk)
+            if version is not None and etag_matches(request, poll_etag('results', pk, version)):
+                return not_modified(poll_etag('results', pk, version))
+
+        entry = await aget_poll_results_entry(pk)
+    if entry is None:
+        return JsonResponse({"detail": "Poll not found."}, status=404)
+
+    response = JsonResponse(entry['payload'])
+    if entry.get('poll_version') is not None:
+        response['ETag'] = poll_etag('results', pk, entry['poll_version'])
+    return response
@@ -0,0 +1,120 @@
+"""
+authoring.py
+
+Creates polls with their questions and choices in bulk.
+
+Nested poll data is validated by PollCreateSerializer first, then every
+poll, question and choice is inserted with one bulk_create per model in a
+single transaction, however many of each there are. The created objects
+are attached to their parents as if prefetched, so serializing them takes
+no further queries.
+
+Uploads for the import endpoint are JSON (a list of nested polls, as sent
+to the create endpoint) or CSV with one row per choice:
+
+    title,expiry,question,choice
+    Favourite language?,2030-01-01T00:00:00Z,Which one?,Python
+    Favourite language?,2030-01-01T00:00:00Z,Which one?,Go
+
+Consecutive rows with the same title and expiry make up one poll, and
+consecutive rows with the same question one question. An empty choice
+adds a question without choices, an empty question a poll without any.
+"""
+import csv
+import io
+import json
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from .models import Poll, Question, Choice
+
+CSV_COLUMNS = ('title', 'expiry', 'question', 'choice')
+
+
+def _cache_related(instance, name, objs):
+    # What prefetch_related leaves behind, so `instance.<name>.all()` needs no query
+    queryset = getattr(instance, name).all()
+    queryset._result_cache = objs
+    queryset._prefetch_done = True
+    instance._prefetched_objects_cache = {name: queryset}
+
+
+def create_polls(user, polls_data):
+    """
+    Insert validated polls with their questions and choices.
+
+    Args:
+        user: Owner of the new polls.
+        polls_data: Validated data of PollCreateSerializer, one dict per poll.
+
+    Returns:
+        list: The created polls, with questions and choices attached.
+    """
+    polls_data = list(polls_data)
+    with transaction.atomic():
+        polls = Poll.objects.bulk_create([
+            Poll(user=user, title=data['title'], expiry=data['expiry']) for data in polls_data
+        ])
+        questions_data = [data.get('questions', []) for data in polls_data]
+        questions = Question.objects.bulk_create([
+            Question(poll=poll, text=question['text'])
+            for poll, poll_questions in zip(polls, questions_data)
+            for question in poll_questions
+        ])
+        choices_data = [question.get('choices', []) for poll_questions in questions_data for question in poll_questions]
+        choices = Choice.objects.bulk_create([
+            Choice(question=question, text=choice['text'])
+            for question, question_choices in zip(questions, choices_data)
+            for choice in question_choices
+        ])
+
+    # Hand the inserted rows back out to their parents, in insertion order
+    remaining_questions, remaining_choices = iter(questions), iter(choices)
+    remaining_choices_data = iter(choices_data)
+    for poll, poll_questions in zip(polls, questions_data):
+        created_questions = [next(remaining_questions) for _ in poll_questions]
+        for question in created_questions:
+            _cache_related(question, 'choices', [next(remaining_choices) for _ in next(remaining_choices_data)])
+        _cache_related(poll, 'questions', created_questions)
+    return polls
+
+
+def _csv_polls(text):
+    reader = csv.DictReader(io.StringIO(text))
+    missing = [column for column in CSV_COLUMNS if column not in (reader.fieldnames or ())]
+    if missing:
+        raise ValidationError({'file': [f"Missing CSV columns: {', '.join(missing)}."]})
+
+    polls = []
+    poll_key = question_text = None
+    for row in reader:
+        if (row['title'], row['expiry']) != poll_key:
+            poll_key, question_text = (row['title'], row['expiry']), None
+            polls.append({'title': row['title'], 'expiry': row['expiry'], 'questions': []})
+        if row['question'] and row['question'] != question_text:
+            question_text = row['question']
+            polls[-1]['questions'].append({'text': question_text, 'choices': []})
+        if row['choice'] and question_text is not None:
+            polls[-1]['questions'][-1]['choices'].append({'text': row['choice']})
+    return polls
+
+
+def parse_poll_upload(upload):
+    """
+    Read nested poll data from an uploaded JSON or CSV file.
+
+    Raises:
+        ValidationError: If the file cannot be read as either.
+    """
+    try:
+        text = upload.read().decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise ValidationError({'file': ["The file must be UTF-8 encoded."]})
+
+    if upload.name.lower().endswith('.csv') or upload.content_type == 'text/csv':
+        return _csv_polls(text)
+    try:
+        return json.loads(text)
+    except ValueError:
+        raise ValidationError({'file': ["Upload a JSON list of polls or a CSV file."]})
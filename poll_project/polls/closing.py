@@ -0,0 +1,89 @@
+"""
+closing.py
+
+Closes polls once they expire.
+
+`close_expired_polls` finds open polls past their expiry through the
+partial index on open polls' expiry, freezes their results from the vote
+counters into a PollSnapshot and marks them closed. From then on results
+are served from the snapshot, as a static file once it is written (see
+snapshots.py), and votes are refused before any Vote query.
+
+Polls are closed POLLS_CLOSE_GRACE_SECONDS after they expire, so votes
+accepted just before the expiry have committed, and not while buffered
+votes for them still wait to be flushed.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .ingest import invalidate_question_info
+from .models import Poll, PollSnapshot, BufferedVote
+from .results import build_poll_results, invalidate_poll_results
+from .snapshots import write_snapshot_file_on_commit
+
+
+def closable_polls(now=None, grace_seconds=None):
+    """Open polls that expired at least `grace_seconds` ago, earliest expiry first."""
+    now = now or timezone.now()
+    grace_seconds = settings.POLLS_CLOSE_GRACE_SECONDS if grace_seconds is None else grace_seconds
+    return (
+        Poll.objects.filter(closed_at__isnull=True, expiry__lte=now - timedelta(seconds=grace_seconds))
+        .exclude(Exists(BufferedVote.objects.filter(question__poll=OuterRef('pk'))))
+        .order_by('expiry', 'id')
+    )
+
+
+def close_poll(poll_id, now=None):
+    """
+    Snapshot the final results of a poll and mark it closed.
+
+    Returns:
+        bool: True if the poll was closed, False if it was already closed
+        or no longer exists.
+    """
+    with transaction.atomic():
+        # Locked, so concurrent schedulers close each poll once
+        poll = Poll.objects.select_for_update().only('id', 'title', 'version', 'closed_at').filter(pk=poll_id).first()
+        if poll is None or poll.is_closed:
+            return False
+        snapshot = PollSnapshot.objects.create(poll=poll, payload=build_poll_results(poll), poll_version=poll.version)
+        Poll.objects.filter(pk=poll.pk).update(closed_at=now or timezone.now())
+        write_snapshot_file_on_commit(poll.pk, snapshot.payload)
+        invalidate_question_info(poll.questions.values_list('id', flat=True))
+        invalidate_poll_results(poll.pk)
+    return True
+
+
+def close_expired_polls(batch_size=None, grace_seconds=None, now=None):
+    """
+    Close every poll past its expiry and grace period, in batches.
+
+    Returns:
+        int: Number of polls closed.
+    """
+    batch_size = batch_size or settings.POLLS_CLOSE_BATCH_SIZE
+    now = now or timezone.now()
+    closed = 0
+    while True:
+        poll_ids = list(closable_polls(now, grace_seconds).values_list('id', flat=True)[:batch_size])
+        closed += sum(close_poll(poll_id, now) for poll_id in poll_ids)
+        if len(poll_ids) < batch_size:
+            return closed
+
+
+def seconds_until_next_closing(grace_seconds=None, now=None):
+    """Seconds until the next open poll becomes closable, or None if none will."""
+    grace_seconds = settings.POLLS_CLOSE_GRACE_SECONDS if grace_seconds is None else grace_seconds
+    now = now or timezone.now()
+    # Polls already closable but held back by buffered votes are left to the next run
+    expiry = (
+        Poll.objects.filter(closed_at__isnull=True, expiry__gt=now - timedelta(seconds=grace_seconds))
+        .order_by('expiry').values_list('expiry', flat=True).first()
+    )
+    if expiry is None:
+        return None
+    return (expiry - now).total_seconds() + grace_seconds
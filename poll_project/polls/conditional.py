@@ -0,0 +1,53 @@
+"""
+conditional.py
+
+Conditional GET support for poll responses.
+ETags are derived from Poll.version, which changes in the same transaction
+as any change to the poll, its questions, choices or votes. A request whose
+If-None-Match lists the current tag is answered with 304 after a single
+primary key lookup, before any serialization or results queries.
+"""
+from django.http import HttpResponseNotModified
+from django.utils.http import parse_etags
+
+from .models import Poll
+
+
+def poll_etag(kind, poll_id, version):
+    """Strong ETag of a poll representation (``kind``) at a given version."""
+    return f'"{kind}-{poll_id}-{version}"'
+
+
+def _version_query(poll_id):
+    return Poll.objects.filter(pk=int(poll_id)).values_list('version', flat=True)
+
+
+def current_poll_version(poll_id):
+    """Return the current version of a poll, or None if it does not exist."""
+    try:
+        return _version_query(poll_id).first()
+    except (TypeError, ValueError):
+        return None
+
+
+async def acurrent_poll_version(poll_id):
+    """Async variant of current_poll_version."""
+    try:
+        return await _version_query(poll_id).afirst()
+    except (TypeError, ValueError):
+        return None
+
+
+def etag_matches(request, etag):
+    """Return whether the request's If-None-Match lists the ETag (weak comparison)."""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or etag in [tag.removeprefix('W/') for tag in etags]
+
+
+def not_modified(etag):
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    return response
@@ -0,0 +1,270 @@
+"""
+dedup.py
+
+Probabilistic pre-check for duplicate votes.
+
+Each question gets a Bloom filter over the IP addresses that voted on it.
+A negative answer means the address has definitely not voted (as far as
+the filter knows), so the vote paths can skip the duplicate-vote query;
+a positive answer falls back to the query. The filter never decides that
+a vote is a duplicate on its own, and votes it has not seen (inserted by
+another process, or lost to cache eviction) are still rejected by the
+unique (ip_address, question) constraint on Vote.
+
+Filters are built lazily from the Vote table the first time a question is
+checked in a process. POLLS_VOTE_FILTER selects the variant: 'local' keeps
+the filters of the POLLS_VOTE_FILTER_MAX_FILTERS most recently checked
+questions in process memory, 'cache' shares them between processes through
+the results cache backend, 'off' disables the pre-check.
+"""
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Vote
+
+BUILD_CHUNK_SIZE = 2000
+
+
+def bloom_parameters(capacity, error_rate):
+    """Return the bit count and hash count of a filter for the given capacity and error rate."""
+    size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+    hash_count = max(1, round(size / capacity * math.log(2)))
+    return size, hash_count
+
+
+def bloom_positions(key, size, hash_count):
+    """Bit positions of a key, by double hashing one 128-bit digest."""
+    digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+    first = int.from_bytes(digest[:8], 'little')
+    second = int.from_bytes(digest[8:], 'little') | 1
+    return [(first + i * second) % size for i in range(hash_count)]
+
+
+def _set_bits(bits, positions):
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+
+
+def _has_bits(bits, positions):
+    return all(bits[position >> 3] & (1 << (position & 7)) for position in positions)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys."""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size, self.hash_count = bloom_parameters(capacity, error_rate)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def add(self, key):
+        _set_bits(self.bits, bloom_positions(key, self.size, self.hash_count))
+        self.count += 1
+
+    def __contains__(self, key):
+        return _has_bits(self.bits, bloom_positions(key, self.size, self.hash_count))
+
+
+def _voter_ips(question_id):
+    return (
+        Vote.objects.filter(question_id=question_id)
+        .exclude(ip_address=None)
+        .values_list('ip_address', flat=True)
+        .iterator(chunk_size=BUILD_CHUNK_SIZE)
+    )
+
+
+class LocalVoterFilter:
+    """
+    Per-question Bloom filters in process memory.
+    A filter that fills past its capacity is rebuilt from Vote at twice the
+    size on its next check, keeping the false positive rate bounded. Only
+    the max_filters most recently checked questions keep their filter, so
+    questions whose polls are no longer voted on do not hold memory.
+    """
+
+    def __init__(self, capacity, error_rate, max_filters):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.max_filters = max_filters
+        self._filters = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _build(self, question_id):
+        # Vote is scanned without the lock, so checks of other questions are not
+        # held up; a filter built meanwhile by another thread wins
+        ips = list(_voter_ips(question_id))
+        bloom = BloomFilter(max(self.capacity, 2 * len(ips)), self.error_rate)
+        for ip_address in ips:
+            bloom.add(ip_address)
+        with self._lock:
+            current = self._filters.get(question_id)
+            if current is not None and current.count <= current.capacity:
+                return current
+            self._filters[question_id] = bloom
+            self._filters.move_to_end(question_id)
+            while len(self._filters) > self.max_filters:
+                self._filters.popitem(last=False)
+            return bloom
+
+    def _current(self, question_id):
+        with self._lock:
+            bloom = self._filters.get(question_id)
+            if bloom is None or bloom.count > bloom.capacity:
+                return None
+            self._filters.move_to_end(question_id)
+            return bloom
+
+    def might_have_voted(self, question_id, ip_address):
+        bloom = self._current(question_id) or self._build(question_id)
+        return ip_address in bloom
+
+    async def amight_have_voted(self, question_id, ip_address):
+        bloom = self._current(question_id) or await sync_to_async(self._build)(question_id)
+        return ip_address in bloom
+
+    def add(self, question_id, ip_address):
+        with self._lock:
+            bloom = self._filters.get(question_id)
+            if bloom is not None:
+                bloom.add(ip_address)
+
+    async def aadd(self, question_id, ip_address):
+        self.add(question_id, ip_address)
+
+
+class CacheVoterFilter:
+    """
+    Per-question Bloom filters shared through the cache.
+    Each filter is a single bitmap value, so a check costs one get and
+    eviction drops whole filters, which are rebuilt from Vote on their next
+    check, never single bits.
+
+    Cache backends cannot set single bits of a value, so an add reads the
+    whole bitmap and writes it back if any of its bits were unset. Two
+    concurrent adds can race, and the later write loses the bits of the
+    earlier one. This is accepted: a lost bit only makes that voter's next
+    check negative, and the duplicate insert that follows is rejected by
+    the unique constraint, like votes recorded by other processes.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.size, self.hash_count = bloom_parameters(capacity, error_rate)
+
+    def _cache(self):
+        return caches[settings.POLLS_RESULTS_CACHE]
+
+    def _key(self, question_id):
+        # Sized in the key, so filters built for other settings are never read
+        return f"polls:voters:{question_id}:{self.size}:{self.hash_count}"
+
+    def _positions(self, ip_address):
+        return bloom_positions(ip_address, self.size, self.hash_count)
+
+    def _build(self, question_id):
+        bits = bytearray((self.size + 7) // 8)
+        for ip_address in _voter_ips(question_id):
+            _set_bits(bits, self._positions(ip_address))
+        self._cache().set(self._key(question_id), bytes(bits), None)
+        return bits
+
+    def might_have_voted(self, question_id, ip_address):
+        bits = self._cache().get(self._key(question_id))
+        if bits is None:
+            bits = self._build(question_id)
+        return _has_bits(bits, self._positions(ip_address))
+
+    async def amight_have_voted(self, question_id, ip_address):
+        bits = await self._cache().aget(self._key(question_id))
+        if bits is None:
+            bits = await sync_to_async(self._build)(question_id)
+        return _has_bits(bits, self._positions(ip_address))
+
+    def _added(self, bits, ip_address):
+        """Return the bitmap with the address added, or None if it already has its bits."""
+        positions = self._positions(ip_address)
+        if bits is None or _has_bits(bits, positions):
+            return None
+        bits = bytearray(bits)
+        _set_bits(bits, positions)
+        return bytes(bits)
+
+    def add(self, question_id, ip_address):
+        # A missing filter is built from Vote, this vote included, on its next check
+        bits = self._added(self._cache().get(self._key(question_id)), ip_address)
+        if bits is not None:
+            self._cache().set(self._key(question_id), bits, None)
+
+    async def aadd(self, question_id, ip_address):
+        bits = self._added(await self._cache().aget(self._key(question_id)), ip_address)
+        if bits is not None:
+            await self._cache().aset(self._key(question_id), bits, None)
+
+
+_filter = None
+_filter_config = None
+
+
+def get_voter_filter():
+    """Return the configured voter filter, or None if the pre-check is off."""
+    global _filter, _filter_config
+    config = (
+        settings.POLLS_VOTE_FILTER, settings.POLLS_VOTE_FILTER_CAPACITY,
+        settings.POLLS_VOTE_FILTER_ERROR_RATE, settings.POLLS_VOTE_FILTER_MAX_FILTERS,
+    )
+    if config != _filter_config:
+        kind, capacity, error_rate, max_filters = config
+        if kind == 'local':
+            _filter = LocalVoterFilter(capacity, error_rate, max_filters)
+        elif kind == 'cache':
+            _filter = CacheVoterFilter(capacity, error_rate)
+        else:
+            _filter = None
+        _filter_config = config
+    return _filter
+
+
+def reset_voter_filter():
+    """Drop the process's filters; they are rebuilt from Vote on the next check."""
+    global _filter_config
+    _filter_config = None
+
+
+def might_have_voted(question_id, ip_address):
+    """
+    Return False only if the address has definitely not voted on the question.
+    Callers run the duplicate-vote query when this returns True.
+    """
+    voter_filter = get_voter_filter()
+    if voter_filter is None or ip_address is None:
+        return True
+    return voter_filter.might_have_voted(question_id, ip_address)
+
+
+async def amight_have_voted(question_id, ip_address):
+    """Async variant of might_have_voted."""
+    voter_filter = get_voter_filter()
+    if voter_filter is None or ip_address is None:
+        return True
+    return await voter_filter.amight_have_voted(question_id, ip_address)
+
+
+def record_voter(question_id, ip_address):
+    """Add an address to the question's filter after its vote was inserted."""
+    voter_filter = get_voter_filter()
+    if voter_filter is not None and ip_address is not None:
+        voter_filter.add(question_id, ip_address)
+
+
+async def arecord_voter(question_id, ip_address):
+    """Async variant of record_voter."""
+    voter_filter = get_voter_filter()
+    if voter_filter is not None and ip_address is not None:
+        await voter_filter.aadd(question_id, ip_address)
@@ -0,0 +1,225 @@
+"""
+exports.py
+
+Row sources for the admin exports and the background Excel export worker.
+
+Rows are read with server-side cursors so exports of any size run at flat
+memory. Excel files are written by ExportJob workers with openpyxl's
+write-only mode: rows are spooled to a temporary file while column widths
+are measured, then streamed into the workbook once the widths are known.
+Rows are read from the database of the given queryset, and jobs read from a
+replica, so large exports stay off the primary.
+"""
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import openpyxl
+from openpyxl.utils import get_column_letter
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Poll, Question, Choice, ExportJob
+from .routers import replica_reads
+
+EXPORT_CHUNK_SIZE = 2000
+PROGRESS_EVERY = 5000
+
+QUESTION_VOTE_HEADERS = ['Poll', 'Question', 'Choice', 'Vote Count']
+POLL_VOTE_HEADERS = ['Poll', 'Question', 'Choice', 'Votes', 'Percentage']
+RAW_VOTE_HEADERS = ['Vote ID', 'Poll', 'Question', 'Choice', 'User', 'Voted At']
+
+_executor = None
+
+
+def percentage(votes, total_votes):
+    return (votes / total_votes * 100) if total_votes > 0 else 0
+
+
+def question_vote_choices(questions):
+    # Read from the database the questions come from, which may be a replica
+    return Choice.objects.using(questions.db).filter(question__in=questions)
+
+
+def question_vote_rows(questions):
+    """Vote count per choice of the given questions, from one joined query."""
+    return (
+        question_vote_choices(questions)
+        .order_by('question__poll_id', 'question_id', 'id')
+        .values_list('question__poll__title', 'question__text', 'text', 'vote_count')
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+
+def poll_vote_choices(polls):
+    return Choice.objects.using(polls.db).filter(question__poll__in=polls)
+
+
+def poll_vote_rows(polls):
+    """Votes and share of the question total per choice of the given polls."""
+    choices = (
+        poll_vote_choices(polls)
+        .order_by('question__poll_id', 'question_id', 'id')
+        .values_list('question__poll__title', 'question__text', 'text', 'vote_count', 'question__vote_count')
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    for poll_title, question_text, choice_text, votes, total_votes in choices:
+        yield [poll_title, question_text, choice_text, votes, f"{percentage(votes, total_votes):.2f}%"]
+
+
+def raw_vote_rows(votes):
+    """Every individual vote of the given queryset."""
+    rows = (
+        votes.order_by('id')
+        .values_list('id', 'choice__question__poll__title', 'choice__question__text', 'choice__text', 'user__username', 'voted_at')
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    for vote_id, poll_title, question_text, choice_text, username, voted_at in rows:
+        yield [vote_id, poll_title, question_text, choice_text, username or 'Anonymous', voted_at.isoformat()]
+
+
+# Sheet title, headers, row count query and row source per export kind
+EXCEL_EXPORTS = {
+    ExportJob.QUESTION_VOTES: (
+        "Vote Stats", QUESTION_VOTE_HEADERS,
+        lambda ids: question_vote_choices(Question.objects.filter(pk__in=ids)).count(),
+        lambda ids: question_vote_rows(Question.objects.filter(pk__in=ids)),
+    ),
+    ExportJob.POLL_VOTES: (
+        "Poll Vote Stats", POLL_VOTE_HEADERS,
+        lambda ids: poll_vote_choices(Poll.objects.filter(pk__in=ids)).count(),
+        lambda ids: poll_vote_rows(Poll.objects.filter(pk__in=ids)),
+    ),
+}
+
+
+def export_path(file_name):
+    return os.path.join(settings.POLLS_EXPORT_ROOT, file_name)
+
+
+def start_export_job(kind, object_ids, user=None):
+    """
+    Create an export job and hand it to the in-process worker pool once the
+    surrounding transaction commits. With POLLS_EXPORT_IN_PROCESS disabled the
+    job waits for ``manage.py run_export_jobs``.
+    """
+    job = ExportJob.objects.create(kind=kind, object_ids=list(object_ids), created_by=user)
+    if settings.POLLS_EXPORT_IN_PROCESS:
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_thread, job.pk))
+    return job
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.POLLS_EXPORT_WORKERS, thread_name_prefix='export')
+    return _executor
+
+
+def _run_in_thread(job_id):
+    try:
+        run_export_job(job_id)
+    finally:
+        close_old_connections()
+
+
+def run_export_job(job_id):
+    """
+    Claim a pending job and write its workbook.
+
+    Returns:
+        bool: False if another worker already claimed the job.
+    """
+    claimed = ExportJob.objects.filter(pk=job_id, status=ExportJob.PENDING).update(
+        status=ExportJob.RUNNING, started_at=timezone.now()
+    )
+    if not claimed:
+        return False
+
+    job = ExportJob.objects.get(pk=job_id)
+    try:
+        # Rows come from a replica once it has caught up with the admin's edits
+        with replica_reads(last_write=job.created_at.timestamp()):
+            job.row_count = write_excel_export(job)
+        job.status = ExportJob.DONE
+        job.progress = 100
+    except Exception as exc:
+        job.status = ExportJob.FAILED
+        job.error = str(exc)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['row_count', 'status', 'progress', 'error', 'file_name', 'finished_at'])
+    return True
+
+
+def write_excel_export(job):
+    """
+    Write the rows of an export job into a write-only workbook.
+
+    openpyxl writes column widths before the first row, so rows are first
+    spooled to a temporary file while widths are measured, then streamed into
+    the sheet. Neither pass holds more than one row in memory.
+
+    Returns:
+        int: Number of data rows written.
+    """
+    title, headers, count_rows, rows = EXCEL_EXPORTS[job.kind]
+    total = count_rows(job.object_ids)
+    widths = [len(header) for header in headers]
+    processed = 0
+
+    def report(done):
+        progress = int(done * 100 / (2 * total)) if total else 0
+        ExportJob.objects.filter(pk=job.pk).update(progress=min(progress, 99))
+
+    os.makedirs(settings.POLLS_EXPORT_ROOT, exist_ok=True)
+    job.file_name = f"{job.kind}_{job.pk}.xlsx"
+
+    with tempfile.TemporaryFile('w+', encoding='utf-8') as spool:
+        row_count = 0
+        for row in rows(job.object_ids):
+            for i, value in enumerate(row):
+                widths[i] = max(widths[i], len(str(value if value is not None else "")))
+            spool.write(json.dumps(list(row)) + "\n")
+            row_count += 1
+            processed += 1
+            if processed % PROGRESS_EVERY == 0:
+                report(processed)
+
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet(title)
+        for i, width in enumerate(widths, start=1):
+            sheet.column_dimensions[get_column_letter(i)].width = width + 2
+
+        sheet.append(headers)
+        spool.seek(0)
+        for line in spool:
+            sheet.append(json.loads(line))
+            processed += 1
+            if processed % PROGRESS_EVERY == 0:
+                report(processed)
+
+        workbook.save(export_path(job.file_name))
+
+    return row_count
+
+
+def fail_stale_export_jobs(timeout=None):
+    """
+    Mark jobs that have been running for more than ``timeout`` seconds
+    (POLLS_EXPORT_TIMEOUT by default) as failed. Their worker most likely
+    died mid-export, and nothing else would ever move them out of RUNNING.
+
+    Returns:
+        int: Number of jobs marked failed.
+    """
+    timeout = settings.POLLS_EXPORT_TIMEOUT if timeout is None else timeout
+    now = timezone.now()
+    return ExportJob.objects.filter(
+        status=ExportJob.RUNNING, started_at__lt=now - timedelta(seconds=timeout),
+    ).update(
+        status=ExportJob.FAILED, finished_at=now,
+        error=f"The export did not finish within {timeout} seconds; its worker probably stopped.",
+    )
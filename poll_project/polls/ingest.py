@@ -0,0 +1,238 @@
+"""
+ingest.py
+
+Buffered vote ingestion for high-traffic events.
+Votes are validated against cached question metadata and shared dedup
+markers, appended to the BufferedVote table with a single insert, and moved
+into Vote in batches with bulk_create once a size or time threshold is hit.
+
+Markers only turn away most repeat votes early: they expire with the poll
+and can be evicted, so the flush checks Vote and the unique constraints
+again and drops duplicates that got past them.
+"""
+import logging
+import math
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import metrics
+from .models import Question, Vote, BufferedVote
+
+QUESTION_INFO_TIMEOUT = 300
+# Lifetime of dedup markers of questions whose poll expiry is unknown
+DEDUP_MARKER_TIMEOUT = 24 * 60 * 60
+
+logger = logging.getLogger(__name__)
+
+_flush_lock = threading.Lock()
+_buffered_since_flush = 0
+_last_flush = time.monotonic()
+
+
+def question_info_key(question_id):
+    return f"polls:question:{question_id}"
+
+
+def get_question_info(question_id):
+    """
+    Return cached metadata needed to validate a vote for a question.
+
+    Returns:
+        dict | None: ``poll_id``, ``expiry``, ``closed`` and ``choice_ids``, or None if
+        the question does not exist.
+    """
+    key = question_info_key(question_id)
+    info = cache.get(key)
+    if info is None:
+        question = Question.objects.select_related('poll').filter(pk=question_id).first()
+        if question is None:
+            return None
+        info = {
+            "poll_id": question.poll_id,
+            "expiry": question.poll.expiry,
+            "closed": question.poll.is_closed,
+            "choice_ids": frozenset(question.choices.values_list('id', flat=True)),
+        }
+        cache.set(key, info, QUESTION_INFO_TIMEOUT)
+    return info
+
+
+def invalidate_question_info(question_ids):
+    cache.delete_many([question_info_key(question_id) for question_id in question_ids])
+
+
+def _dedup_keys(question_id, ip_address=None, session_key=None, user_id=None):
+    keys = []
+    if ip_address:
+        keys.append(f"polls:voted:{question_id}:ip:{ip_address}")
+    if session_key:
+        keys.append(f"polls:voted:{question_id}:session:{session_key}")
+    if user_id:
+        keys.append(f"polls:voted:{question_id}:user:{user_id}")
+    return keys
+
+
+def _marker_timeout(question_id):
+    """Seconds until the question's poll expires; no vote can need the markers after that."""
+    info = get_question_info(question_id)
+    if info is None or info["expiry"] is None:
+        return DEDUP_MARKER_TIMEOUT
+    return max(1, math.ceil((info["expiry"] - timezone.now()).total_seconds()))
+
+
+def buffer_vote(question_id, choice_id, ip_address=None, session_key=None, user_id=None):
+    """
+    Claim the voter's dedup markers and append the vote to the write buffer.
+
+    Returns:
+        uuid.UUID | None: Receipt for the accepted vote, or None if the voter
+        already voted on this question.
+    """
+    claimed = []
+    timeout = _marker_timeout(question_id)
+    for key in _dedup_keys(question_id, ip_address, session_key, user_id):
+        if not cache.add(key, True, timeout=timeout):
+            cache.delete_many(claimed)
+            return None
+        claimed.append(key)
+
+    receipt = uuid.uuid4()
+    try:
+        BufferedVote.objects.create(
+            receipt=receipt,
+            question_id=question_id,
+            choice_id=choice_id,
+            ip_address=ip_address,
+            session_key=session_key,
+            user_id=user_id,
+        )
+    except Exception:
+        cache.delete_many(claimed)
+        raise
+
+    metrics.inc('polls_votes_buffered_total')
+    _note_buffered()
+    return receipt
+
+
+def _note_buffered():
+    """Flush inline once the size or time trigger of this process fires."""
+    global _buffered_since_flush
+    with _flush_lock:
+        _buffered_since_flush += 1
+        due = (
+            _buffered_since_flush >= settings.POLLS_VOTE_BUFFER_BATCH_SIZE
+            or time.monotonic() - _last_flush >= settings.POLLS_VOTE_BUFFER_FLUSH_INTERVAL
+        )
+    if due:
+        # The vote is already buffered, so a failed flush must not fail the request;
+        # the rows stay in the buffer for the next flush
+        try:
+            flush_vote_buffer()
+        except Exception:
+            logger.exception("Inline flush of the vote buffer failed")
+
+
+def flush_vote_buffer(batch_size=None):
+    """
+    Move buffered votes into Vote in batches.
+
+    Each batch is inserted and removed from the buffer in one transaction.
+    Rows are locked with SKIP LOCKED where supported; elsewhere the delete
+    row count guards against a concurrent flush of the same rows.
+
+    Returns:
+        int: Number of votes written to Vote.
+    """
+    global _buffered_since_flush, _last_flush
+    batch_size = batch_size or settings.POLLS_VOTE_BUFFER_BATCH_SIZE
+    with _flush_lock:
+        _buffered_since_flush = 0
+        _last_flush = time.monotonic()
+
+    written = 0
+    while True:
+        with transaction.atomic():
+            pending = list(
+                BufferedVote.objects.select_for_update(skip_locked=True)
+                .order_by('id')[:batch_size]
+            )
+            if not pending:
+                break
+            votes = _insert_votes(_drop_duplicates(pending))
+            deleted, _ = BufferedVote.objects.filter(pk__in=[row.pk for row in pending]).delete()
+            if deleted != len(pending):
+                raise RuntimeError("Buffered votes were flushed concurrently; batch rolled back.")
+        written += len(votes)
+        if len(pending) < batch_size:
+            break
+    return written
+
+
+def _insert_votes(votes):
+    """
+    Insert a batch of votes, falling back to one insert per vote if the batch
+    hits a unique constraint. Votes that still conflict are dropped.
+
+    Returns:
+        list: The votes inserted.
+    """
+    try:
+        with transaction.atomic():
+            return Vote.objects.bulk_create(votes)
+    except IntegrityError:
+        # Another flush or a direct vote inserted one of these voters after the check
+        pass
+    inserted = []
+    for vote in votes:
+        try:
+            with transaction.atomic():
+                vote.save()
+        except IntegrityError:
+            continue
+        inserted.append(vote)
+    return inserted
+
+
+def _drop_duplicates(pending):
+    """
+    Build Vote rows for a batch, skipping voters that already voted on the
+    question, either earlier in the batch or in the Vote table.
+    """
+    question_ids = {row.question_id for row in pending}
+    ips = {row.ip_address for row in pending if row.ip_address}
+    sessions = {row.session_key for row in pending if row.session_key}
+    users = {row.user_id for row in pending if row.user_id}
+
+    voter_filter = Q(ip_address__in=ips) | Q(session_key__in=sessions) | Q(user_id__in=users)
+    seen = set()
+    existing = (
+        Vote.objects.filter(question_id__in=question_ids)
+        .filter(voter_filter)
+        .values_list('question_id', 'ip_address', 'session_key', 'user_id')
+    )
+    for question_id, ip_address, session_key, user_id in existing:
+        seen.update(_dedup_keys(question_id, ip_address, session_key, user_id))
+
+    votes = []
+    for row in pending:
+        keys = _dedup_keys(row.question_id, row.ip_address, row.session_key, row.user_id)
+        if seen.intersection(keys):
+            continue
+        seen.update(keys)
+        votes.append(Vote(
+            question_id=row.question_id,
+            choice_id=row.choice_id,
+            user_id=row.user_id,
+            ip_address=row.ip_address,
+            session_key=row.session_key,
+            voted_at=row.received_at,
+        ))
+    return votes
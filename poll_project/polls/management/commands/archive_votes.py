@@ -0,0 +1,72 @@
+"""
+archive_votes.py
+
+Moves the votes of polls that expired more than --grace-hours ago into
+compressed archive files under POLLS_ARCHIVE_ROOT, keeping per-choice
+tallies of what was archived. Vote counters are not changed, so results
+are unaffected, and pending votes are rolled up first so time series keep
+their history. Run it periodically (e.g. nightly) to keep the Vote table
+limited to polls that are still open.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from polls.archive import ARCHIVE_CHUNK_SIZE, archivable_polls, archive_poll_votes
+from polls.rollups import rollup_votes
+
+
+class Command(BaseCommand):
+    help = "Archive and delete the votes of expired polls."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours',
+            type=float,
+            default=settings.POLLS_ARCHIVE_GRACE_HOURS,
+            help='Only archive polls that expired at least this many hours ago.',
+        )
+        parser.add_argument(
+            '--poll',
+            type=int,
+            action='append',
+            dest='poll_ids',
+            help='Archive only this poll (repeatable). It must still be expired.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=ARCHIVE_CHUNK_SIZE,
+            help='Votes read and deleted per database round trip.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only list the polls that would be archived.',
+        )
+
+    def handle(self, *args, **options):
+        expired_before = timezone.now() - timedelta(hours=options['grace_hours'])
+        polls = archivable_polls(expired_before)
+        if options['poll_ids']:
+            polls = polls.filter(id__in=options['poll_ids'])
+
+        if not options['dry_run']:
+            # Count pending votes into the time-series rollups before they leave Vote
+            rollup_votes()
+
+        total = 0
+        for poll in polls.only('id', 'title'):
+            if options['dry_run']:
+                self.stdout.write(f"Would archive poll {poll.pk} ({poll.title})")
+                continue
+            moved = archive_poll_votes(poll, options['batch_size'])
+            total += moved
+            self.stdout.write(f"Poll {poll.pk}: archived {moved} votes")
+
+        if options['dry_run']:
+            self.stdout.write("Dry run: no votes were archived.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Archived {total} votes."))
@@ -0,0 +1,31 @@
+"""
+build_openapi_schema.py
+
+Generates the OpenAPI schema served at /api/docs/ into
+polls/static/polls/openapi.json. Run it before collectstatic whenever the
+API changes; with --check it only compares, and fails if the file is stale.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from polls.schema import SCHEMA_PATH, generate_schema, read_schema, write_schema
+
+
+class Command(BaseCommand):
+    help = "Build the static OpenAPI schema of the API."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Fail if the schema file differs from the generated schema, without writing it.',
+        )
+
+    def handle(self, *args, **options):
+        schema = generate_schema()
+        if read_schema() == schema:
+            self.stdout.write(self.style.SUCCESS(f"{SCHEMA_PATH} is up to date."))
+            return
+        if options['check']:
+            raise CommandError(f"{SCHEMA_PATH} is stale; run `manage.py build_openapi_schema` and commit it.")
+        write_schema(schema)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {SCHEMA_PATH}."))
@@ -0,0 +1,35 @@
+"""
+build_result_snapshots.py
+
+Rewrites the static results files of closed polls from their snapshots,
+with their gzip and brotli copies, compressing on several threads. Use it
+to fill a new POLLS_SNAPSHOT_ROOT or after changing the response format.
+"""
+import os
+
+from django.core.management.base import BaseCommand
+
+from polls.snapshots import regenerate_snapshot_files
+
+
+class Command(BaseCommand):
+    help = "Write the precompressed results files of closed polls."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll',
+            type=int,
+            action='append',
+            dest='poll_ids',
+            help='Only this poll (repeatable).',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Files compressed in parallel.',
+        )
+
+    def handle(self, *args, **options):
+        written = regenerate_snapshot_files(poll_ids=options['poll_ids'], workers=options['workers'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} results snapshots."))
@@ -0,0 +1,52 @@
+"""
+close_expired_polls.py
+
+Closes polls past their expiry, freezing their final results into a
+snapshot. Run it from cron, or with --loop as a worker that wakes up as the
+next poll expires.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from polls.closing import close_expired_polls, seconds_until_next_closing
+
+
+class Command(BaseCommand):
+    help = "Snapshot the final results of expired polls and mark them closed."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.POLLS_CLOSE_BATCH_SIZE,
+            help='Polls closed per query for closable polls.',
+        )
+        parser.add_argument(
+            '--grace',
+            type=float,
+            default=settings.POLLS_CLOSE_GRACE_SECONDS,
+            help='Only close polls that expired at least this many seconds ago.',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep closing polls as they expire until interrupted.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.POLLS_CLOSE_INTERVAL,
+            help='Longest sleep between runs in --loop mode.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            closed = close_expired_polls(batch_size=options['batch_size'], grace_seconds=options['grace'])
+            if closed or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f"Closed {closed} polls."))
+            if not options['loop']:
+                break
+            wait = seconds_until_next_closing(grace_seconds=options['grace'])
+            time.sleep(options['interval'] if wait is None else min(max(wait, 0.0), options['interval']))
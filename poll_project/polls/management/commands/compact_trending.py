@@ -0,0 +1,50 @@
+"""
+compact_trending.py
+
+Drops cold and expired polls from the trending leaderboard, keeping the
+set of scored polls bounded. Run it from cron, or with --loop as a worker.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from polls.trending import compact_trending_scores
+
+
+class Command(BaseCommand):
+    help = "Clear the trending scores of cold and expired polls."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-score',
+            type=float,
+            default=settings.POLLS_TRENDING_MIN_SCORE,
+            help='Drop polls whose decayed vote count is below this.',
+        )
+        parser.add_argument(
+            '--capacity',
+            type=int,
+            default=settings.POLLS_TRENDING_CAPACITY,
+            help='Keep at most this many scored polls.',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep compacting every --interval seconds until interrupted.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.POLLS_TRENDING_COMPACT_INTERVAL,
+            help='Seconds between runs in --loop mode.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            dropped = compact_trending_scores(min_score=options['min_score'], capacity=options['capacity'])
+            if dropped or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f"Dropped {dropped} polls from trending."))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
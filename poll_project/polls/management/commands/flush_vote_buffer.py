@@ -0,0 +1,45 @@
+"""
+flush_vote_buffer.py
+
+Moves votes accepted in buffered ingestion mode from the write buffer into
+the Vote table. Run it once to drain the buffer, or with --loop as a worker
+so buffered votes are flushed even when traffic stops.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from polls.ingest import flush_vote_buffer
+
+
+class Command(BaseCommand):
+    help = "Flush buffered votes into the Vote table in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.POLLS_VOTE_BUFFER_BATCH_SIZE,
+            help='Votes inserted per bulk_create.',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep flushing every --interval seconds until interrupted.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.POLLS_VOTE_BUFFER_FLUSH_INTERVAL,
+            help='Seconds between flushes in --loop mode.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            written = flush_vote_buffer(batch_size=options['batch_size'])
+            if written or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f"Flushed {written} buffered votes."))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
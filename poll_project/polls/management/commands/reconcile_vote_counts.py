@@ -0,0 +1,92 @@
+"""
+reconcile_vote_counts.py
+
+Rebuilds the denormalized vote counters on choices, questions and polls
+from the Vote table plus the tallies of archived votes, and reports any
+drift that was found.
+"""
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from polls.models import Poll, Question, Choice, ArchivedVoteCount, bump_poll_versions
+from polls.results import invalidate_poll_results
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount votes per choice, question and poll and correct drifted counters. "
+        "Votes recorded while the command runs may be reported as drift; "
+        "run it during a quiet period for exact results."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report drift, do not write corrected counters.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows fetched and updated per database round trip.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        actual = {Choice: {}, Question: defaultdict(int), Poll: defaultdict(int)}
+
+        # One grouped query over choices; questions and polls are summed in memory
+        rows = (
+            Choice.objects.annotate(actual=Count('votes'))
+            .values_list('id', 'question_id', 'question__poll_id', 'actual')
+            .order_by()
+        )
+        # Votes moved out by archive_votes still count towards the counters
+        archived = dict(ArchivedVoteCount.objects.values_list('choice_id', 'vote_count'))
+        for choice_id, question_id, poll_id, count in rows.iterator(chunk_size=batch_size):
+            count += archived.get(choice_id, 0)
+            actual[Choice][choice_id] = count
+            actual[Question][question_id] += count
+            actual[Poll][poll_id] += count
+
+        poll_lookups = {Choice: 'question__poll_id', Question: 'poll_id', Poll: 'id'}
+        with transaction.atomic():
+            changed_polls = set()
+            for model in (Choice, Question, Poll):
+                drifted = self._reconcile(model, actual[model], batch_size, options['dry_run'])
+                if drifted and not options['dry_run']:
+                    changed_polls.update(
+                        model.objects.filter(pk__in=drifted).values_list(poll_lookups[model], flat=True)
+                    )
+            # Corrected counts change the results, so conditional requests must not get a 304
+            # and cached results must be recomputed (again on commit, as for the signals)
+            bump_poll_versions(changed_polls)
+            for poll_id in changed_polls:
+                invalidate_poll_results(poll_id)
+
+        if options['dry_run']:
+            self.stdout.write("Dry run: no counters were changed.")
+
+    def _reconcile(self, model, actual, batch_size, dry_run):
+        drifted = []
+        total_drift = 0
+        checked = 0
+        for obj in model.objects.only('id', 'vote_count').iterator(chunk_size=batch_size):
+            checked += 1
+            expected = actual.get(obj.pk, 0)
+            if obj.vote_count != expected:
+                total_drift += expected - obj.vote_count
+                obj.vote_count = expected
+                drifted.append(obj)
+
+        if drifted and not dry_run:
+            model.objects.bulk_update(drifted, ['vote_count'], batch_size=batch_size)
+
+        name = model._meta.verbose_name_plural.capitalize()
+        message = f"{name}: {len(drifted)} of {checked} drifted (net drift {total_drift:+d})"
+        self.stdout.write(self.style.WARNING(message) if drifted else self.style.SUCCESS(message))
+        return [obj.pk for obj in drifted]
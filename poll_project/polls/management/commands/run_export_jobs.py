@@ -0,0 +1,54 @@
+"""
+run_export_jobs.py
+
+Runs pending Excel export jobs outside the web workers. Use it when
+POLLS_EXPORT_IN_PROCESS is disabled, or to pick up jobs whose worker
+process was restarted before it started them. Jobs left running longer
+than --timeout, by a worker that died mid-export, are marked failed.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from polls.exports import fail_stale_export_jobs, run_export_job
+from polls.models import ExportJob
+
+
+class Command(BaseCommand):
+    help = "Run pending background Excel export jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new jobs every --interval seconds until interrupted.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds between polls in --loop mode.',
+        )
+        parser.add_argument(
+            '--timeout',
+            type=int,
+            default=settings.POLLS_EXPORT_TIMEOUT,
+            help='Seconds after which a running job is considered abandoned and marked failed.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            failed = fail_stale_export_jobs(options['timeout'])
+            if failed:
+                self.stdout.write(self.style.ERROR(f"Marked {failed} abandoned export jobs as failed"))
+            pending = ExportJob.objects.filter(status=ExportJob.PENDING).order_by('id').values_list('id', flat=True)
+            for job_id in pending:
+                if run_export_job(job_id):
+                    job = ExportJob.objects.get(pk=job_id)
+                    message = f"{job}: {job.get_status_display()} ({job.row_count} rows)"
+                    style = self.style.SUCCESS if job.status == ExportJob.DONE else self.style.ERROR
+                    self.stdout.write(style(message))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,333 @@
+"""
+metrics.py
+
+Request and hot-path metrics in the Prometheus text format.
+
+Each process keeps its counters and histograms in memory. When
+POLLS_METRICS_DIR is set, the process also writes a snapshot to its own
+file in that directory at most every POLLS_METRICS_FLUSH_INTERVAL seconds.
+The /metrics endpoint adds up the snapshots of all processes, so a scrape
+that lands on any gunicorn worker reports the totals of all of them. When a
+worker exits, the gunicorn master folds its file into metrics-retired.json
+(see gunicorn.conf.py), so counters never go backwards while the directory
+keeps one file per live worker. Clear the directory when the whole server
+restarts.
+"""
+import bisect
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+DB_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+
+    def empty(self):
+        return 0
+
+    def merge(self, total, value):
+        return total + value
+
+    def samples(self, labels, value):
+        yield self.name, labels, value
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+
+    def empty(self):
+        # Per-bucket (non-cumulative) counts plus +Inf, then the sum
+        return [0] * (len(self.buckets) + 1) + [0.0]
+
+    def merge(self, total, value):
+        return [a + b for a, b in zip(total, value)]
+
+    def samples(self, labels, value):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), value[:-1]):
+            cumulative += count
+            yield f'{self.name}_bucket', labels + (('le', str(bound)),), cumulative
+        yield f'{self.name}_sum', labels, value[-1]
+        yield f'{self.name}_count', labels, cumulative
+
+
+METRICS = {
+    metric.name: metric for metric in (
+        Histogram(
+            'polls_http_request_duration_seconds', 'Request latency per view.', ('view', 'method'),
+        ),
+        Counter(
+            'polls_http_requests_total', 'Requests per view and status code.', ('view', 'method', 'status'),
+        ),
+        Histogram(
+            'polls_db_queries_per_request', 'Database queries per request.', ('view',), QUERY_COUNT_BUCKETS,
+        ),
+        Histogram(
+            'polls_db_seconds_per_request', 'Time spent in database queries per request.', ('view',),
+            DB_TIME_BUCKETS,
+        ),
+        Counter(
+            'polls_results_cache_total', 'Results cache lookups by outcome.', ('outcome',),
+        ),
+        Counter(
+            'polls_votes_recorded_total', 'Votes written to the Vote table.',
+        ),
+        Counter(
+            'polls_votes_buffered_total', 'Votes accepted into the write buffer.',
+        ),
+    )
+}
+
+
+class Registry:
+    """Metric values of this process, keyed by metric name and label values."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {name: {} for name in METRICS}
+        self.last_flush = time.monotonic()
+
+    def reset(self):
+        with self.lock:
+            self.values = {name: {} for name in METRICS}
+
+    def inc(self, name, labels=(), amount=1):
+        with self.lock:
+            series = self.values[name]
+            series[labels] = series.get(labels, 0) + amount
+
+    def observe(self, name, value, labels=()):
+        metric = METRICS[name]
+        index = bisect.bisect_left(metric.buckets, value)
+        with self.lock:
+            series = self.values[name]
+            entry = series.get(labels)
+            if entry is None:
+                entry = series[labels] = metric.empty()
+            entry[index] += 1
+            entry[-1] += value
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                name: [[list(labels), value if not isinstance(value, list) else list(value)]
+                       for labels, value in series.items()]
+                for name, series in self.values.items()
+            }
+
+
+registry = Registry()
+# Forked workers start from empty values instead of a copy of the parent's
+os.register_at_fork(after_in_child=registry.reset)
+
+
+def inc(name, labels=(), amount=1):
+    if settings.POLLS_METRICS_ENABLED:
+        registry.inc(name, labels, amount)
+
+
+def observe(name, value, labels=()):
+    if settings.POLLS_METRICS_ENABLED:
+        registry.observe(name, value, labels)
+
+
+RETIRED = 'retired'
+
+
+def _process_file(pid):
+    return os.path.join(settings.POLLS_METRICS_DIR, f'metrics-{pid}.json')
+
+
+def _read_snapshot(path):
+    try:
+        with open(path) as source:
+            return json.load(source)
+    except (OSError, ValueError):
+        return None  # Gone, being replaced, or written by an older release
+
+
+def _write_snapshot(path, snapshot):
+    os.makedirs(settings.POLLS_METRICS_DIR, exist_ok=True)
+    descriptor, temp_path = tempfile.mkstemp(dir=settings.POLLS_METRICS_DIR, suffix='.tmp')
+    with os.fdopen(descriptor, 'w') as output:
+        json.dump(snapshot, output)
+    os.replace(temp_path, path)
+
+
+def flush(force=False):
+    """Write this process's snapshot to the metrics directory if it is due."""
+    if not settings.POLLS_METRICS_DIR:
+        return
+    now = time.monotonic()
+    if not force and now - registry.last_flush < settings.POLLS_METRICS_FLUSH_INTERVAL:
+        return
+    registry.last_flush = now
+    _write_snapshot(_process_file(os.getpid()), registry.snapshot())
+
+
+def retire_process(pid):
+    """
+    Fold the snapshot of an exited process into the retired totals and
+    remove its file. Run by the gunicorn master, one worker at a time.
+    """
+    if not settings.POLLS_METRICS_DIR:
+        return
+    path = _process_file(pid)
+    snapshot = _read_snapshot(path)
+    if snapshot is not None:
+        retired_path = _process_file(RETIRED)
+        totals = _sum([_read_snapshot(retired_path) or {}, snapshot])
+        _write_snapshot(retired_path, {
+            name: [[list(labels), value] for labels, value in series.items()]
+            for name, series in totals.items()
+        })
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def collect():
+    """Return metric values summed over every process that reported."""
+    if settings.POLLS_METRICS_DIR:
+        flush(force=True)
+        paths = glob.glob(os.path.join(settings.POLLS_METRICS_DIR, 'metrics-*.json'))
+        snapshots = [snapshot for snapshot in map(_read_snapshot, paths) if snapshot is not None]
+    else:
+        snapshots = [registry.snapshot()]
+    return _sum(snapshots)
+
+
+def _sum(snapshots):
+    totals = {name: {} for name in METRICS}
+    for snapshot in snapshots:
+        for name, series in snapshot.items():
+            metric = METRICS.get(name)
+            if metric is None:
+                continue
+            for labels, value in series:
+                labels = tuple(labels)
+                totals[name][labels] = metric.merge(totals[name].get(labels, metric.empty()), value)
+    return totals
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render(totals):
+    """Format metric values in the Prometheus text exposition format."""
+    lines = []
+    for name, metric in METRICS.items():
+        lines.append(f'# HELP {name} {metric.help_text}')
+        lines.append(f'# TYPE {name} {metric.kind}')
+        for labels, value in sorted(totals[name].items()):
+            for sample, sample_labels, sample_value in metric.samples(tuple(zip(metric.label_names, labels)), value):
+                label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in sample_labels)
+                lines.append(f'{sample}{{{label_text}}} {sample_value}' if label_text else f'{sample} {sample_value}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """Expose the aggregated metrics; requires the bearer token if POLLS_METRICS_TOKEN is set."""
+    token = settings.POLLS_METRICS_TOKEN
+    if token and request.META.get('HTTP_AUTHORIZATION') != f'Bearer {token}':
+        return HttpResponseForbidden()
+    return HttpResponse(render(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class QueryRecorder:
+    """execute_wrapper that counts queries and the time spent in them."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+def _view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    return 'unmatched' if match is None else match.view_name
+
+
+class MetricsMiddleware:
+    """
+    Records latency, status and database usage of every request.
+
+    Database queries are counted with connection.execute_wrapper on the
+    request thread. Async requests run their queries in other threads, so
+    for them only latency and status are recorded.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.POLLS_METRICS_ENABLED:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        self._record(request, response, time.perf_counter() - start)
+
+        view = _view_label(request)
+        registry.observe('polls_db_queries_per_request', recorder.count, (view,))
+        registry.observe('polls_db_seconds_per_request', recorder.seconds, (view,))
+        flush()
+        return response
+
+    async def __acall__(self, request):
+        if not settings.POLLS_METRICS_ENABLED:
+            return await self.get_response(request)
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self._record(request, response, time.perf_counter() - start)
+        flush()
+        return response
+
+    def _record(self, request, response, elapsed):
+        view = _view_label(request)
+        registry.observe('polls_http_request_duration_seconds', elapsed, (view, request.method))
+        registry.inc('polls_http_requests_total', (view, request.method, str(response.status_code)))
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:12
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_vote_counts(apps, schema_editor):
+    Poll = apps.get_model('polls', 'Poll')
+    Question = apps.get_model('polls', 'Question')
+    Choice = apps.get_model('polls', 'Choice')
+    Vote = apps.get_model('polls', 'Vote')
+
+    choice_votes = (
+        Vote.objects.filter(choice=OuterRef('pk'))
+        .values('choice').annotate(total=Count('id')).values('total')
+    )
+    Choice.objects.update(vote_count=Coalesce(Subquery(choice_votes), 0))
+
+    question_votes = (
+        Choice.objects.filter(question=OuterRef('pk'))
+        .values('question').annotate(total=Sum('vote_count')).values('total')
+    )
+    Question.objects.update(vote_count=Coalesce(Subquery(question_votes), 0))
+
+    poll_votes = (
+        Question.objects.filter(poll=OuterRef('pk'))
+        .values('poll').annotate(total=Sum('vote_count')).values('total')
+    )
+    Poll.objects.update(vote_count=Coalesce(Subquery(poll_votes), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0003_auto_20250809_1623'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='choice',
+            name='vote_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='poll',
+            name='vote_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='vote_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_vote_counts, migrations.RunPython.noop),
+    ]
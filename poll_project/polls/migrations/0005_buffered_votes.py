@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:42
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0004_vote_counters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='vote',
+            name='voted_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.CreateModel(
+            name='BufferedVote',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('receipt', models.UUIDField(unique=True)),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                ('session_key', models.CharField(blank=True, max_length=40, null=True)),
+                ('received_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('choice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='buffered_votes', to='polls.choice')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='buffered_votes', to='polls.question')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='buffered_votes', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
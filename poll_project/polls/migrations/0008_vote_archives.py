@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0007_poll_listing_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedVoteCount',
+            fields=[
+                ('choice', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='archived_votes', serialize=False, to='polls.choice')),
+                ('vote_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VoteArchive',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('file_name', models.CharField(max_length=255)),
+                ('last_vote_id', models.PositiveIntegerField()),
+                ('vote_count', models.PositiveIntegerField(default=0)),
+                ('deleted_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('poll', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vote_archives', to='polls.poll')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0008_vote_archives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='poll',
+            name='version',
+            field=models.PositiveBigIntegerField(default=1, editable=False),
+        ),
+    ]
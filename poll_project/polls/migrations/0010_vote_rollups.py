@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0009_poll_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupCheckpoint',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=64, unique=True)),
+                ('last_vote_id', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VoteRollup',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('bucket', models.DateTimeField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('choice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vote_rollups', to='polls.choice')),
+                ('poll', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vote_rollups', to='polls.poll')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vote_rollups', to='polls.question')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['poll', 'bucket'], name='rollup_poll_bucket_idx')],
+                'unique_together': {('choice', 'bucket')},
+            },
+        ),
+    ]
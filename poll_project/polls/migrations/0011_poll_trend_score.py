@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0010_vote_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='poll',
+            name='trend_score',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='poll',
+            index=models.Index(condition=models.Q(('trend_score__isnull', False)), fields=['-trend_score'], name='poll_trend_score_idx'),
+        ),
+    ]
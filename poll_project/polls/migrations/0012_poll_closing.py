@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0011_poll_trend_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PollSnapshot',
+            fields=[
+                ('poll', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='snapshot', serialize=False, to='polls.poll')),
+                ('payload', models.JSONField()),
+                ('poll_version', models.PositiveBigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='poll',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='poll',
+            index=models.Index(condition=models.Q(('closed_at__isnull', True)), fields=['expiry'], name='poll_open_expiry_idx'),
+        ),
+    ]
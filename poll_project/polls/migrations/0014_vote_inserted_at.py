@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0013_exportjob_started_at'),
+    ]
+
+    operations = [
+        # Added without a default first, so existing votes are left NULL rather
+        # than all stamped with the migration time
+        migrations.AddField(
+            model_name='vote',
+            name='inserted_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='vote',
+            name='inserted_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, null=True),
+        ),
+    ]
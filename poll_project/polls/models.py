@@ -1,5 +1,14 @@
-from django.db import models
+import math
+from collections import Counter, defaultdict
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Abs, Coalesce, Exp, Greatest, Ln
+from django.dispatch import Signal
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -19,7 +28,24 @@ class User(AbstractUser):
         return self.username
 
 
-class Poll(models.Model):
+class CounterFieldsMixin:
+    """
+    Keeps denormalized counters out of regular saves.
+    Counters are only changed through F() updates, so writing back the
+    in-memory value of an edited instance would lose concurrent increments.
+    """
+    counter_fields = ('vote_count',)
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class Poll(CounterFieldsMixin, models.Model):
     """
     Poll model representing a survey or voting topic.
     Related to the user who created it and has an expiry date.
@@ -30,12 +56,58 @@ class Poll(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='polls')  # FK to User
     expiry = models.DateTimeField()
+    vote_count = models.PositiveIntegerField(default=0, editable=False)  # Total votes across all questions
+    version = models.PositiveBigIntegerField(default=1, editable=False)  # Bumped on any change to the poll or its votes
+    # Time-decayed vote count in log space, see trend_log_weight; null once compacted away
+    trend_score = models.FloatField(null=True, blank=True, editable=False)
+    # Set by `manage.py close_expired_polls` once the final results are in a PollSnapshot
+    closed_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    # closed_at is only set by the closing UPDATE, like the counters are
+    counter_fields = ('vote_count', 'version', 'trend_score', 'closed_at')
+
+    class Meta:
+        indexes = [
+            # Serves the keyset pagination of the poll listing
+            models.Index(fields=['-created_at', '-id'], name='poll_created_id_idx'),
+            # Only polls with a trending score, so the leaderboard reads its top entries
+            models.Index(fields=['-trend_score'], name='poll_trend_score_idx', condition=Q(trend_score__isnull=False)),
+            # Open polls by expiry, for the closing scheduler
+            models.Index(fields=['expiry'], name='poll_open_expiry_idx', condition=Q(closed_at__isnull=True)),
+        ]
 
     def __str__(self):
         return self.title
 
+    @property
+    def is_closed(self):
+        return self.closed_at is not None
 
-class Question(models.Model):
+    def has_expired(self, now=None):
+        """Whether the poll no longer accepts votes: closed, or past its expiry."""
+        return self.is_closed or (self.expiry is not None and self.expiry < (now or timezone.now()))
+
+
+class PollSnapshot(models.Model):
+    """
+    Final results of a closed poll, written once when it closes.
+    Results of closed polls are served from the payload, never recomputed.
+    """
+    poll = models.OneToOneField(Poll, on_delete=models.CASCADE, primary_key=True, related_name='snapshot')
+    payload = models.JSONField()  # Same shape as the results endpoint's response
+    poll_version = models.PositiveBigIntegerField()  # Poll.version the payload was read at
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Final results of poll {self.poll_id}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Poll snapshots are immutable.")
+        super().save(*args, **kwargs)
+
+
+class Question(CounterFieldsMixin, models.Model):
     """
     Question model representing a question under a specific poll.
     Each poll can have multiple questions.
@@ -43,12 +115,13 @@ class Question(models.Model):
     id = models.AutoField(primary_key=True)
     text = models.CharField(max_length=255)
     poll = models.ForeignKey(Poll, on_delete=models.CASCADE, related_name='questions')  # FK to Poll
+    vote_count = models.PositiveIntegerField(default=0, editable=False)  # Total votes across all choices
 
     def __str__(self):
         return self.text
 
 
-class Choice(models.Model):
+class Choice(CounterFieldsMixin, models.Model):
     """
     Choice model representing answer options for a question.
     Each question can have multiple choices.
@@ -56,11 +129,37 @@ class Choice(models.Model):
     id = models.AutoField(primary_key=True)
     text = models.CharField(max_length=255)
     question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='choices')  # FK to Question
+    vote_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.text
 
 
+class VoteQuerySet(models.QuerySet):
+    """QuerySet that keeps vote counters in sync with bulk inserts and deletes."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        if kwargs.get('ignore_conflicts') or kwargs.get('update_conflicts'):
+            raise ValueError("Vote counters cannot be kept in sync when conflicts are ignored or updated.")
+        with transaction.atomic(using=self.db, savepoint=False):
+            created = super().bulk_create(objs, *args, **kwargs)
+            increment_vote_counts(vote.choice_id for vote in created)
+        return created
+
+    def delete(self, keep_counts=False):
+        """
+        Delete the votes and take them off the counters, unless keep_counts
+        is set (archival keeps archived votes counted).
+        """
+        if keep_counts:
+            return super().delete()
+        with transaction.atomic(using=self.db, savepoint=False):
+            choice_ids = list(self.values_list('choice_id', flat=True))
+            deleted = super().delete()
+            decrement_vote_counts(choice_ids)
+        return deleted
+
+
 class Vote(models.Model):
     """
     Vote model for storing individual user or anonymous votes.
@@ -72,7 +171,12 @@ class Vote(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='votes', null=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     session_key = models.CharField(max_length=40, null=True, blank=True)
-    voted_at = models.DateTimeField(auto_now_add=True)
+    voted_at = models.DateTimeField(default=timezone.now, editable=False)
+    # When the row was written; buffered votes keep the older voted_at of their request.
+    # NULL for votes inserted before the column existed.
+    inserted_at = models.DateTimeField(default=timezone.now, editable=False, null=True)
+
+    objects = VoteQuerySet.as_manager()
 
     class Meta:
         unique_together = [
@@ -83,3 +187,231 @@ class Vote(models.Model):
 
     def __str__(self):
         return f"{self.user.username if self.user else 'Anonymous'} voted {self.choice.text}"
+
+    def save(self, *args, **kwargs):
+        """Insert the vote and bump the related counters in one transaction."""
+        adding = self._state.adding
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+            if adding:
+                increment_vote_counts([self.choice_id])
+
+    def delete(self, *args, keep_counts=False, **kwargs):
+        """Delete the vote and take it off the related counters, unless keep_counts is set."""
+        with transaction.atomic(savepoint=False):
+            deleted = super().delete(*args, **kwargs)
+            if not keep_counts:
+                decrement_vote_counts([self.choice_id])
+        return deleted
+
+
+class BufferedVote(models.Model):
+    """
+    Durable write buffer for votes accepted in buffered ingestion mode.
+    Rows are moved into Vote in batches and deleted in the same transaction,
+    so each accepted vote is counted exactly once.
+    """
+    id = models.BigAutoField(primary_key=True)
+    receipt = models.UUIDField(unique=True)
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='buffered_votes')
+    choice = models.ForeignKey(Choice, on_delete=models.CASCADE, related_name='buffered_votes')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='buffered_votes', null=True, blank=True)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    session_key = models.CharField(max_length=40, null=True, blank=True)
+    received_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Buffered vote {self.receipt} for {self.choice_id}"
+
+
+class ExportJob(models.Model):
+    """
+    Background Excel export requested from the admin.
+    Tracks progress while a worker writes the file and where to download it.
+    """
+    QUESTION_VOTES = 'question_votes'
+    POLL_VOTES = 'poll_votes'
+    KIND_CHOICES = [
+        (QUESTION_VOTES, 'Question vote stats'),
+        (POLL_VOTES, 'Poll vote stats'),
+    ]
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    id = models.AutoField(primary_key=True)
+    kind = models.CharField(max_length=32, choices=KIND_CHOICES)
+    object_ids = models.JSONField(default=list)  # Selected polls or questions
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    progress = models.PositiveSmallIntegerField(default=0)  # Percent
+    row_count = models.PositiveIntegerField(default=0)
+    file_name = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='export_jobs', null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)  # When a worker claimed the job
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} export #{self.pk}"
+
+
+class VoteArchive(models.Model):
+    """
+    Compressed archive of the votes of an expired poll, written by
+    `manage.py archive_votes`. The archived votes are deleted from Vote in
+    chunks once the file is on disk; `last_vote_id` bounds the archived
+    rows, so an interrupted run resumes deleting without rewriting the file.
+    """
+    id = models.AutoField(primary_key=True)
+    poll = models.ForeignKey(Poll, on_delete=models.CASCADE, related_name='vote_archives')
+    file_name = models.CharField(max_length=255)
+    last_vote_id = models.PositiveIntegerField()
+    vote_count = models.PositiveIntegerField(default=0)  # Votes in the file
+    deleted_count = models.PositiveIntegerField(default=0)  # Votes removed from Vote so far
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Vote archive {self.file_name}"
+
+
+class ArchivedVoteCount(models.Model):
+    """
+    Frozen per-choice tally of archived votes.
+    Vote counters are left untouched by archival; these rows let counts be
+    rebuilt from the Vote table plus the archived votes.
+    """
+    choice = models.OneToOneField(Choice, on_delete=models.CASCADE, primary_key=True, related_name='archived_votes')
+    vote_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.vote_count} archived votes for {self.choice_id}"
+
+
+class VoteRollup(models.Model):
+    """
+    Number of votes per choice and minute, maintained by `manage.py rollup_votes`.
+    Feeds the time-series endpoint without scanning Vote.
+    """
+    id = models.BigAutoField(primary_key=True)
+    poll = models.ForeignKey(Poll, on_delete=models.CASCADE, related_name='vote_rollups')
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='vote_rollups')
+    choice = models.ForeignKey(Choice, on_delete=models.CASCADE, related_name='vote_rollups')
+    bucket = models.DateTimeField()  # Start of the minute
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = [('choice', 'bucket')]
+        indexes = [
+            models.Index(fields=['poll', 'bucket'], name='rollup_poll_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.count} votes for {self.choice_id} at {self.bucket:%Y-%m-%d %H:%M}"
+
+
+class RollupCheckpoint(models.Model):
+    """High-water mark of a rollup: every vote up to `last_vote_id` has been counted."""
+    id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=64, unique=True)
+    last_vote_id = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} rollup at vote {self.last_vote_id}"
+
+
+# Sent after vote counters changed, with the affected ``poll_ids`` and
+# ``choice_counts`` (choice id -> number of new, or deleted, votes).
+votes_recorded = Signal()
+votes_deleted = Signal()
+
+
+# Trending scores weigh each vote by 2 ** ((t - TREND_EPOCH) / half-life), summed in
+# log space: weights grow without bound, but their logarithms stay small. Every
+# score is relative to the same epoch, so ranking needs no decay step, and
+# exp(score - trend_log_weight(now)) is the decayed vote count at `now`.
+TREND_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def trend_log_weight(moment):
+    """Logarithm of the weight of a vote cast at `moment`."""
+    return math.log(2) * (moment - TREND_EPOCH).total_seconds() / settings.POLLS_TRENDING_HALF_LIFE
+
+
+def _add_trend_votes(votes, moment):
+    """Expression adding `votes` votes cast at `moment` to Poll.trend_score."""
+    weight = Value(trend_log_weight(moment) + math.log(votes))
+    # log(e^a + e^b) = max(a, b) + log(1 + e^-|a - b|); null when there is no score yet
+    return Coalesce(
+        Greatest(F('trend_score'), weight) + Ln(1 + Exp(-Abs(F('trend_score') - weight))),
+        weight,
+    )
+
+
+def _add_vote_counts(per_choice, trend_moment=None):
+    """Add per-choice deltas to the counters; returns the polls affected."""
+    per_question = Counter()
+    per_poll = Counter()
+    parents = Choice.objects.filter(pk__in=per_choice).values_list('id', 'question_id', 'question__poll_id')
+    for choice_id, question_id, poll_id in parents:
+        per_question[question_id] += per_choice[choice_id]
+        per_poll[poll_id] += per_choice[choice_id]
+
+    for model, deltas in ((Choice, per_choice), (Question, per_question), (Poll, per_poll)):
+        # One UPDATE per distinct increment rather than one per row
+        pks_by_delta = defaultdict(list)
+        for pk, delta in sorted(deltas.items()):
+            pks_by_delta[delta].append(pk)
+        for delta, pks in pks_by_delta.items():
+            changes = {'vote_count': F('vote_count') + delta}
+            if model is Poll:
+                changes['version'] = F('version') + 1
+                if trend_moment is not None:
+                    changes['trend_score'] = _add_trend_votes(delta, trend_moment)
+            model.objects.filter(pk__in=pks).update(**changes)
+    return set(per_poll)
+
+
+def increment_vote_counts(choice_ids):
+    """
+    Atomically add votes to the counters of choices, questions and polls,
+    and to the trending scores of the polls.
+
+    Args:
+        choice_ids: Iterable with one choice id per recorded vote.
+    """
+    per_choice = Counter(choice_ids)
+    if not per_choice:
+        return
+    poll_ids = _add_vote_counts(per_choice, trend_moment=timezone.now())
+    votes_recorded.send(sender=Vote, poll_ids=poll_ids, choice_counts=per_choice)
+
+
+def decrement_vote_counts(choice_ids):
+    """
+    Atomically take deleted votes off the counters of choices, questions and
+    polls. Trending scores keep them; they decay away on their own.
+
+    Args:
+        choice_ids: Iterable with one choice id per deleted vote.
+    """
+    per_choice = Counter(choice_ids)
+    if not per_choice:
+        return
+    poll_ids = _add_vote_counts(Counter({pk: -count for pk, count in per_choice.items()}))
+    votes_deleted.send(sender=Vote, poll_ids=poll_ids, choice_counts=per_choice)
+
+
+def bump_poll_versions(poll_ids):
+    """Move polls to a new version, so conditional requests see them as changed."""
+    Poll.objects.filter(pk__in=list(poll_ids)).update(version=F('version') + 1)
@@ -0,0 +1,147 @@
+"""
+pagination.py
+
+Keyset (cursor) pagination for the poll, question and choice listings.
+Pages are selected with a WHERE on the ordering columns of the last row
+seen instead of an OFFSET, so every page costs the same index range scan
+and rows inserted while a client pages through are never skipped or
+repeated.
+"""
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only keyset pagination over a fixed, unique ordering.
+
+    `ordering` must end with a unique column (the primary key) and all its
+    fields must sort in the same direction, so a single row-value
+    comparison selects the next page.
+    """
+    ordering = ('-created_at', '-id')
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.page_size = settings.POLLS_PAGE_SIZE
+        self.max_page_size = settings.POLLS_MAX_PAGE_SIZE
+
+    def _fields(self):
+        return [field.lstrip('-') for field in self.ordering]
+
+    def _descending(self):
+        return self.ordering[0].startswith('-')
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def encode_cursor(self, instance):
+        model = type(instance)
+        values = [
+            model._meta.get_field(field).value_to_string(instance)
+            for field in self._fields()
+        ]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, queryset, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            fields = self._fields()
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise ValueError
+            return [
+                queryset.model._meta.get_field(field).to_python(value)
+                for field, value in zip(fields, values)
+            ]
+        except (ValueError, TypeError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _after(self, values):
+        # (a, b, c) > (x, y, z) expanded into an OR-chain, which every backend supports
+        lookup = 'lt' if self._descending() else 'gt'
+        fields = self._fields()
+        condition = Q()
+        for position, field in enumerate(fields):
+            equal = {prefix: value for prefix, value in zip(fields[:position], values[:position])}
+            condition |= Q(**equal, **{f'{field}__{lookup}': values[position]})
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode_cursor(queryset, cursor)))
+
+        # One extra row tells whether there is a next page without a COUNT
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+
+class PollKeysetPagination(KeysetPagination):
+    """Newest polls first; `id` breaks ties between polls created in the same instant."""
+    ordering = ('-created_at', '-id')
+
+
+class IdKeysetPagination(KeysetPagination):
+    """Questions and choices in creation (primary key) order."""
+    ordering = ('id',)
@@ -0,0 +1,65 @@
+"""
+renderers.py
+
+JSON rendering through orjson, when it is installed.
+
+FastJSONRenderer produces the same bytes as DRF's JSONRenderer with the
+default COMPACT_JSON, UNICODE_JSON and STRICT_JSON settings, several times
+faster for large payloads. Anything orjson would write differently goes
+through JSONRenderer instead:
+- indented output (``Accept: application/json; indent=4``, browsable API);
+- types orjson does not know, and dates and times, which it formats
+  differently, are converted by DRF's JSONEncoder first;
+- floats the standard library writes in exponent notation (below 1e-4 or
+  from 1e16 up), and integers beyond 64 bits, re-render with json.
+
+The one remaining difference: NaN and infinity, which JSONRenderer refuses
+to render, come out as null.
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # Optional: without it, rendering is plain JSONRenderer
+    orjson = None
+
+# Where orjson's floats can differ from json's: exponents, and small numbers
+# json writes as 1e-05. May also match inside strings, which only costs speed.
+# Plain substring checks, several times faster than a regular expression.
+EXPONENT_FLOAT_MARKERS = tuple(b'%de' % digit for digit in range(10)) + (b'0.0000',)
+
+LINE_SEPARATOR = '\u2028'.encode()
+PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer with an orjson fast path producing identical output."""
+    encoder = JSONRenderer.encoder_class()
+
+    def fast_path_applies(self):
+        return orjson is not None and self.compact and not self.ensure_ascii and self.strict
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (
+            not self.fast_path_applies()
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder.default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if any(marker in ret for marker in EXPONENT_FLOAT_MARKERS):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Escaped like JSONRenderer, so the output stays a strict JavaScript subset
+        if LINE_SEPARATOR in ret or PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(LINE_SEPARATOR, b'\\u2028').replace(PARAGRAPH_SEPARATOR, b'\\u2029')
+        return ret
+
@@ -0,0 +1,322 @@
+"""
+results.py
+
+Builds and caches the results payload for a poll.
+Counts and winners are read from the denormalized choice counters in a
+single query, so the work done is proportional to the number of choices,
+not votes. Payloads are cached per poll and tagged with a version that is
+replaced whenever the poll, its questions, choices or votes change.
+Each entry also records the Poll.version its rows were read at, which the
+results views use as a strong ETag. Closed polls are served from their
+PollSnapshot instead of the counters.
+"""
+import asyncio
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from . import metrics
+from .routers import reading_from_replicas
+from .models import Poll, PollSnapshot, Question, Choice
+
+LOCK_POLL_INTERVAL = 0.05
+
+
+def _result_rows(poll):
+    return (
+        Question.objects.filter(poll=poll)
+        .values('id', 'text', 'choices__id', 'choices__text', 'choices__vote_count', 'poll__version')
+        .order_by('id', '-choices__vote_count', 'choices__id')
+    )
+
+
+def _fold_rows(poll, rows):
+    results = []
+    current_question_id = None
+    for row in rows:
+        if row['id'] != current_question_id:
+            current_question_id = row['id']
+            entry = {"question": row['text'], "choices": [], "winner": None}
+            results.append(entry)
+
+        # Questions without choices come back as a single row with no choice
+        if row['choices__id'] is None:
+            continue
+
+        choice = {"choice": row['choices__text'], "votes": row['choices__vote_count']}
+        if entry["winner"] is None:
+            entry["winner"] = dict(choice)
+        entry["choices"].append(choice)
+
+    return {
+        "poll": poll.title,
+        "results": results,
+    }
+
+
+def build_poll_results(poll):
+    """
+    Aggregate vote counts and winners for every question in a poll.
+
+    Choices are returned in descending vote order (ties broken by choice id),
+    so the first choice of each question is its winner.
+
+    Returns:
+        dict: Payload with the poll title and per-question results.
+    """
+    return _fold_rows(poll, _result_rows(poll))
+
+
+async def abuild_poll_results(poll):
+    """Async variant of build_poll_results using async queryset iteration."""
+    return _fold_rows(poll, [row async for row in _result_rows(poll)])
+
+
+def _results_poll(poll_id):
+    # The snapshot of a closed poll comes with the poll, so open polls pay no extra query
+    return Poll.objects.select_related('snapshot').only(
+        'id', 'title', 'version', 'snapshot__payload', 'snapshot__poll_version',
+    ).filter(pk=poll_id)
+
+
+def _snapshot_entry(version, poll):
+    """Entry from the final results of a closed poll, or None if it is still open."""
+    try:
+        snapshot = poll.snapshot
+    except PollSnapshot.DoesNotExist:
+        return None
+    # The payload no longer changes, so it is current for the poll's version
+    return _new_entry(version, snapshot.payload, poll.version)
+
+
+def _compute_entry(version, poll, rows):
+    # The poll version comes from the same statement as the counts, so it matches them exactly
+    poll_version = rows[0]['poll__version'] if rows else poll.version
+    return _new_entry(version, _fold_rows(poll, rows), poll_version)
+
+
+def get_choice_counts(poll_id):
+    """Return the current vote count of every choice in a poll, keyed by choice id."""
+    return dict(Choice.objects.filter(question__poll_id=poll_id).values_list('id', 'vote_count'))
+
+
+def _cache():
+    return caches[settings.POLLS_RESULTS_CACHE]
+
+
+def _version_key(poll_id):
+    return f"polls:results:{poll_id}:version"
+
+
+def _entry_key(poll_id):
+    return f"polls:results:{poll_id}"
+
+
+def _lock_key(poll_id):
+    return f"polls:results:{poll_id}:lock"
+
+
+def _new_version():
+    # Time based, so a version key lost to eviction never matches an old entry
+    return time.time_ns()
+
+
+def get_results_version(poll_id):
+    """Return the current results version of a poll, creating one if missing."""
+    cache = _cache()
+    version = cache.get(_version_key(poll_id))
+    if version is None:
+        cache.add(_version_key(poll_id), _new_version(), None)
+        version = cache.get(_version_key(poll_id))
+    return version
+
+
+async def aget_results_version(poll_id):
+    """Async variant of get_results_version."""
+    cache = _cache()
+    version = await cache.aget(_version_key(poll_id))
+    if version is None:
+        await cache.aadd(_version_key(poll_id), _new_version(), None)
+        version = await cache.aget(_version_key(poll_id))
+    return version
+
+
+def invalidate_poll_results(poll_id):
+    """
+    Move a poll to a new results version.
+
+    The version is replaced immediately so this transaction's own reads miss,
+    and again on commit so a reader that recomputed from pre-commit data in
+    between does not keep serving it.
+    """
+    def bump():
+        _cache().set(_version_key(poll_id), _new_version(), None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def _record(outcome):
+    metrics.inc('polls_results_cache_total', (outcome,))
+    cache = _cache()
+    key = f"polls:results:stats:{outcome}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+async def _arecord(outcome):
+    metrics.inc('polls_results_cache_total', (outcome,))
+    cache = _cache()
+    key = f"polls:results:stats:{outcome}"
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aadd(key, 0, None)
+        await cache.aincr(key)
+
+
+def results_cache_stats():
+    """Return hit, stale hit and miss counters of the results cache."""
+    outcomes = ('hits', 'stale_hits', 'misses')
+    values = _cache().get_many([f"polls:results:stats:{outcome}" for outcome in outcomes])
+    return {outcome: values.get(f"polls:results:stats:{outcome}", 0) for outcome in outcomes}
+
+
+def _new_entry(version, payload, poll_version):
+    return {'version': version, 'computed_at': time.time(), 'payload': payload, 'poll_version': poll_version}
+
+
+def _entry_timeout():
+    # Rows read from a replica may predate the version they are stored under,
+    # so such entries are only kept for as long as a replica may lag
+    if reading_from_replicas():
+        return min(settings.POLLS_RESULTS_CACHE_TIMEOUT, settings.POLLS_REPLICA_LAG_SECONDS)
+    return settings.POLLS_RESULTS_CACHE_TIMEOUT
+
+
+def _is_fresh(entry, version):
+    return entry is not None and entry['version'] == version
+
+
+def _is_within_staleness(entry):
+    window = settings.POLLS_RESULTS_STALE_SECONDS
+    return entry is not None and window > 0 and time.time() - entry['computed_at'] < window
+
+
+def get_poll_results(poll_id):
+    """
+    Return the results payload of a poll, computing it on a cache miss.
+
+    Returns:
+        dict | None: Results payload, or None if the poll does not exist.
+    """
+    entry = get_poll_results_entry(poll_id)
+    return None if entry is None else entry['payload']
+
+
+async def aget_poll_results(poll_id):
+    """Async variant of get_poll_results."""
+    entry = await aget_poll_results_entry(poll_id)
+    return None if entry is None else entry['payload']
+
+
+def get_poll_results_entry(poll_id):
+    """
+    Return the cached results entry of a poll, computing it on a cache miss.
+
+    Entries older than the current version are still served while they are
+    younger than POLLS_RESULTS_STALE_SECONDS. Only the worker holding the
+    recompute lock queries the database; others serve the previous entry or
+    wait for the new one.
+
+    Returns:
+        dict | None: Entry with the ``payload`` and the ``poll_version`` it was
+        computed at, or None if the poll does not exist.
+    """
+    cache = _cache()
+    version = get_results_version(poll_id)
+    entry = cache.get(_entry_key(poll_id))
+
+    if _is_fresh(entry, version):
+        _record('hits')
+        return entry
+    if _is_within_staleness(entry):
+        _record('stale_hits')
+        return entry
+
+    lock_timeout = settings.POLLS_RESULTS_LOCK_TIMEOUT
+    locked = cache.add(_lock_key(poll_id), True, lock_timeout)
+    if not locked:
+        if entry is not None:
+            _record('stale_hits')
+            return entry
+        deadline = time.monotonic() + lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            entry = cache.get(_entry_key(poll_id))
+            if _is_fresh(entry, version):
+                _record('hits')
+                return entry
+        # The lock holder is too slow or died; compute without the lock
+
+    try:
+        _record('misses')
+        poll = _results_poll(poll_id).first()
+        if poll is None:
+            return None
+        entry = _snapshot_entry(version, poll) or _compute_entry(version, poll, list(_result_rows(poll)))
+        cache.set(_entry_key(poll_id), entry, _entry_timeout())
+        return entry
+    finally:
+        if locked:
+            cache.delete(_lock_key(poll_id))
+
+
+async def aget_poll_results_entry(poll_id):
+    """
+    Async variant of get_poll_results_entry.
+    Uses the async cache API and async ORM, so the event loop is never blocked.
+    """
+    cache = _cache()
+    version = await aget_results_version(poll_id)
+    entry = await cache.aget(_entry_key(poll_id))
+
+    if _is_fresh(entry, version):
+        await _arecord('hits')
+        return entry
+    if _is_within_staleness(entry):
+        await _arecord('stale_hits')
+        return entry
+
+    lock_timeout = settings.POLLS_RESULTS_LOCK_TIMEOUT
+    locked = await cache.aadd(_lock_key(poll_id), True, lock_timeout)
+    if not locked:
+        if entry is not None:
+            await _arecord('stale_hits')
+            return entry
+        deadline = time.monotonic() + lock_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            entry = await cache.aget(_entry_key(poll_id))
+            if _is_fresh(entry, version):
+                await _arecord('hits')
+                return entry
+
+    try:
+        await _arecord('misses')
+        poll = await _results_poll(poll_id).afirst()
+        if poll is None:
+            return None
+        entry = _snapshot_entry(version, poll)
+        if entry is None:
+            entry = _compute_entry(version, poll, [row async for row in _result_rows(poll)])
+        await cache.aset(_entry_key(poll_id), entry, _entry_timeout())
+        return entry
+    finally:
+        if locked:
+            await cache.adelete(_lock_key(poll_id))
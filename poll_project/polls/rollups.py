@@ -0,0 +1,176 @@
+"""
+rollups.py
+
+Per-minute vote rollups and the time series built from them.
+
+`rollup_votes` walks Vote in primary key order from a high-water mark and
+adds each vote to the VoteRollup row of its choice and minute. Votes are
+only counted once they were inserted more than POLLS_ROLLUP_LAG_SECONDS
+ago: a vote whose transaction commits after a later id was already counted
+would otherwise be skipped for good. The guard uses the insert time, not
+voted_at, which buffered votes take from their much earlier request. Starting from an empty checkpoint, the same
+walk backfills the whole Vote history in chunks.
+"""
+import re
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Choice, Vote, VoteRollup, RollupCheckpoint
+
+CHECKPOINT_NAME = 'votes'
+
+BUCKET_UNITS = {'m': 1, 'h': 60, 'd': 24 * 60}
+BUCKET_PATTERN = re.compile(r'^(\d+)([mhd])$')
+
+
+def minute_bucket(moment):
+    """Start of the UTC minute containing a moment."""
+    return moment.astimezone(dt_timezone.utc).replace(second=0, microsecond=0)
+
+
+def rollup_chunk(chunk_size=None, lag_seconds=None):
+    """
+    Count the next chunk of votes past the high-water mark into the rollups.
+
+    The checkpoint row is locked for the whole transaction, so concurrent
+    runs queue up instead of counting the same votes twice.
+
+    Returns:
+        tuple: (votes counted, whether more settled votes may be waiting)
+    """
+    chunk_size = chunk_size or settings.POLLS_ROLLUP_CHUNK_SIZE
+    lag_seconds = settings.POLLS_ROLLUP_LAG_SECONDS if lag_seconds is None else lag_seconds
+    cutoff = timezone.now() - timedelta(seconds=lag_seconds)
+
+    with transaction.atomic():
+        RollupCheckpoint.objects.get_or_create(name=CHECKPOINT_NAME)
+        checkpoint = RollupCheckpoint.objects.select_for_update().get(name=CHECKPOINT_NAME)
+        rows = list(
+            Vote.objects.filter(pk__gt=checkpoint.last_vote_id)
+            .order_by('id')
+            .values_list('id', 'choice_id', 'choice__question_id', 'choice__question__poll_id', 'voted_at',
+                         'inserted_at')
+            [:chunk_size]
+        )
+
+        # Stop at the first vote inserted too recently; later ids wait for the next run
+        settled = []
+        for row in rows:
+            if row[5] is not None and row[5] >= cutoff:
+                break
+            settled.append(row)
+        if not settled:
+            return 0, False
+
+        counts = Counter()
+        parents = {}
+        for _, choice_id, question_id, poll_id, voted_at, _ in settled:
+            counts[(choice_id, minute_bucket(voted_at))] += 1
+            parents[choice_id] = (question_id, poll_id)
+        _add_to_rollups(counts, parents)
+
+        checkpoint.last_vote_id = settled[-1][0]
+        checkpoint.save(update_fields=['last_vote_id', 'updated_at'])
+
+    return len(settled), len(settled) == chunk_size
+
+
+def _add_to_rollups(counts, parents):
+    buckets = {bucket for _, bucket in counts}
+    existing = {
+        (rollup.choice_id, rollup.bucket): rollup.pk
+        for rollup in VoteRollup.objects.filter(
+            choice_id__in={choice_id for choice_id, _ in counts},
+            bucket__gte=min(buckets), bucket__lte=max(buckets),
+        ).only('id', 'choice_id', 'bucket')
+    }
+
+    new = []
+    pks_by_delta = defaultdict(list)
+    for (choice_id, bucket), count in counts.items():
+        if (choice_id, bucket) in existing:
+            pks_by_delta[count].append(existing[(choice_id, bucket)])
+        else:
+            question_id, poll_id = parents[choice_id]
+            new.append(VoteRollup(
+                poll_id=poll_id, question_id=question_id, choice_id=choice_id, bucket=bucket, count=count
+            ))
+    VoteRollup.objects.bulk_create(new)
+    # One UPDATE per distinct increment rather than one per row
+    for delta, pks in pks_by_delta.items():
+        VoteRollup.objects.filter(pk__in=pks).update(count=F('count') + delta)
+
+
+def rollup_votes(chunk_size=None, lag_seconds=None):
+    """
+    Count every settled vote past the high-water mark, one chunk per transaction.
+
+    Returns:
+        int: Number of votes counted.
+    """
+    total = 0
+    while True:
+        counted, more = rollup_chunk(chunk_size, lag_seconds)
+        total += counted
+        if not more:
+            return total
+
+
+def parse_bucket(value):
+    """
+    Parse a bucket size such as ``5m``, ``1h`` or ``1d``.
+
+    Returns:
+        int | None: Bucket size in minutes, or None if the value is invalid.
+    """
+    match = BUCKET_PATTERN.match(value or '')
+    if not match or int(match.group(1)) == 0:
+        return None
+    return int(match.group(1)) * BUCKET_UNITS[match.group(2)]
+
+
+def _rebucket(moment, minutes):
+    epoch_minutes = int(moment.timestamp()) // 60
+    start = epoch_minutes - epoch_minutes % minutes
+    return datetime.fromtimestamp(start * 60, tz=dt_timezone.utc)
+
+
+def build_timeseries(poll, minutes, since=None):
+    """
+    Votes per choice over time for a poll, in buckets of the given size.
+
+    Buckets are aligned to the Unix epoch and only buckets with votes are
+    returned. Reads VoteRollup only, so votes newer than the last
+    `rollup_votes` run are not included yet.
+
+    Returns:
+        list: One series per choice, in question and choice order.
+    """
+    rollups = VoteRollup.objects.filter(poll=poll)
+    if since is not None:
+        rollups = rollups.filter(bucket__gte=_rebucket(since, minutes))
+
+    points = defaultdict(Counter)
+    for choice_id, bucket, count in rollups.values_list('choice_id', 'bucket', 'count').iterator():
+        points[choice_id][_rebucket(bucket, minutes)] += count
+
+    choices = Choice.objects.filter(question__poll=poll).order_by('question_id', 'id').values_list(
+        'id', 'text', 'question_id'
+    )
+    return [
+        {
+            "question": question_id,
+            "choice": choice_id,
+            "text": text,
+            "points": [
+                {"bucket": bucket.isoformat(), "votes": count}
+                for bucket, count in sorted(points[choice_id].items())
+            ],
+        }
+        for choice_id, text, question_id in choices
+    ]
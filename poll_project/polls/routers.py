@@ -0,0 +1,160 @@
+"""
+routers.py
+
+Read-replica routing.
+
+Writes always go to the primary (``default``). Reads go to the primary too,
+except inside ``replica_reads()``, which the results view, the list and
+retrieve actions of the viewsets and the admin exports wrap around their
+work; there reads are spread over the aliases in POLLS_READ_REPLICAS.
+
+Replicas may trail the primary by up to POLLS_REPLICA_LAG_SECONDS:
+- a client that wrote something (a vote, a poll edit) gets a cookie with the
+  time of the write, and keeps reading from the primary until that long has
+  passed, so it always sees its own writes;
+- on PostgreSQL, replicas reporting more replay lag than that are skipped
+  until the next check, every POLLS_REPLICA_CHECK_INTERVAL seconds.
+"""
+import math
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils.deprecation import MiddlewareMixin
+
+LAST_WRITE_COOKIE = 'polls_last_write'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+# Alias picked for the reads of the current block. Scoped to a context, so it
+# follows a request into the threads the async ORM runs its queries in, and
+# never leaks into other requests
+_read_alias = ContextVar('polls_read_alias', default=None)
+
+# Replica alias -> (monotonic time of the last lag check, healthy)
+_health = {}
+
+# Replay lag of a PostgreSQL standby; zero when it has replayed all it received
+PG_LAG_SQL = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def replica_lag(alias):
+    """
+    Return how many seconds a replica trails the primary.
+
+    Returns:
+        float | None: The lag, or None if the backend cannot report it.
+    """
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(PG_LAG_SQL)
+        return float(cursor.fetchone()[0])
+
+
+def _is_healthy(alias):
+    now = time.monotonic()
+    checked = _health.get(alias)
+    if checked is not None and now - checked[0] < settings.POLLS_REPLICA_CHECK_INTERVAL:
+        return checked[1]
+    try:
+        lag = replica_lag(alias)
+        healthy = lag is None or lag <= settings.POLLS_REPLICA_LAG_SECONDS
+    except DatabaseError:
+        healthy = False
+    _health[alias] = (now, healthy)
+    return healthy
+
+
+def reset_replica_health():
+    """Forget the lag checks, so every replica is checked again on next use."""
+    _health.clear()
+
+
+def read_alias(last_write=None):
+    """
+    Pick the database to read from.
+
+    Args:
+        last_write (float | None): Epoch time of the client's last write; a
+            client that wrote within the lag tolerance reads from the primary.
+
+    Returns:
+        str: A healthy replica alias chosen at random, or the primary.
+    """
+    if last_write is not None and time.time() - last_write < settings.POLLS_REPLICA_LAG_SECONDS:
+        return DEFAULT_DB_ALIAS
+    replicas = [alias for alias in settings.POLLS_READ_REPLICAS if _is_healthy(alias)]
+    return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+
+def last_write_time(request):
+    """Return the time of the client's last write from its cookie, if any."""
+    try:
+        return float(request.COOKIES[LAST_WRITE_COOKIE])
+    except (KeyError, ValueError):
+        return None
+
+
+@contextmanager
+def replica_reads(last_write=None):
+    """
+    Route reads inside the block to one replica (see read_alias), so all
+    queries of a request see the same snapshot.
+    """
+    token = _read_alias.set(read_alias(last_write))
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def reading_from_replicas():
+    """Whether reads in the current context are routed to the replicas."""
+    return _read_alias.get() not in (None, DEFAULT_DB_ALIAS)
+
+
+class ReplicaRouter:
+    """Sends reads inside replica_reads() to the replicas and everything else to the primary."""
+
+    def db_for_read(self, model, **hints):
+        # Outside replica_reads() Django's own choice stands
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        # Also for instances that were read from a replica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+class ReadYourWritesMiddleware(MiddlewareMixin):
+    """
+    Stamps successful writes with the last-write cookie, so the client's
+    next reads within the lag tolerance come from the primary.
+    """
+
+    def process_response(self, request, response):
+        if (
+            settings.POLLS_READ_REPLICAS
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            response.set_cookie(
+                LAST_WRITE_COOKIE, f'{time.time():.3f}',
+                max_age=math.ceil(settings.POLLS_REPLICA_LAG_SECONDS), httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,139 @@
+"""
+schema.py
+
+The OpenAPI schema of the API, prebuilt into a static file.
+
+drf_yasg introspects every view and serializer to build the schema, and
+importing it adds about 0.1 s to every worker start. The schema is built
+once instead, by `manage.py build_openapi_schema` (see entrypoint.sh), into
+polls/static/polls/openapi.json, which collectstatic and WhiteNoise serve
+like any static file. /api/docs/ is Swagger UI pointed at that file. The
+file is committed; `build_openapi_schema --check` fails when it no longer
+matches the code, and the test suite runs that check.
+
+Views describe their operations with `swagger_auto_schema` and `openapi`
+from this module. They stand in for drf_yasg's: the decorator only records
+its arguments, and `openapi.X(...)` only records the call. drf_yasg is
+imported, and the recorded arguments passed to its real decorator, when
+the schema is built.
+"""
+from pathlib import Path
+
+from django.shortcuts import redirect, render
+from django.templatetags.static import static
+from django.urls import get_resolver
+from django.utils.cache import patch_cache_control
+
+SCHEMA_NAME = 'polls/openapi.json'
+SCHEMA_PATH = Path(__file__).resolve().parent / 'static' / SCHEMA_NAME
+
+# Docs pages change only with a deploy
+DOCS_MAX_AGE = 60 * 60
+
+_pending = []
+
+
+class _Deferred:
+    """A drf_yasg.openapi attribute, or a call to one, looked up when the schema is built."""
+
+    def __init__(self, name, args=None, kwargs=None):
+        self.name = name
+        self.args = args
+        self.kwargs = kwargs
+
+    def __call__(self, *args, **kwargs):
+        return _Deferred(self.name, args, kwargs)
+
+    def resolve(self, module):
+        value = getattr(module, self.name)
+        if self.args is None:
+            return value
+        return value(*_resolve(self.args, module), **_resolve(self.kwargs, module))
+
+
+class _DeferredModule:
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return _Deferred(name)
+
+
+openapi = _DeferredModule()
+
+
+def _resolve(value, module):
+    if isinstance(value, _Deferred):
+        return value.resolve(module)
+    if isinstance(value, dict):
+        return {key: _resolve(item, module) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_resolve(item, module) for item in value)
+    return value
+
+
+def swagger_auto_schema(*args, **kwargs):
+    """Record drf_yasg's swagger_auto_schema for a view method, to apply when the schema is built."""
+    def decorator(view_method):
+        _pending.append((view_method, args, kwargs))
+        return view_method
+    return decorator
+
+
+SCHEMA_INFO = openapi.Info(
+    title="Online Poll System API",
+    default_version='v1',
+    description="API documentation for the Online Poll System",
+    terms_of_service="https://www.google.com/policies/terms/",
+    contact=openapi.Contact(email="iankerich254@gmail.com"),
+    license=openapi.License(name="MIT License"),
+)
+
+
+def generate_schema():
+    """
+    Build the OpenAPI schema of every API view with drf_yasg.
+
+    Returns:
+        bytes: The schema as indented JSON.
+    """
+    from drf_yasg import openapi as yasg_openapi
+    from drf_yasg.codecs import OpenAPICodecJson
+    from drf_yasg.generators import OpenAPISchemaGenerator
+    from drf_yasg.utils import swagger_auto_schema as yasg_swagger_auto_schema
+
+    # Importing the URLconf imports every view, so all their descriptions are recorded
+    get_resolver().url_patterns
+    while _pending:
+        view_method, args, kwargs = _pending.pop(0)
+        yasg_swagger_auto_schema(*_resolve(args, yasg_openapi), **_resolve(kwargs, yasg_openapi))(view_method)
+
+    generator = OpenAPISchemaGenerator(info=_resolve(SCHEMA_INFO, yasg_openapi))
+    schema = generator.get_schema(request=None, public=True)
+    return OpenAPICodecJson(validators=[], pretty=True).encode(schema) + b'\n'
+
+
+def read_schema():
+    """The prebuilt schema file's bytes, or None if it was never built."""
+    try:
+        return SCHEMA_PATH.read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+def write_schema(content):
+    SCHEMA_PATH.parent.mkdir(parents=True, exist_ok=True)
+    SCHEMA_PATH.write_bytes(content)
+
+
+def docs_view(request):
+    """Swagger UI for the prebuilt schema; ``?format=openapi`` redirects to the schema itself."""
+    schema_url = static(SCHEMA_NAME)
+    if request.GET.get('format') == 'openapi':
+        response = redirect(schema_url)
+    else:
+        response = render(request, 'polls/swagger_ui.html', {
+            'title': SCHEMA_INFO.kwargs['title'],
+            'schema_url': schema_url,
+        })
+    patch_cache_control(response, public=True, max_age=DOCS_MAX_AGE)
+    return response
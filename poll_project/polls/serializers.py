@@ -1,6 +1,35 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from .models import Poll, Question, Choice, Vote
+from .authoring import create_polls
+from .rollups import parse_bucket
+from .utils import get_client_ip
+
+# Listings and nested polls are read far more than they are written, so the
+# read serializers below build their output directly instead of going through
+# a field per attribute. The result must stay identical to what the declared
+# fields would produce; test_rendering compares the two.
+_datetime_field = serializers.DateTimeField()
+
+
+def _datetime(value):
+    return _datetime_field.to_representation(value)
+
+
+def _choice_data(choice):
+    return {'id': choice.id, 'text': choice.text, 'question': choice.question_id}
+
+
+def _question_data(question):
+    return {
+        'id': question.id,
+        'text': question.text,
+        'poll': question.poll_id,
+        'choices': [_choice_data(choice) for choice in question.choices.all()],
+    }
+
 
 class ChoiceSerializer(serializers.ModelSerializer):
     """Serializer for individual poll choices."""
@@ -8,6 +37,9 @@ class ChoiceSerializer(serializers.ModelSerializer):
         model = Choice
         fields = ['id', 'text', 'question']
 
+    def to_representation(self, instance):
+        return _choice_data(instance)
+
 class QuestionSerializer(serializers.ModelSerializer):
     """Serializer for poll questions, including nested choices."""
     choices = ChoiceSerializer(many=True, read_only=True)
@@ -16,6 +48,9 @@ class QuestionSerializer(serializers.ModelSerializer):
         model = Question
         fields = ['id', 'text', 'poll', 'choices']
 
+    def to_representation(self, instance):
+        return _question_data(instance)
+
 class PollSerializer(serializers.ModelSerializer):
     """Serializer for polls, including nested questions and owner (user)."""
     questions = QuestionSerializer(many=True, read_only=True)
@@ -25,6 +60,60 @@ class PollSerializer(serializers.ModelSerializer):
         model = Poll
         fields = ['id', 'title', 'created_at', 'updated_at', 'user', 'expiry', 'questions']
 
+    def to_representation(self, instance):
+        return {
+            'id': instance.id,
+            'title': instance.title,
+            'created_at': _datetime(instance.created_at),
+            'updated_at': _datetime(instance.updated_at),
+            'user': str(instance.user),
+            'expiry': _datetime(instance.expiry),
+            'questions': [_question_data(question) for question in instance.questions.all()],
+        }
+
+class ChoiceDraftSerializer(serializers.ModelSerializer):
+    """A choice written as part of a new question."""
+    class Meta:
+        model = Choice
+        fields = ['text']
+
+class QuestionDraftSerializer(serializers.ModelSerializer):
+    """A question written as part of a new poll, with its choices."""
+    choices = ChoiceDraftSerializer(many=True, required=False)
+
+    class Meta:
+        model = Question
+        fields = ['text', 'choices']
+
+class PollCreateListSerializer(serializers.ListSerializer):
+    """Creates all validated polls together, with one insert per model."""
+
+    def create(self, validated_data):
+        user = validated_data[0]['user'] if validated_data else None
+        return create_polls(user, validated_data)
+
+class PollCreateSerializer(PollSerializer):
+    """
+    Serializer for creating a poll with its questions and choices in one request.
+    Reads back like PollSerializer.
+    """
+    questions = QuestionDraftSerializer(many=True, required=False)
+
+    class Meta(PollSerializer.Meta):
+        list_serializer_class = PollCreateListSerializer
+
+    def validate_expiry(self, value):
+        """
+        Raises:
+            ValidationError: If the expiry is not in the future.
+        """
+        if value < timezone.now():
+            raise serializers.ValidationError("Expiry date must be in the future.")
+        return value
+
+    def create(self, validated_data):
+        return create_polls(validated_data['user'], [validated_data])[0]
+
 class VoteSerializer(serializers.ModelSerializer):
     """Serializer for submitting votes with IP and session validation."""
     class Meta:
@@ -69,9 +158,60 @@ class VoteSerializer(serializers.ModelSerializer):
         Returns:
             str: IP address of the client.
         """
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
\ No newline at end of file
+        return get_client_ip(request)
+
+# Largest value of the integer primary keys; larger IDs overflow database parameters
+MAX_ID = 2 ** 31 - 1
+
+
+class BallotSerializer(serializers.Serializer):
+    """Serializer for a whole-ballot submission: one choice per question of a poll."""
+    selections = serializers.DictField(
+        child=serializers.IntegerField(min_value=1, max_value=MAX_ID),
+        allow_empty=False,
+        help_text="Mapping of question ID to the ID of the selected choice."
+    )
+
+    def validate_selections(self, value):
+        """
+        Convert question IDs to integers.
+
+        Raises:
+            ValidationError: If a key is not a valid question ID.
+        """
+        try:
+            selections = {int(question_id): choice_id for question_id, choice_id in value.items()}
+        except ValueError:
+            raise serializers.ValidationError("Question IDs must be integers.")
+        if not all(1 <= question_id <= MAX_ID for question_id in selections):
+            raise serializers.ValidationError(f"Question IDs must be between 1 and {MAX_ID}.")
+        return selections
+
+class TimeseriesQuerySerializer(serializers.Serializer):
+    """Query parameters of the poll time-series endpoint."""
+    bucket = serializers.CharField(
+        default='1m',
+        help_text="Bucket size: a number followed by m (minutes), h (hours) or d (days), e.g. 5m."
+    )
+    since = serializers.DateTimeField(required=False, help_text="Only include buckets from this time on.")
+
+    def validate_bucket(self, value):
+        """
+        Convert the bucket size to minutes.
+
+        Raises:
+            ValidationError: If the bucket size is not understood.
+        """
+        minutes = parse_bucket(value)
+        if minutes is None:
+            raise serializers.ValidationError("Use a number followed by m, h or d, e.g. 5m.")
+        return minutes
+
+class TrendingQuerySerializer(serializers.Serializer):
+    """Query parameters of the trending polls endpoint."""
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.POLLS_TRENDING_SIZE,
+        required=False,
+        help_text="Number of polls to return, at most POLLS_TRENDING_SIZE.",
+    )
@@ -0,0 +1,90 @@
+"""
+signals.py
+
+Keeps cached poll data, results and poll versions consistent with Poll,
+Question, Choice and Vote changes made through the API, the admin or the ORM.
+Vote changes bump the poll version in the counter update itself; deleting
+a choice, question or user takes the votes cascaded with it off the counters
+that outlive it.
+"""
+from django.db import transaction
+from django.db.models import F, QuerySet, Subquery
+from django.db.models.signals import post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .ingest import invalidate_question_info
+from .models import Poll, Question, Choice, Vote, User, votes_recorded, votes_deleted, bump_poll_versions
+from . import metrics
+from .results import invalidate_poll_results
+from .snapshots import delete_snapshot_file
+
+
+@receiver([post_save, post_delete], sender=Poll)
+def poll_changed(sender, instance, created=False, **kwargs):
+    invalidate_poll_results(instance.pk)
+    # Deleted polls are covered by the cascade of question deletions
+    if kwargs['signal'] is post_save and not created:
+        bump_poll_versions([instance.pk])
+        invalidate_question_info(instance.questions.values_list('id', flat=True))
+    elif kwargs['signal'] is post_delete:
+        poll_id = instance.pk
+        transaction.on_commit(lambda: delete_snapshot_file(poll_id))
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_changed(sender, instance, **kwargs):
+    invalidate_question_info([instance.pk])
+    invalidate_poll_results(instance.poll_id)
+    bump_poll_versions([instance.poll_id])
+
+
+def _origin_model(origin):
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+def _deleted_with_question(origin):
+    # Choices are only cascaded from their question, whose own handler then invalidates
+    # the same data once, rather than once per choice with a query for its poll
+    return _origin_model(origin) is not Choice
+
+
+@receiver(pre_delete, sender=Question)
+def question_deleting(sender, instance, origin, **kwargs):
+    # Its votes are cascaded without signals; the poll keeps counting them unless
+    # the poll itself is going
+    if _origin_model(origin) is not Question:
+        return
+    deleted_votes = Subquery(Question.objects.filter(pk=instance.pk).values('vote_count'))
+    Poll.objects.filter(pk=instance.poll_id).update(vote_count=F('vote_count') - deleted_votes)
+
+
+@receiver(pre_delete, sender=Choice)
+def choice_deleting(sender, instance, origin, **kwargs):
+    if _deleted_with_question(origin):
+        return
+    deleted_votes = Subquery(Choice.objects.filter(pk=instance.pk).values('vote_count'))
+    Question.objects.filter(pk=instance.question_id).update(vote_count=F('vote_count') - deleted_votes)
+    Poll.objects.filter(pk=instance.question.poll_id).update(vote_count=F('vote_count') - deleted_votes)
+
+
+@receiver(pre_delete, sender=User)
+def user_deleting(sender, instance, **kwargs):
+    # Votes on the user's own polls go with the polls; the rest leave other polls
+    Vote.objects.filter(user=instance).exclude(question__poll__user=instance).delete()
+
+
+@receiver([post_save, post_delete], sender=Choice)
+def choice_changed(sender, instance, **kwargs):
+    if kwargs['signal'] is post_delete and _deleted_with_question(kwargs['origin']):
+        return
+    invalidate_question_info([instance.question_id])
+    invalidate_poll_results(instance.question.poll_id)
+    bump_poll_versions([instance.question.poll_id])
+
+
+@receiver([votes_recorded, votes_deleted], sender=Vote)
+def votes_changed(sender, poll_ids, choice_counts, **kwargs):
+    for poll_id in poll_ids:
+        invalidate_poll_results(poll_id)
+    if kwargs['signal'] is votes_recorded:
+        metrics.inc('polls_votes_recorded_total', amount=sum(choice_counts.values()))
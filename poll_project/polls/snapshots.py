@@ -0,0 +1,175 @@
+"""
+snapshots.py
+
+Static files of the final results of closed polls.
+
+When a poll closes, its PollSnapshot payload is written under
+POLLS_SNAPSHOT_ROOT as ``results/<poll id>.json``, the exact bytes the
+results endpoint returns, next to gzip and (with the brotli package)
+brotli compressed copies. SnapshotWhiteNoiseMiddleware serves them under
+POLLS_SNAPSHOT_URL with the encoding the client accepts, cacheable for
+POLLS_SNAPSHOT_MAX_AGE and revalidated by ETag afterwards: a closed poll's
+results never change, but `build_result_snapshots` may rewrite the file at
+the same URL. The results views redirect there once the file exists. Each hit on a shared link then
+costs a file read, with no view, serializer or query involved.
+
+Files are replaced atomically, the compressed copies first, so a served
+file always has its compressed copies up to date.
+"""
+import gzip
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponseRedirect
+from django.utils.cache import patch_cache_control
+from whitenoise.middleware import WhiteNoiseMiddleware
+from whitenoise.responders import NotARegularFileError
+
+from .models import PollSnapshot
+from .renderers import FastJSONRenderer
+
+try:
+    import brotli
+except ImportError:  # Optional: without it, snapshots are only gzip compressed
+    brotli = None
+
+# Compressed copies must save at least this much to be worth serving, as in WhiteNoise's compressor
+MIN_COMPRESSION_RATIO = 0.95
+
+
+def snapshot_name(poll_id):
+    return f"results/{int(poll_id)}.json"
+
+
+def snapshot_path(poll_id):
+    return os.path.join(settings.POLLS_SNAPSHOT_ROOT, snapshot_name(poll_id))
+
+
+def snapshot_url(poll_id):
+    """URL of a poll's results snapshot, or None if no file was written for it."""
+    if not os.path.isfile(snapshot_path(poll_id)):
+        return None
+    return settings.POLLS_SNAPSHOT_URL + snapshot_name(poll_id)
+
+
+def snapshot_redirect(url):
+    """Redirect to a results snapshot; cacheable, as the snapshot stays where it is."""
+    response = HttpResponseRedirect(url)
+    patch_cache_control(response, public=True, max_age=settings.POLLS_SNAPSHOT_REDIRECT_MAX_AGE)
+    return response
+
+
+def _replace(path, data):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(data)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def _write_compressed(path, data, compress):
+    compressed = compress(data) if compress is not None else None
+    if compressed is not None and len(compressed) < len(data) * MIN_COMPRESSION_RATIO:
+        _replace(path, compressed)
+    elif os.path.exists(path):
+        os.unlink(path)
+
+
+def write_snapshot_file(poll_id, payload):
+    """Write the results file of a poll and its compressed copies."""
+    data = FastJSONRenderer().render(payload)
+    path = snapshot_path(poll_id)
+    # mtime=0 keeps the gzip bytes, and so the ETag of rewrites, unchanged
+    _write_compressed(path + '.gz', data, lambda raw: gzip.compress(raw, compresslevel=9, mtime=0))
+    _write_compressed(path + '.br', data, brotli.compress if brotli is not None else None)
+    _replace(path, data)
+
+
+def write_snapshot_file_on_commit(poll_id, payload):
+    """Write the results file once the snapshot is committed; failures are logged, not raised."""
+    if settings.POLLS_SNAPSHOT_FILES:
+        transaction.on_commit(lambda: write_snapshot_file(poll_id, payload), robust=True)
+
+
+def delete_snapshot_file(poll_id):
+    path = snapshot_path(poll_id)
+    # The uncompressed file goes first, so nothing links to the copies left behind
+    for file_path in (path, path + '.gz', path + '.br'):
+        try:
+            os.unlink(file_path)
+        except FileNotFoundError:
+            pass
+
+
+def regenerate_snapshot_files(poll_ids=None, workers=None, chunk_size=500):
+    """
+    Rewrite the results files of closed polls from their PollSnapshots.
+
+    Payloads are read and compressed chunk_size at a time, so at most one
+    chunk is held in memory, on a thread pool; zlib and brotli release the
+    GIL, so the threads compress in parallel.
+
+    Args:
+        poll_ids: Only these polls, or every closed poll if None.
+        workers: Compression threads, one per CPU by default.
+
+    Returns:
+        int: Number of files written.
+    """
+    snapshots = PollSnapshot.objects.order_by('poll_id')
+    if poll_ids is not None:
+        snapshots = snapshots.filter(poll_id__in=poll_ids)
+    rows = snapshots.values_list('poll_id', 'payload').iterator(chunk_size=chunk_size)
+
+    written = 0
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            written += len(list(executor.map(lambda row: write_snapshot_file(*row), chunk)))
+    return written
+
+
+class SnapshotWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware that also serves the results snapshots.
+    Snapshots are written while the app runs, so they are looked up on
+    disk per request rather than indexed at startup like static files.
+    """
+
+    def __call__(self, request):
+        if request.path_info.startswith(settings.POLLS_SNAPSHOT_URL):
+            static_file = self.find_snapshot(request.path_info)
+            if static_file is not None:
+                return self.serve(static_file, request)
+        return super().__call__(request)
+
+    def find_snapshot(self, url):
+        if not self.url_is_canonical(url):
+            return None
+        root = os.path.abspath(settings.POLLS_SNAPSHOT_ROOT) + os.path.sep
+        path = os.path.join(root, url[len(settings.POLLS_SNAPSHOT_URL):])
+        if not self.path_is_child_of(path, root) or self.is_compressed_variant(path):
+            return None
+        try:
+            return self.get_static_file(path, url)
+        except NotARegularFileError:
+            return None
+
+    def add_cache_headers(self, headers, path, url):
+        # Not immutable: build_result_snapshots may rewrite a snapshot at the same URL
+        if url.startswith(settings.POLLS_SNAPSHOT_URL):
+            headers['Cache-Control'] = f'max-age={settings.POLLS_SNAPSHOT_MAX_AGE}, public'
+        else:
+            super().add_cache_headers(headers, path, url)
@@ -0,0 +1,229 @@
+"""
+streaming.py
+
+Live poll results over Server-Sent Events, served directly by the ASGI app.
+
+Every poll with at least one open stream has a single feed task that reads
+Poll.version from the database once per tick and, when it changed, reads
+the choice counters with one query and fans the changed counts out to all
+subscribers. Connections never query the database on their own after the
+initial snapshot. A feed that fails to read logs the error and retries
+with a growing delay instead of leaving its subscribers without updates.
+The version is read from the database rather than the results cache, which
+a per-process cache would never update for votes recorded by other workers.
+"""
+import asyncio
+import json
+import logging
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from .models import Poll
+from .results import get_poll_results, get_choice_counts
+
+STREAM_PATH = re.compile(r'^/api/polls/(?P<pk>\d+)/stream/$')
+
+# Longest delay, in seconds, between retries of a failing feed
+FEED_MAX_BACKOFF = 30.0
+
+logger = logging.getLogger(__name__)
+
+
+def _poll_version(poll_id):
+    return Poll.objects.filter(pk=poll_id).values_list('version', flat=True).first()
+
+
+def _read(func, *args):
+    # Feeds outlive requests, so drop stale connections the way request handling does
+    close_old_connections()
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+class Subscription:
+    """
+    Pending updates of one stream connection.
+    Updates carry absolute counts and are merged per choice, so a slow
+    client holds at most one value per choice no matter how many ticks it misses.
+    """
+
+    def __init__(self):
+        self.pending = {}
+        self.ready = asyncio.Event()
+
+    def publish(self, counts):
+        self.pending.update(counts)
+        self.ready.set()
+
+    async def next_update(self):
+        await self.ready.wait()
+        self.ready.clear()
+        update, self.pending = self.pending, {}
+        return update
+
+
+class PollFeed:
+    """Shared poller for one poll."""
+
+    def __init__(self, poll_id):
+        self.poll_id = poll_id
+        self.subscribers = set()
+        self.counts = {}
+        self.version = None
+        self.task = None
+
+    async def run(self):
+        failures = 0
+        while True:
+            try:
+                await self.tick()
+            except Exception:
+                failures += 1
+                logger.exception("Results feed of poll %s failed (%d in a row)", self.poll_id, failures)
+                delay = min(settings.POLLS_STREAM_TICK * 2 ** failures, FEED_MAX_BACKOFF)
+            else:
+                failures = 0
+                delay = settings.POLLS_STREAM_TICK
+            await asyncio.sleep(delay)
+
+    async def tick(self):
+        version = await sync_to_async(_read)(_poll_version, self.poll_id)
+        if version != self.version:
+            counts = await sync_to_async(_read)(get_choice_counts, self.poll_id)
+            self.version = version
+            changed = {pk: votes for pk, votes in counts.items() if self.counts.get(pk) != votes}
+            self.counts = counts
+            if changed:
+                for subscription in self.subscribers:
+                    subscription.publish(changed)
+
+
+class ResultsBroadcaster:
+    """Owns one PollFeed per streamed poll and starts or stops it with its subscribers."""
+
+    def __init__(self):
+        self.feeds = {}
+
+    def subscribe(self, poll_id):
+        feed = self.feeds.get(poll_id)
+        if feed is None:
+            feed = self.feeds[poll_id] = PollFeed(poll_id)
+            feed.task = asyncio.ensure_future(feed.run())
+        subscription = Subscription()
+        if feed.counts:
+            # Late joiners start from the counts the feed already knows
+            subscription.publish(feed.counts)
+        feed.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, poll_id, subscription):
+        feed = self.feeds.get(poll_id)
+        if feed is None:
+            return
+        feed.subscribers.discard(subscription)
+        if not feed.subscribers:
+            feed.task.cancel()
+            del self.feeds[poll_id]
+
+
+broadcaster = ResultsBroadcaster()
+
+
+def format_event(event, data):
+    payload = json.dumps(data, separators=(',', ':'))
+    return f"event: {event}\ndata: {payload}\n\n".encode()
+
+
+async def stream_poll_results(scope, receive, send, poll_id):
+    """
+    ASGI handler streaming a results snapshot followed by count updates.
+
+    Events:
+        snapshot: Full results payload plus ``counts`` (choice id -> votes).
+        update: ``counts`` of the choices that changed since the last event.
+    """
+    if scope['method'] != 'GET':
+        await _send_json(send, 405, {"detail": f'Method "{scope["method"]}" not allowed.'})
+        return
+
+    subscription = broadcaster.subscribe(poll_id)
+    try:
+        results = await sync_to_async(get_poll_results)(poll_id)
+        if results is None:
+            await _send_json(send, 404, {"detail": "Poll not found."})
+            return
+
+        counts = await sync_to_async(get_choice_counts)(poll_id)
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': format_event('snapshot', {**results, "counts": counts}),
+            'more_body': True,
+        })
+
+        disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+        try:
+            while True:
+                update = asyncio.ensure_future(subscription.next_update())
+                done, _ = await asyncio.wait(
+                    {update, disconnected},
+                    timeout=settings.POLLS_STREAM_HEARTBEAT,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if disconnected in done:
+                    update.cancel()
+                    break
+                if update in done:
+                    body = format_event('update', {"counts": update.result()})
+                else:
+                    update.cancel()
+                    body = b": keep-alive\n\n"
+                await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+        finally:
+            disconnected.cancel()
+    finally:
+        broadcaster.unsubscribe(poll_id, subscription)
+
+
+async def _wait_for_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+
+
+async def _send_json(send, status, data):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json')],
+    })
+    await send({'type': 'http.response.body', 'body': json.dumps(data).encode()})
+
+
+class ResultsStreamRouter:
+    """ASGI app that serves results streams and hands every other request to Django."""
+
+    def __init__(self, django_application):
+        self.django_application = django_application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            match = STREAM_PATH.match(scope['path'])
+            if match:
+                await stream_poll_results(scope, receive, send, int(match['pk']))
+                return
+        await self.django_application(scope, receive, send)
@@ -0,0 +1,175 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+import openpyxl
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from polls.exports import run_export_job
+from polls.models import Poll, Question, Choice, Vote, User, ExportJob
+
+
+class AdminExportTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='boss', email='boss@example.com', password='pass1234')
+        self.client.force_login(self.admin)
+        self.poll = Poll.objects.create(
+            title="Election",
+            user=self.admin,
+            expiry=timezone.now() + timedelta(days=1)
+        )
+        self.question = Question.objects.create(text="Who should win?", poll=self.poll)
+        self.choice1 = Choice.objects.create(text="Candidate A", question=self.question)
+        self.choice2 = Choice.objects.create(text="Candidate B", question=self.question)
+        Vote.objects.bulk_create([
+            Vote(question=self.question, choice=self.choice1, ip_address='1.1.1.1'),
+            Vote(question=self.question, choice=self.choice1, ip_address='1.1.1.2'),
+            Vote(question=self.question, choice=self.choice2, ip_address='1.1.1.3', user=self.admin),
+        ])
+
+    def run_action(self, model, action, pk):
+        url = reverse(f'admin:polls_{model}_changelist')
+        response = self.client.post(url, {'action': action, '_selected_action': [pk]})
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode().splitlines()
+
+    def test_export_votes_csv(self):
+        lines = self.run_action('question', 'export_votes_csv', self.question.pk)
+        self.assertEqual(lines, [
+            'Poll,Question,Choice,Vote Count',
+            'Election,Who should win?,Candidate A,2',
+            'Election,Who should win?,Candidate B,1',
+        ])
+
+    def test_export_poll_votes_csv(self):
+        lines = self.run_action('poll', 'export_poll_votes_csv', self.poll.pk)
+        self.assertEqual(lines[1:], [
+            'Election,Who should win?,Candidate A,2,66.67%',
+            'Election,Who should win?,Candidate B,1,33.33%',
+        ])
+
+    def test_export_raw_votes_csv(self):
+        lines = self.run_action('poll', 'export_poll_raw_votes_csv', self.poll.pk)
+        self.assertEqual(lines[0], 'Vote ID,Poll,Question,Choice,User,Voted At')
+        self.assertEqual(len(lines), 4)
+        self.assertIn(',Election,Who should win?,Candidate B,boss,', lines[3])
+        self.assertEqual(len(self.run_action('question', 'export_raw_votes_csv', self.question.pk)), 4)
+
+
+class AdminChangelistTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='boss', email='boss@example.com', password='pass1234')
+        self.client.force_login(self.admin)
+        self.add_polls(1)
+
+    def add_polls(self, count):
+        for i in range(count):
+            poll = Poll.objects.create(title=f"Poll {i}", user=self.admin, expiry=timezone.now() + timedelta(days=1))
+            for j in range(3):
+                question = Question.objects.create(text=f"Question {j}", poll=poll)
+                choices = [Choice.objects.create(text=f"Option {k}", question=question) for k in range(3)]
+                Vote.objects.bulk_create([
+                    Vote(question=question, choice=choices[k % 2], ip_address=f'10.{i}.{j}.{k}') for k in range(j + 1)
+                ])
+
+    def count_queries(self, model):
+        url = reverse(f'admin:polls_{model}_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_changelists_run_constant_queries(self):
+        before = {model: self.count_queries(model)[0] for model in ('poll', 'question', 'choice', 'vote')}
+        self.add_polls(10)
+        after = {model: self.count_queries(model)[0] for model in ('poll', 'question', 'choice', 'vote')}
+        self.assertEqual(before, after)
+
+    def test_question_winner_column(self):
+        _, response = self.count_queries('question')
+        self.assertContains(response, "Option 0 (2 votes)")
+        self.assertContains(response, "Option 0 (1 votes)")
+
+
+class ExcelExportJobTests(TestCase):
+    def setUp(self):
+        self.export_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.export_root)
+        self.admin = User.objects.create_superuser(username='boss', email='boss@example.com', password='pass1234')
+        self.client.force_login(self.admin)
+        self.poll = Poll.objects.create(
+            title="Election",
+            user=self.admin,
+            expiry=timezone.now() + timedelta(days=1)
+        )
+        self.question = Question.objects.create(text="Who should win?", poll=self.poll)
+        self.choice1 = Choice.objects.create(text="Candidate A with a long name", question=self.question)
+        self.choice2 = Choice.objects.create(text="Candidate B", question=self.question)
+        Vote.objects.create(question=self.question, choice=self.choice1, ip_address='1.1.1.1')
+
+    def test_excel_export_runs_as_background_job(self):
+        with override_settings(POLLS_EXPORT_ROOT=self.export_root, POLLS_EXPORT_IN_PROCESS=False):
+            response = self.client.post(
+                reverse('admin:polls_poll_changelist'),
+                {'action': 'export_poll_votes_excel', '_selected_action': [self.poll.pk]},
+                follow=True
+            )
+            self.assertContains(response, "Excel export started in the background")
+            job = ExportJob.objects.get()
+            self.assertEqual(job.status, ExportJob.PENDING)
+
+            call_command('run_export_jobs', stdout=StringIO())
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.progress, job.row_count), (ExportJob.DONE, 100, 2))
+
+            response = self.client.get(reverse('admin:polls_exportjob_download', args=[job.pk]))
+            self.assertEqual(response.status_code, 200)
+            workbook = openpyxl.load_workbook(BytesIO(b''.join(response.streaming_content)))
+
+        sheet = workbook["Poll Vote Stats"]
+        rows = list(sheet.values)
+        self.assertEqual(rows[0], ('Poll', 'Question', 'Choice', 'Votes', 'Percentage'))
+        self.assertEqual(rows[1], ('Election', 'Who should win?', 'Candidate A with a long name', 1, '100.00%'))
+        self.assertEqual(sheet.column_dimensions['C'].width, len('Candidate A with a long name') + 2)
+
+    def test_download_of_missing_file_is_not_found(self):
+        with override_settings(POLLS_EXPORT_ROOT=self.export_root):
+            job = ExportJob.objects.create(kind='poll_votes', object_ids=[self.poll.pk])
+            self.assertTrue(run_export_job(job.pk))
+            job.refresh_from_db()
+            os.remove(os.path.join(self.export_root, job.file_name))
+
+            response = self.client.get(reverse('admin:polls_exportjob_download', args=[job.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_failed_job_records_error(self):
+        job = ExportJob.objects.create(kind='unknown', object_ids=[self.poll.pk])
+        with override_settings(POLLS_EXPORT_ROOT=self.export_root):
+            self.assertTrue(run_export_job(job.pk))
+            self.assertFalse(run_export_job(job.pk))
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.FAILED)
+
+    def test_abandoned_running_job_is_marked_failed(self):
+        job = ExportJob.objects.create(kind='poll_votes', object_ids=[self.poll.pk])
+        ExportJob.objects.filter(pk=job.pk).update(
+            status=ExportJob.RUNNING, started_at=timezone.now() - timedelta(hours=2)
+        )
+        recent = ExportJob.objects.create(kind='poll_votes', object_ids=[self.poll.pk])
+        ExportJob.objects.filter(pk=recent.pk).update(status=ExportJob.RUNNING, started_at=timezone.now())
+
+        out = StringIO()
+        call_command('run_export_jobs', '--timeout', '3600', stdout=out)
+        self.assertIn("Marked 1 abandoned export jobs as failed", out.getvalue())
+        job.refresh_from_db()
+        recent.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.FAILED)
+        self.assertIn("did not finish within 3600 seconds", job.error)
+        self.assertEqual(recent.status, ExportJob.RUNNING)
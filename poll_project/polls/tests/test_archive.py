@@ -0,0 +1,88 @@
+import shutil
+import tempfile
+from io import StringIO
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from polls.archive import read_vote_archive, write_vote_archive, archive_poll_votes
+from polls.models import Poll, Question, Choice, Vote, User, VoteArchive, ArchivedVoteCount
+
+
+class ArchiveVotesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.archive_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_root)
+        override = override_settings(POLLS_ARCHIVE_ROOT=self.archive_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user(username='owner', password='testpass')
+        self.poll = Poll.objects.create(title="Old", user=self.user, expiry=timezone.now() + timedelta(days=1))
+        self.question = Question.objects.create(text="Who?", poll=self.poll)
+        self.choice1 = Choice.objects.create(text="A", question=self.question)
+        self.choice2 = Choice.objects.create(text="B", question=self.question)
+        Vote.objects.bulk_create(
+            [Vote(question=self.question, choice=self.choice1, ip_address=f'1.1.1.{i}') for i in range(5)]
+            + [Vote(question=self.question, choice=self.choice2, ip_address=f'2.2.2.{i}') for i in range(3)]
+        )
+        Poll.objects.filter(pk=self.poll.pk).update(expiry=timezone.now() - timedelta(days=2))
+
+        self.open_poll = Poll.objects.create(title="Open", user=self.user, expiry=timezone.now() + timedelta(days=1))
+        open_question = Question.objects.create(text="Open?", poll=self.open_poll)
+        open_choice = Choice.objects.create(text="Yes", question=open_question)
+        Vote.objects.create(question=open_question, choice=open_choice, ip_address='3.3.3.3')
+
+    def test_archive_moves_votes_and_keeps_results(self):
+        out = StringIO()
+        call_command('archive_votes', '--batch-size', '3', stdout=out)
+        self.assertIn("Archived 8 votes", out.getvalue())
+
+        self.assertFalse(Vote.objects.filter(question=self.question).exists())
+        self.assertEqual(Vote.objects.count(), 1)
+
+        archive = VoteArchive.objects.get(poll=self.poll)
+        self.assertEqual(archive.vote_count, 8)
+        self.assertEqual(archive.deleted_count, 8)
+        self.assertIsNotNone(archive.completed_at)
+        records = list(read_vote_archive(archive))
+        self.assertEqual(len(records), 8)
+        self.assertEqual(sum(record['choice_id'] == self.choice1.pk for record in records), 5)
+
+        self.assertEqual(ArchivedVoteCount.objects.get(choice=self.choice1).vote_count, 5)
+        self.assertEqual(ArchivedVoteCount.objects.get(choice=self.choice2).vote_count, 3)
+
+        response = APIClient().get(reverse('poll-results', args=[self.poll.pk]))
+        self.assertEqual(response.data['results'][0]['winner'], {"choice": "A", "votes": 5})
+
+        # Archived votes still count, so the counters have not drifted
+        out = StringIO()
+        call_command('reconcile_vote_counts', '--dry-run', stdout=out)
+        self.assertIn("Choices: 0 of 3 drifted", out.getvalue())
+        self.assertIn("Polls: 0 of 2 drifted", out.getvalue())
+
+    def test_grace_period_and_dry_run(self):
+        call_command('archive_votes', '--grace-hours', '72', stdout=StringIO())
+        self.assertEqual(Vote.objects.count(), 9)
+
+        out = StringIO()
+        call_command('archive_votes', '--dry-run', stdout=out)
+        self.assertIn("Would archive poll", out.getvalue())
+        self.assertEqual(Vote.objects.count(), 9)
+
+    def test_interrupted_archive_is_resumed(self):
+        # File written, but the run stopped before any vote was deleted
+        write_vote_archive(self.poll)
+        Vote.objects.create(question=self.question, choice=self.choice2, ip_address='9.9.9.9')
+
+        self.assertEqual(archive_poll_votes(self.poll), 9)
+        archives = list(VoteArchive.objects.filter(poll=self.poll).order_by('id'))
+        self.assertEqual([a.vote_count for a in archives], [8, 1])
+        self.assertTrue(all(a.completed_at for a in archives))
+        self.assertEqual(ArchivedVoteCount.objects.get(choice=self.choice2).vote_count, 4)
@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from polls.models import Poll, Question, Choice, Vote, User
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='pass1234')
+        self.poll = Poll.objects.create(
+            title="Favorite Programming Language?",
+            user=self.user,
+            expiry=timezone.now() + timedelta(days=1)
+        )
+        self.question = Question.objects.create(text="What's your favorite language?", poll=self.poll)
+        self.choice1 = Choice.objects.create(text="Python", question=self.question)
+        self.choice2 = Choice.objects.create(text="JavaScript", question=self.question)
+        self.vote_url = reverse('vote-async', args=[self.question.id])
+        self.results_url = reverse('poll-results-async', args=[self.poll.id])
+
+    async def test_vote_and_results(self):
+        response = await self.async_client.post(
+            self.vote_url,
+            {'choice': self.choice1.id},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(await Vote.objects.acount(), 1)
+
+        response = await self.async_client.get(self.results_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['winner'], {"choice": "Python", "votes": 1})
+
+    async def test_duplicate_vote_same_ip(self):
+        await self.async_client.post(
+            self.vote_url, {'choice': self.choice1.id}, content_type='application/json'
+        )
+        response = await self.async_client.post(
+            self.vote_url, {'choice': self.choice2.id}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(b"You have already voted from this IP", response.content)
+
+    async def test_duplicate_vote_same_session(self):
+        session = await self.async_client.asession()
+        await session.aset(f'has_voted_question_{self.question.id}', True)
+        await session.asave()
+
+        response = await self.async_client.post(
+            self.vote_url, {'choice': self.choice2.id}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(b"You have already voted in this session", response.content)
+
+    async def test_invalid_choice_and_missing_poll(self):
+        response = await self.async_client.post(
+            self.vote_url, {'choice': 'abc'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.get(reverse('poll-results-async', args=[self.poll.id + 100]))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,101 @@
+import json
+from datetime import timedelta
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from polls.models import User, Poll, Question, Choice
+
+
+class NestedPollAuthoringTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='author', email='author@example.com', password='pass1234')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.expiry = (timezone.now() + timedelta(days=7)).isoformat()
+
+    def survey(self, title="Survey", questions=30, choices=5):
+        return {
+            "title": title,
+            "expiry": self.expiry,
+            "questions": [
+                {"text": f"Question {i}?", "choices": [{"text": f"Choice {i}.{j}"} for j in range(choices)]}
+                for i in range(questions)
+            ],
+        }
+
+    def test_create_nested_poll_with_bulk_inserts(self):
+        # One insert each for the poll, questions and choices, inside a savepoint
+        with self.assertNumQueries(5):
+            response = self.client.post('/api/polls/', self.survey(), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Question.objects.count(), 30)
+        self.assertEqual(Choice.objects.count(), 150)
+
+        # The response reads back exactly like the poll does
+        poll_id = response.data['id']
+        self.assertEqual(response.content, self.client.get(f'/api/polls/{poll_id}/').content)
+        self.assertEqual(response.data['questions'][2]['choices'][4]['text'], "Choice 2.4")
+        self.assertEqual(response.data['user'], 'author')
+
+    def test_invalid_nested_data_creates_nothing(self):
+        survey = self.survey(questions=3)
+        survey['questions'][2]['choices'][1]['text'] = ''
+        response = self.client.post('/api/polls/', survey, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('questions', response.data)
+        self.assertFalse(Poll.objects.exists())
+
+    def test_import_json_list_and_upload(self):
+        with self.assertNumQueries(5):
+            response = self.client.post(
+                '/api/polls/import/', [self.survey("A", 2, 2), self.survey("B", 0)], format='json'
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(
+            list(Poll.objects.filter(pk__in=response.data['ids']).order_by('id').values_list('title', flat=True)),
+            ['A', 'B'],
+        )
+
+        upload = SimpleUploadedFile('polls.json', json.dumps([self.survey("C", 1, 3)]).encode(),
+                                    content_type='application/json')
+        response = self.client.post('/api/polls/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Choice.objects.filter(question__poll__title="C").count(), 3)
+
+    def test_import_csv_upload(self):
+        rows = [
+            "title,expiry,question,choice",
+            f"Languages,{self.expiry},Which one?,Python",
+            f"Languages,{self.expiry},Which one?,Go",
+            f"Languages,{self.expiry},Typed?,Yes",
+            f"Languages,{self.expiry},Open question,",
+            f"Empty,{self.expiry},,",
+        ]
+        upload = SimpleUploadedFile('polls.csv', "\n".join(rows).encode('utf-8-sig'), content_type='text/csv')
+        response = self.client.post('/api/polls/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+
+        poll = Poll.objects.get(title="Languages")
+        questions = {question.text: list(question.choices.values_list('text', flat=True))
+                     for question in poll.questions.all()}
+        self.assertEqual(questions, {"Which one?": ["Python", "Go"], "Typed?": ["Yes"], "Open question": []})
+        self.assertFalse(Poll.objects.get(title="Empty").questions.exists())
+
+    def test_import_validates_every_poll_first(self):
+        expired = dict(self.survey("Old", 1, 1), expiry=(timezone.now() - timedelta(days=1)).isoformat())
+        response = self.client.post('/api/polls/import/', [self.survey("New", 1, 1), expired], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[1]['expiry'], ["Expiry date must be in the future."])
+        self.assertFalse(Poll.objects.exists())
+
+        bad = SimpleUploadedFile('polls.csv', b"title,question\nA,B", content_type='text/csv')
+        response = self.client.post('/api/polls/import/', {'file': bad}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Missing CSV columns', str(response.data['file']))
+
+        self.assertEqual(self.client.post('/api/polls/import/', [], format='json').status_code, 400)
+        self.assertEqual(APIClient().post('/api/polls/import/', [], format='json').status_code, 401)
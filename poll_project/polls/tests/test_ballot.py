@@ -0,0 +1,107 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from polls import views
+from polls.dedup import might_have_voted, reset_voter_filter
+from polls.models import Poll, Question, Choice, Vote, User
+
+
+class BallotTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='pass1234')
+        self.poll = Poll.objects.create(
+            title="Developer Survey",
+            user=self.user,
+            expiry=timezone.now() + timedelta(days=1)
+        )
+        self.questions = []
+        for i in range(3):
+            question = Question.objects.create(text=f"Question {i}", poll=self.poll)
+            Choice.objects.create(text="Yes", question=question)
+            Choice.objects.create(text="No", question=question)
+            self.questions.append(question)
+        self.url = reverse('poll-ballot', args=[self.poll.id])
+        self.client = APIClient()
+        reset_voter_filter()
+        self.addCleanup(reset_voter_filter)
+
+    def ballot(self, questions):
+        return {str(q.id): q.choices.order_by('id').first().id for q in questions}
+
+    def post(self, selections, ip='127.0.0.1'):
+        return self.client.post(self.url, {'selections': selections}, REMOTE_ADDR=ip, format='json')
+
+    def test_whole_ballot_recorded(self):
+        response = self.post(self.ballot(self.questions))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([o['status'] for o in response.data['outcomes']], ["recorded"] * 3)
+        self.assertEqual(Vote.objects.count(), 3)
+        self.poll.refresh_from_db()
+        self.assertEqual(self.poll.vote_count, 3)
+
+    def test_per_question_outcomes(self):
+        first, second, third = self.questions
+        Vote.objects.create(question=first, choice=first.choices.first(), ip_address='127.0.0.1')
+        selections = self.ballot([first, second])
+        selections[str(third.id)] = first.choices.first().id  # choice of another question
+
+        response = self.post(selections)
+        self.assertEqual(response.status_code, 201)
+        outcomes = {o['question']: o['status'] for o in response.data['outcomes']}
+        self.assertEqual(outcomes, {
+            first.id: "already_voted",
+            second.id: "recorded",
+            third.id: "invalid_choice",
+        })
+
+        # The session now blocks the recorded question even from another IP
+        response = self.post(self.ballot([second]), ip='10.0.0.1')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['outcomes'][0]['status'], "already_voted")
+
+    def test_query_count_does_not_grow_with_questions(self):
+        small_ballot, large_ballot = self.ballot(self.questions[:1]), self.ballot(self.questions)
+        # Voter filters are built once per question and process, outside of this measure
+        for question in self.questions:
+            might_have_voted(question.id, '127.0.0.1')
+        with CaptureQueriesContext(connection) as small:
+            self.post(small_ballot, ip='10.0.0.1')
+        self.client = APIClient()
+        with CaptureQueriesContext(connection) as large:
+            self.post(large_ballot, ip='10.0.0.2')
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_expired_poll(self):
+        self.poll.expiry = timezone.now() - timedelta(days=1)
+        self.poll.save()
+        response = self.post(self.ballot(self.questions))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("This poll has expired", response.data['error'])
+
+    def test_invalid_payload(self):
+        response = self.post({'abc': 1})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Vote.objects.count(), 0)
+
+    def test_out_of_range_ids(self):
+        question = self.questions[0]
+        for selections in ({"99999999999999999999": 1}, {"0": 1}, {str(question.id): 10 ** 20}):
+            response = self.post(selections)
+            self.assertEqual(response.status_code, 400, selections)
+        self.assertEqual(Vote.objects.count(), 0)
+
+    def test_duplicate_check_skips_invalid_questions(self):
+        first = self.questions[0]
+        selections = {str(question_id): 1 for question_id in range(10 ** 6, 10 ** 6 + 50)}
+        selections.update(self.ballot([first]))
+        with mock.patch.object(views, 'might_have_voted', return_value=True) as check:
+            response = self.post(selections)
+        self.assertEqual(response.status_code, 201)
+        check.assert_called_once_with(first.id, '127.0.0.1')
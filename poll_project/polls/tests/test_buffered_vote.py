@@ -0,0 +1,116 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from polls import ingest
+from polls.ingest import buffer_vote, flush_vote_buffer
+from polls.models import Poll, Question, Choice, Vote, BufferedVote, User
+
+
+@override_settings(
+    POLLS_VOTE_BUFFERING=True,
+    POLLS_VOTE_BUFFER_BATCH_SIZE=3,
+    POLLS_VOTE_BUFFER_FLUSH_INTERVAL=3600,
+)
+class BufferedVoteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        flush_vote_buffer()
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='pass1234')
+        self.poll = Poll.objects.create(
+            title="Favorite Programming Language?",
+            user=self.user,
+            expiry=timezone.now() + timedelta(days=1)
+        )
+        self.question = Question.objects.create(text="What's your favorite language?", poll=self.poll)
+        self.choice1 = Choice.objects.create(text="Python", question=self.question)
+        self.choice2 = Choice.objects.create(text="JavaScript", question=self.question)
+        self.vote_url = f"/api/questions/{self.question.id}/vote/"
+
+    def vote(self, choice, ip):
+        return APIClient().post(self.vote_url, {'choice': choice.id}, REMOTE_ADDR=ip, format='json')
+
+    def test_vote_is_buffered_with_receipt(self):
+        response = self.vote(self.choice1, '10.0.0.1')
+        self.assertEqual(response.status_code, 202)
+        receipt = response.data['receipt']
+        self.assertTrue(BufferedVote.objects.filter(receipt=receipt).exists())
+        self.assertEqual(Vote.objects.count(), 0)
+
+        call_command('flush_vote_buffer', stdout=StringIO())
+        self.assertEqual(Vote.objects.count(), 1)
+        self.assertEqual(BufferedVote.objects.count(), 0)
+        self.choice1.refresh_from_db()
+        self.assertEqual(self.choice1.vote_count, 1)
+
+    def test_duplicate_ip_rejected_without_database(self):
+        self.vote(self.choice1, '10.0.0.1')
+        response = self.vote(self.choice2, '10.0.0.1')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("You have already voted from this IP", response.data['error'])
+        self.assertEqual(BufferedVote.objects.count(), 1)
+
+    def test_invalid_choice_rejected(self):
+        other = Question.objects.create(text="Other?", poll=self.poll).choices.create(text="X")
+        response = self.vote(other, '10.0.0.1')
+        self.assertEqual(response.status_code, 404)
+
+    def test_batch_size_triggers_flush(self):
+        for i in range(3):
+            self.assertEqual(self.vote(self.choice1, f'10.0.0.{i}').status_code, 202)
+        self.assertEqual(BufferedVote.objects.count(), 0)
+        self.assertEqual(Vote.objects.count(), 3)
+
+    def test_failed_inline_flush_still_accepts_vote(self):
+        self.vote(self.choice1, '10.0.0.1')
+        self.vote(self.choice1, '10.0.0.2')
+        with mock.patch.object(Vote.objects, 'bulk_create', side_effect=RuntimeError("database went away")), \
+                self.assertLogs('polls.ingest', 'ERROR'):
+            response = self.vote(self.choice2, '10.0.0.3')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(BufferedVote.objects.count(), 3)
+
+        self.assertEqual(flush_vote_buffer(), 3)
+        self.assertEqual(Vote.objects.count(), 3)
+
+    def test_flush_never_double_counts(self):
+        Vote.objects.create(question=self.question, choice=self.choice1, ip_address='10.0.0.1')
+        # Dedup markers were lost (e.g. cache restart), so the duplicate reaches the buffer
+        buffer_vote(self.question.id, self.choice2.id, ip_address='10.0.0.1')
+        buffer_vote(self.question.id, self.choice2.id, ip_address='10.0.0.2')
+
+        self.assertEqual(flush_vote_buffer(), 1)
+        self.assertEqual(flush_vote_buffer(), 0)
+        self.assertEqual(Vote.objects.count(), 2)
+        self.choice2.refresh_from_db()
+        self.assertEqual(self.choice2.vote_count, 1)
+
+    def test_dedup_markers_expire_with_the_poll(self):
+        with mock.patch.object(cache, 'add', wraps=cache.add) as add:
+            self.vote(self.choice1, '10.0.0.1')
+        timeout = add.call_args.kwargs['timeout']
+        self.assertLessEqual(timeout, 24 * 60 * 60)
+        self.assertGreater(timeout, 24 * 60 * 60 - 60)
+
+    def test_flush_skips_votes_inserted_after_the_check(self):
+        buffer_vote(self.question.id, self.choice2.id, ip_address='10.0.0.1')
+        buffer_vote(self.question.id, self.choice2.id, ip_address='10.0.0.2')
+        drop_duplicates = ingest._drop_duplicates
+
+        def concurrent_vote(pending):
+            votes = drop_duplicates(pending)
+            Vote.objects.create(question=self.question, choice=self.choice1, ip_address='10.0.0.1')
+            return votes
+
+        with mock.patch.object(ingest, '_drop_duplicates', side_effect=concurrent_vote):
+            self.assertEqual(flush_vote_buffer(), 1)
+        self.assertEqual(BufferedVote.objects.count(), 0)
+        self.assertEqual(Vote.objects.count(), 2)
+        self.choice2.refresh_from_db()
+        self.assertEqual(self.choice2.vote_count, 1)
@@ -0,0 +1,103 @@
+from io import StringIO
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from polls.closing import close_expired_polls, seconds_until_next_closing
+from polls.models import User, Poll, PollSnapshot, Question, Choice, Vote, BufferedVote
+
+
+class PollClosingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='owner', email='owner@example.com', password='pass1234')
+        self.now = timezone.now()
+        self.poll = Poll.objects.create(title="Expired", user=self.user, expiry=self.now - timedelta(minutes=5))
+        self.question = Question.objects.create(text="Which?", poll=self.poll)
+        self.choice1 = Choice.objects.create(text="A", question=self.question)
+        self.choice2 = Choice.objects.create(text="B", question=self.question)
+        Vote.objects.bulk_create([
+            Vote(question=self.question, choice=self.choice2, ip_address=f'1.1.1.{i}') for i in range(2)
+        ])
+        self.open_poll = Poll.objects.create(title="Open", user=self.user, expiry=self.now + timedelta(hours=1))
+
+    def results(self):
+        return self.client.get(f"/api/polls/{self.poll.id}/results/")
+
+    def test_expired_polls_are_snapshotted_and_closed(self):
+        expected = self.results().data
+
+        self.assertEqual(close_expired_polls(grace_seconds=30), 1)
+        self.poll.refresh_from_db()
+        self.open_poll.refresh_from_db()
+        self.assertTrue(self.poll.is_closed)
+        self.assertFalse(self.open_poll.is_closed)
+        self.assertEqual(PollSnapshot.objects.get(poll=self.poll).payload, expected)
+
+        # Closed polls are not picked up again
+        self.assertEqual(close_expired_polls(grace_seconds=30), 0)
+
+    def test_grace_period_and_buffered_votes_hold_closing_back(self):
+        self.assertEqual(close_expired_polls(grace_seconds=600), 0)
+
+        BufferedVote.objects.create(receipt='6f1c1f0c-32a4-4c55-9a3b-2f0e3a1d2a6b', question=self.question,
+                                    choice=self.choice1, ip_address='2.2.2.2')
+        self.assertEqual(close_expired_polls(grace_seconds=0), 0)
+        BufferedVote.objects.all().delete()
+        self.assertEqual(close_expired_polls(grace_seconds=0), 1)
+
+    def test_results_of_closed_polls_come_from_the_snapshot(self):
+        close_expired_polls(grace_seconds=0)
+        # Counter drift after closing does not reach the frozen results
+        Choice.objects.filter(pk=self.choice1.pk).update(vote_count=10)
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.results()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['winner'], {"choice": "B", "votes": 2})
+        self.assertFalse([query for query in queries if 'polls_choice' in query['sql']])
+        self.assertIn('ETag', response)
+
+    def test_votes_on_closed_polls_are_refused_without_vote_queries(self):
+        close_expired_polls(grace_seconds=0)
+        # Extending the expiry does not reopen a closed poll
+        self.poll.expiry = self.now + timedelta(days=1)
+        self.poll.save()
+        self.poll.refresh_from_db()
+        self.assertTrue(self.poll.is_closed)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                f"/api/questions/{self.question.id}/vote/", {'choice': self.choice1.id},
+                REMOTE_ADDR='3.3.3.3', format='json'
+            )
+            ballot = self.client.post(
+                f"/api/polls/{self.poll.id}/ballot/", {'selections': {str(self.question.id): self.choice1.id}},
+                REMOTE_ADDR='3.3.3.3', format='json'
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(ballot.status_code, 400)
+        self.assertFalse([query for query in queries if 'polls_vote' in query['sql']])
+
+    def test_snapshots_are_immutable(self):
+        close_expired_polls(grace_seconds=0)
+        snapshot = PollSnapshot.objects.get(poll=self.poll)
+        snapshot.payload = {}
+        with self.assertRaises(ValueError):
+            snapshot.save()
+
+    def test_command_and_next_closing(self):
+        out = StringIO()
+        call_command('close_expired_polls', '--grace', '0', stdout=out)
+        self.assertIn("Closed 1 polls", out.getvalue())
+        self.assertAlmostEqual(seconds_until_next_closing(grace_seconds=30, now=self.now), 3630)
+        Poll.objects.filter(pk=self.open_poll.pk).update(closed_at=self.now)
+        self.assertIsNone(seconds_until_next_closing(now=self.now))
@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from polls.models import User, Poll, Question, Choice, Vote
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='owner', email='owner@example.com', password='pass1234')
+        self.poll = Poll.objects.create(title="Poll", user=self.user, expiry=timezone.now() + timedelta(days=1))
+        self.question = Question.objects.create(text="Which?", poll=self.poll)
+        self.choice = Choice.objects.create(text="A", question=self.question)
+        self.detail_url = reverse('poll-detail', args=[self.poll.pk])
+        self.results_url = reverse('poll-results', args=[self.poll.pk])
+
+    def version(self):
+        return Poll.objects.get(pk=self.poll.pk).version
+
+    def test_version_bumps_on_changes(self):
+        version = self.version()
+        Choice.objects.create(text="B", question=self.question)
+        self.assertGreater(self.version(), version)
+
+        version = self.version()
+        Vote.objects.create(question=self.question, choice=self.choice, ip_address='1.1.1.1')
+        self.assertGreater(self.version(), version)
+
+        # Saving a stale instance keeps the version moving forward
+        version = self.version()
+        self.poll.title = "Renamed"
+        self.poll.save()
+        self.assertGreater(self.version(), version)
+
+        version = self.version()
+        self.question.delete()
+        self.assertGreater(self.version(), version)
+
+    def test_cascade_delete_queries_do_not_grow_with_choices(self):
+        def delete_poll(choices):
+            poll = Poll.objects.create(title="Cascade", expiry=timezone.now() + timedelta(days=1), user=self.user)
+            for i in range(2):
+                question = Question.objects.create(text=f"Q{i}?", poll=poll)
+                Choice.objects.bulk_create(Choice(text=f"C{j}", question=question) for j in range(choices))
+            with CaptureQueriesContext(connection) as queries:
+                poll.delete()
+            return len(queries)
+
+        self.assertEqual(delete_poll(2), delete_poll(20))
+
+    def test_poll_detail_not_modified(self):
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        # One primary key lookup, no serialization queries
+        with self.assertNumQueries(1):
+            response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        Question.objects.create(text="Another?", poll=self.poll)
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.data['questions']), 2)
+
+    def test_results_not_modified_until_vote(self):
+        response = self.client.get(self.results_url)
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.results_url, HTTP_IF_NONE_MATCH=f'W/{etag}, "other"')
+        self.assertEqual(response.status_code, 304)
+
+        Vote.objects.create(question=self.question, choice=self.choice, ip_address='1.1.1.1')
+        response = self.client.get(self.results_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['results'][0]['winner']['votes'], 1)
+
+    def test_async_results_not_modified(self):
+        url = reverse('poll-results-async', args=[self.poll.pk])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(etag, self.client.get(self.results_url)['ETag'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_missing_poll(self):
+        url = reverse('poll-results', args=[self.poll.pk + 100])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code, 404)
+        url = reverse('poll-detail', args=[self.poll.pk + 100])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code, 404)
@@ -0,0 +1,135 @@
+from io import StringIO
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from polls.models import Poll, Question, Choice, Vote, User
+
+
+class VoteCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='pass1234')
+        self.poll = Poll.objects.create(
+            title="Favorite Editor?",
+            user=self.user,
+            expiry=timezone.now() + timedelta(days=1)
+        )
+        self.question = Question.objects.create(text="Which editor?", poll=self.poll)
+        self.choice1 = Choice.objects.create(text="Vim", question=self.question)
+        self.choice2 = Choice.objects.create(text="Emacs", question=self.question)
+        self.client = APIClient()
+
+    def assertCounts(self, choice1, choice2):
+        self.choice1.refresh_from_db()
+        self.choice2.refresh_from_db()
+        self.question.refresh_from_db()
+        self.poll.refresh_from_db()
+        self.assertEqual(self.choice1.vote_count, choice1)
+        self.assertEqual(self.choice2.vote_count, choice2)
+        self.assertEqual(self.question.vote_count, choice1 + choice2)
+        self.assertEqual(self.poll.vote_count, choice1 + choice2)
+
+    def test_vote_endpoint_updates_counters(self):
+        response = self.client.post(
+            f"/api/questions/{self.question.id}/vote/",
+            {'choice': self.choice1.id},
+            REMOTE_ADDR='127.0.0.1',
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertCounts(1, 0)
+
+    def test_bulk_create_updates_counters(self):
+        Vote.objects.bulk_create([
+            Vote(question=self.question, choice=self.choice1, ip_address='1.1.1.1'),
+            Vote(question=self.question, choice=self.choice1, ip_address='1.1.1.2'),
+            Vote(question=self.question, choice=self.choice2, ip_address='1.1.1.3'),
+        ])
+        self.assertCounts(2, 1)
+
+    def test_editing_choice_keeps_counter(self):
+        Vote.objects.create(question=self.question, choice=self.choice1, ip_address='1.1.1.1')
+        stale = Choice.objects.get(pk=self.choice1.pk)
+        Vote.objects.create(question=self.question, choice=self.choice1, ip_address='1.1.1.2')
+
+        stale.text = "Neovim"
+        stale.save()
+        self.assertCounts(2, 0)
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        Vote.objects.create(question=self.question, choice=self.choice1, ip_address='1.1.1.1')
+        Choice.objects.filter(pk=self.choice2.pk).update(vote_count=5)
+        Poll.objects.filter(pk=self.poll.pk).update(vote_count=0)
+
+        out = StringIO()
+        call_command('reconcile_vote_counts', '--dry-run', stdout=out)
+        self.assertIn("Choices: 1 of 2 drifted (net drift -5)", out.getvalue())
+        self.assertIn("Polls: 1 of 1 drifted (net drift +1)", out.getvalue())
+        self.choice2.refresh_from_db()
+        self.assertEqual(self.choice2.vote_count, 5)
+
+        call_command('reconcile_vote_counts', stdout=StringIO())
+        self.assertCounts(1, 0)
+
+    def test_reconcile_invalidates_cached_results(self):
+        cache.clear()
+        Vote.objects.create(question=self.question, choice=self.choice1, ip_address='1.1.1.1')
+        # Drift that bypasses the signals, read into the results cache
+        Choice.objects.filter(pk=self.choice2.pk).update(vote_count=5)
+        results_url = f"/api/polls/{self.poll.id}/results/"
+        self.assertEqual(self.client.get(results_url).data['results'][0]['winner'], {"choice": "Emacs", "votes": 5})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('reconcile_vote_counts', stdout=StringIO())
+        self.assertEqual(self.client.get(results_url).data['results'][0]['winner'], {"choice": "Vim", "votes": 1})
+
+    def test_deleting_votes_updates_counters(self):
+        vote = Vote.objects.create(question=self.question, choice=self.choice1, ip_address='1.1.1.1')
+        Vote.objects.create(question=self.question, choice=self.choice1, ip_address='1.1.1.2')
+        Vote.objects.create(question=self.question, choice=self.choice2, ip_address='1.1.1.3')
+
+        vote.delete()
+        self.assertCounts(1, 1)
+        Vote.objects.filter(choice=self.choice2).delete()
+        self.assertCounts(1, 0)
+
+    def test_deleting_vote_invalidates_cached_results(self):
+        cache.clear()
+        vote = Vote.objects.create(question=self.question, choice=self.choice1, ip_address='1.1.1.1')
+        results_url = f"/api/polls/{self.poll.id}/results/"
+        self.assertEqual(self.client.get(results_url).data['results'][0]['winner'], {"choice": "Vim", "votes": 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            vote.delete()
+        self.assertEqual(self.client.get(results_url).data['results'][0]['winner'], {"choice": "Vim", "votes": 0})
+
+    def test_deleting_choice_updates_parent_counters(self):
+        Vote.objects.create(question=self.question, choice=self.choice1, ip_address='1.1.1.1')
+        Vote.objects.create(question=self.question, choice=self.choice2, ip_address='1.1.1.2')
+
+        Choice.objects.get(pk=self.choice1.pk).delete()
+        self.question.refresh_from_db()
+        self.poll.refresh_from_db()
+        self.assertEqual((self.question.vote_count, self.poll.vote_count), (1, 1))
+
+    def test_deleting_question_updates_poll_counter(self):
+        other = Question.objects.create(text="Which shell?", poll=self.poll)
+        bash = Choice.objects.create(text="Bash", question=other)
+        Vote.objects.create(question=self.question, choice=self.choice1, ip_address='1.1.1.1')
+        Vote.objects.create(question=other, choice=bash, ip_address='1.1.1.1')
+
+        Question.objects.filter(pk=self.question.pk).delete()
+        self.poll.refresh_from_db()
+        self.assertEqual(self.poll.vote_count, 1)
+
+    def test_deleting_voter_updates_counters(self):
+        voter = User.objects.create_user(username='voter', email='voter@example.com', password='pass1234')
+        Vote.objects.create(question=self.question, choice=self.choice1, user=voter)
+        Vote.objects.create(question=self.question, choice=self.choice2, ip_address='1.1.1.1')
+
+        voter.delete()
+        self.assertCounts(0, 1)
@@ -0,0 +1,113 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from polls import dedup
+from polls.dedup import BloomFilter, get_voter_filter, might_have_voted, reset_voter_filter
+from polls.models import User, Poll, Question, Choice, Vote
+
+
+class BloomFilterTests(TestCase):
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        bloom = BloomFilter(1000, 0.01)
+        added = [f"10.0.{i // 250}.{i % 250}" for i in range(1000)]
+        for key in added:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in added))
+
+        false_positives = sum(f"192.168.{i // 250}.{i % 250}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class VoterFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_voter_filter()
+        self.addCleanup(reset_voter_filter)
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='pass1234')
+        self.poll = Poll.objects.create(title="Poll", user=self.user, expiry=timezone.now() + timedelta(days=1))
+        self.question = Question.objects.create(text="Which?", poll=self.poll)
+        self.choice = Choice.objects.create(text="A", question=self.question)
+        Vote.objects.create(question=self.question, choice=self.choice, ip_address='1.1.1.1')
+        self.vote_url = f"/api/questions/{self.question.id}/vote/"
+
+    def vote(self, ip_address):
+        return Client().post(
+            self.vote_url, {'choice': self.choice.id}, REMOTE_ADDR=ip_address, content_type='application/json'
+        )
+
+    def duplicate_checks(self, ip_address):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.vote(ip_address)
+        self.assertEqual(response.status_code, 201)
+        return sum('"polls_vote"."ip_address" =' in query['sql'] for query in queries.captured_queries)
+
+    def test_filter_is_built_from_existing_votes(self):
+        for kind in ('local', 'cache'):
+            with self.subTest(kind=kind), self.settings(POLLS_VOTE_FILTER=kind):
+                self.assertTrue(might_have_voted(self.question.id, '1.1.1.1'))
+                self.assertFalse(might_have_voted(self.question.id, '2.2.2.2'))
+
+    def test_local_filters_are_bounded(self):
+        other = Question.objects.create(text="Other?", poll=self.poll)
+        with self.settings(POLLS_VOTE_FILTER='local', POLLS_VOTE_FILTER_MAX_FILTERS=1):
+            might_have_voted(self.question.id, '0.0.0.0')
+            might_have_voted(other.id, '0.0.0.0')
+            self.assertEqual(list(get_voter_filter()._filters), [other.id])
+            # The evicted filter is rebuilt from Vote
+            self.assertTrue(might_have_voted(self.question.id, '1.1.1.1'))
+
+    def test_local_filter_scans_votes_outside_the_lock(self):
+        with self.settings(POLLS_VOTE_FILTER='local'):
+            voter_filter = get_voter_filter()
+
+            def voter_ips(question_id):
+                self.assertFalse(voter_filter._lock.locked())
+                return iter(['1.1.1.1'])
+
+            with mock.patch.object(dedup, '_voter_ips', side_effect=voter_ips) as scan:
+                self.assertTrue(might_have_voted(self.question.id, '1.1.1.1'))
+            scan.assert_called_once_with(self.question.id)
+
+    def test_cache_filter_is_one_value_and_survives_eviction(self):
+        with self.settings(POLLS_VOTE_FILTER='cache'):
+            self.assertEqual(self.vote('7.7.7.7').status_code, 201)
+            self.assertTrue(might_have_voted(self.question.id, '7.7.7.7'))
+            self.assertEqual(len([key for key in cache._cache if ':polls:voters:' in key]), 1)
+
+            cache.clear()
+            self.assertTrue(might_have_voted(self.question.id, '1.1.1.1'))
+            self.assertTrue(might_have_voted(self.question.id, '7.7.7.7'))
+
+    def test_first_time_voter_skips_duplicate_query(self):
+        for kind, ip_address in (('local', '3.3.3.1'), ('cache', '3.3.3.2')):
+            with self.subTest(kind=kind), self.settings(POLLS_VOTE_FILTER=kind):
+                might_have_voted(self.question.id, '0.0.0.0')  # Build the filter
+                self.assertEqual(self.duplicate_checks(ip_address), 0)
+
+        with self.settings(POLLS_VOTE_FILTER='off'):
+            self.assertEqual(self.duplicate_checks('4.4.4.4'), 1)
+
+    def test_recorded_voter_is_rejected(self):
+        self.assertEqual(self.vote('5.5.5.5').status_code, 201)
+        self.assertTrue(might_have_voted(self.question.id, '5.5.5.5'))
+        response = self.vote('5.5.5.5')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], "You have already voted from this IP.")
+
+    def test_vote_unknown_to_filter_is_caught_by_constraint(self):
+        might_have_voted(self.question.id, '0.0.0.0')  # Build the filter
+        # Recorded by another process, so this process's filter has not seen it
+        Vote.objects.create(question=self.question, choice=self.choice, ip_address='6.6.6.6')
+        self.assertFalse(might_have_voted(self.question.id, '6.6.6.6'))
+
+        response = self.vote('6.6.6.6')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], "You have already voted from this IP.")
+        self.choice.refresh_from_db()
+        self.assertEqual(self.choice.vote_count, 2)
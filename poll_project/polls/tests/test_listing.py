@@ -0,0 +1,81 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from polls.models import Poll, User
+from datetime import timedelta
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+
+
+class PollListingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.expiry = timezone.now() + timedelta(days=1)
+
+    def make_polls(self, count, questions=2, choices=3):
+        for i in range(count):
+            n = Poll.objects.count()
+            user = User.objects.create_user(username=f'owner{n}', email=f'owner{n}@example.com', password='testpass')
+            poll = Poll.objects.create(title=f"Poll {i}", expiry=self.expiry, user=user)
+            for j in range(questions):
+                question = poll.questions.create(text=f"Question {j}")
+                for k in range(choices):
+                    question.choices.create(text=f"Option {k}")
+
+    def test_poll_list_query_count_is_constant(self):
+        url = reverse('poll-list')
+        self.make_polls(1)
+        # Polls with their owners, questions, choices
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), 1)
+
+        # More polls, questions and choices on the page must not add queries
+        self.make_polls(10, questions=4, choices=5)
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), 11)
+        self.assertEqual(len(response.data['results'][0]['questions']), 4)
+        self.assertEqual(len(response.data['results'][0]['questions'][0]['choices']), 5)
+
+    def test_question_list_query_count_is_constant(self):
+        url = reverse('question-list')
+        self.make_polls(1)
+        with self.assertNumQueries(2):
+            self.client.get(url)
+
+        self.make_polls(5, questions=3, choices=6)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), 17)
+
+    @override_settings(POLLS_PAGE_SIZE=3)
+    def test_cursor_walks_every_poll_once(self):
+        self.make_polls(8, questions=0)
+        # Polls created in the same instant are ordered by id
+        Poll.objects.filter(id__in=list(Poll.objects.values_list('id', flat=True))[:4]).update(
+            created_at=timezone.now()
+        )
+        expected = list(Poll.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+        seen = []
+        url = reverse('poll-list')
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 3)
+            seen.extend(poll['id'] for poll in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(seen, expected)
+
+    def test_page_size_is_capped(self):
+        self.make_polls(3, questions=0)
+        with self.settings(POLLS_MAX_PAGE_SIZE=2):
+            response = self.client.get(reverse('poll-list'), {'page_size': 50})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('choice-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,98 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from polls import metrics
+from polls.models import User, Poll, Question, Choice
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.registry.reset()
+        self.user = User.objects.create_user(username='owner', email='owner@example.com', password='pass1234')
+        self.poll = Poll.objects.create(title="Poll", user=self.user, expiry=timezone.now() + timedelta(days=1))
+        self.question = Question.objects.create(text="Which?", poll=self.poll)
+        self.choice = Choice.objects.create(text="A", question=self.question)
+
+    def scrape(self, **extra):
+        response = self.client.get('/metrics', **extra)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def vote(self):
+        return self.client.post(
+            f"/api/questions/{self.question.id}/vote/", {'choice': self.choice.id},
+            REMOTE_ADDR='1.1.1.1', content_type='application/json'
+        )
+
+    def test_request_and_hot_path_metrics(self):
+        self.assertEqual(self.vote().status_code, 201)
+        results_url = reverse('poll-results', args=[self.poll.pk])
+        self.client.get(results_url)
+        self.client.get(results_url)
+
+        text = self.scrape()
+        self.assertIn('polls_http_requests_total{view="vote",method="POST",status="201"} 1', text)
+        self.assertIn('polls_http_requests_total{view="poll-results",method="GET",status="200"} 2', text)
+        self.assertIn('polls_http_request_duration_seconds_count{view="poll-results",method="GET"} 2', text)
+        self.assertIn('polls_http_request_duration_seconds_bucket{view="vote",method="POST",le="+Inf"} 1', text)
+        self.assertIn('polls_results_cache_total{outcome="misses"} 1', text)
+        self.assertIn('polls_results_cache_total{outcome="hits"} 1', text)
+        self.assertIn('polls_votes_recorded_total 1', text)
+        self.assertIn('# TYPE polls_db_queries_per_request histogram', text)
+
+        # A cached results request runs no queries
+        self.assertIn('polls_db_queries_per_request_bucket{view="poll-results",le="0"} 1', text)
+
+    def test_processes_are_summed(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        # Snapshot left by another worker process
+        other = metrics.Registry()
+        other.inc('polls_votes_recorded_total', amount=5)
+        other.observe('polls_http_request_duration_seconds', 0.2, ('vote', 'POST'))
+        with open(os.path.join(directory, 'metrics-999999.json'), 'w') as output:
+            json.dump(other.snapshot(), output)
+
+        with override_settings(POLLS_METRICS_DIR=directory):
+            self.vote()
+            text = self.scrape()
+        self.assertIn('polls_votes_recorded_total 6', text)
+        self.assertIn('polls_http_request_duration_seconds_count{view="vote",method="POST"} 2', text)
+        self.assertIn('polls_http_request_duration_seconds_bucket{view="vote",method="POST",le="0.25"} 2', text)
+        self.assertTrue(os.path.exists(os.path.join(directory, f'metrics-{os.getpid()}.json')))
+
+    def test_exited_processes_are_retired(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with override_settings(POLLS_METRICS_DIR=directory):
+            for pid, votes in ((999998, 2), (999999, 3)):
+                worker = metrics.Registry()
+                worker.inc('polls_votes_recorded_total', amount=votes)
+                worker.observe('polls_http_request_duration_seconds', 0.2, ('vote', 'POST'))
+                with open(os.path.join(directory, f'metrics-{pid}.json'), 'w') as output:
+                    json.dump(worker.snapshot(), output)
+                metrics.retire_process(pid)
+
+            text = self.scrape()
+        self.assertIn('polls_votes_recorded_total 5', text)
+        self.assertIn('polls_http_request_duration_seconds_count{view="vote",method="POST"} 2', text)
+        self.assertEqual(sorted(os.listdir(directory)), sorted(['metrics-retired.json', f'metrics-{os.getpid()}.json']))
+
+    @override_settings(POLLS_METRICS_TOKEN='secret')
+    def test_token_required(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.scrape(HTTP_AUTHORIZATION='Bearer secret')
+
+    @override_settings(POLLS_METRICS_ENABLED=False)
+    def test_disabled(self):
+        self.vote()
+        self.assertNotIn('polls_http_requests_total{', self.scrape())
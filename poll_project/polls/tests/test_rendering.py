@@ -0,0 +1,89 @@
+import datetime
+import decimal
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework import serializers
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict
+
+from polls import renderers
+from polls.models import User, Poll, Question, Choice
+from polls.renderers import FastJSONRenderer
+from polls.serializers import PollSerializer, QuestionSerializer, ChoiceSerializer
+
+
+class FastJSONRendererTests(TestCase):
+    def assertSameBytes(self, data, accepted_media_type=None):
+        expected = JSONRenderer().render(data, accepted_media_type)
+        self.assertEqual(FastJSONRenderer().render(data, accepted_media_type), expected)
+
+    def test_matches_json_renderer(self):
+        self.assertSameBytes({
+            "text": "naïve ☃ 😀 \u2028 \u2029 \x00\x1f\x7f \"quoted\" back\\slash </script>\n\t",
+            "ints": [0, -1, 2 ** 63 - 1, 2 ** 70],
+            "floats": [0.1, 100.0, 1e15, 1e16, 1e-5, 0.0001, -2.5e-7, 1 / 3],
+            "decimal": decimal.Decimal('12.50'),
+            "datetime": datetime.datetime(2025, 8, 9, 16, 0, 0, 123456, tzinfo=datetime.timezone.utc),
+            "date": datetime.date(2025, 8, 9),
+            "uuid": uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            "lazy": gettext_lazy("Poll not found."),
+            "error": [ErrorDetail("Invalid.", code='invalid')],
+            "keys": {1: "int", None: "none"},
+            "nested": ReturnDict({"tuple": (1, 2), "empty": {}, "null": None, "bool": True}, serializer=None),
+        })
+        self.assertSameBytes([])
+        self.assertSameBytes("plain")
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_indented_output(self):
+        self.assertSameBytes({"a": [1, {"b": "c"}]}, 'application/json; indent=4')
+
+    def test_without_orjson(self):
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertSameBytes({"a": "b\u2028"})
+
+
+class FlatSerializerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='ownér', email='owner@example.com', password='pass1234')
+        for i in range(3):
+            poll = Poll.objects.create(
+                title=f"Poll {i} ☃ \u2028", user=self.user, expiry=timezone.now() + timedelta(days=1, microseconds=i),
+            )
+            for j in range(3):
+                question = Question.objects.create(text=f"Q{j} \"quoted\"", poll=poll)
+                for k in range(3):
+                    Choice.objects.create(text=f"Choice {k} 😀", question=question)
+        Question.objects.create(text="No choices", poll=poll)
+        self.poll = poll
+
+    def reflective_bytes(self, data_factory):
+        original = serializers.ModelSerializer.to_representation
+        with mock.patch.object(PollSerializer, 'to_representation', original), \
+                mock.patch.object(QuestionSerializer, 'to_representation', original), \
+                mock.patch.object(ChoiceSerializer, 'to_representation', original):
+            return JSONRenderer().render(data_factory())
+
+    def test_list_and_detail_bytes_unchanged(self):
+        response = self.client.get('/api/polls/')
+        self.assertEqual(response.status_code, 200)
+        polls = Poll.objects.order_by('-created_at', '-id')
+        expected = self.reflective_bytes(lambda: {"next": None, "results": PollSerializer(polls, many=True).data})
+        self.assertEqual(response.content, expected)
+
+        response = self.client.get(f'/api/polls/{self.poll.pk}/')
+        self.assertEqual(response.content, self.reflective_bytes(lambda: PollSerializer(self.poll).data))
+
+        question = self.poll.questions.first()
+        response = self.client.get(f'/api/questions/{question.pk}/')
+        self.assertEqual(response.content, self.reflective_bytes(lambda: QuestionSerializer(question).data))
+
+    def test_results_bytes_unchanged(self):
+        response = self.client.get(f'/api/polls/{self.poll.pk}/results/')
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
@@ -41,3 +41,28 @@ class PollResultTests(TestCase):
         self.assertEqual(result['question'], self.question.text)
         self.assertEqual(result['winner']['choice'], self.choice1.text)
         self.assertEqual(result['winner']['votes'], 2)
+
+    def test_poll_results_query_count_is_constant(self):
+        url = reverse('poll-results', args=[self.poll.id])
+        with self.assertNumQueries(2):
+            self.client.get(url)
+
+        # More questions, choices and votes must not add queries
+        for i in range(5):
+            question = self.poll.questions.create(text=f"Question {i}")
+            choices = [question.choices.create(text=f"Option {j}") for j in range(3)]
+            Vote.objects.bulk_create([
+                Vote(question=question, choice=choices[j % 3], ip_address=f'10.0.{i}.{j}')
+                for j in range(20)
+            ])
+        self.poll.questions.create(text="No choices yet")
+
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+
+        results = response.data['results']
+        self.assertEqual(len(results), 7)
+        self.assertEqual(results[1]['winner'], {"choice": "Option 0", "votes": 7})
+        self.assertEqual([c['votes'] for c in results[1]['choices']], [7, 7, 6])
+        self.assertEqual(results[-1]['choices'], [])
+        self.assertIsNone(results[-1]['winner'])
@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from polls.models import Poll, Vote, User
+from polls.results import get_poll_results, results_cache_stats
+
+
+class ResultsCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.poll = Poll.objects.create(
+            title="Election",
+            expiry=timezone.now() + timedelta(days=1),
+            user=self.user
+        )
+        self.question = self.poll.questions.create(text="Who should win?")
+        self.choice1 = self.question.choices.create(text="Candidate A")
+        self.choice2 = self.question.choices.create(text="Candidate B")
+        self.url = reverse('poll-results', args=[self.poll.id])
+        self.client = APIClient()
+
+    def votes_for(self, response):
+        return [choice['votes'] for choice in response.data['results'][0]['choices']]
+
+    def test_second_read_is_served_from_cache(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(results_cache_stats(), {'hits': 1, 'stale_hits': 0, 'misses': 1})
+
+    def test_vote_invalidates_results(self):
+        self.client.get(self.url)
+        self.client.post(
+            f"/api/questions/{self.question.id}/vote/",
+            {'choice': self.choice2.id},
+            REMOTE_ADDR='1.1.1.1',
+            format='json'
+        )
+        response = self.client.get(self.url)
+        self.assertEqual(self.votes_for(response), [1, 0])
+
+    def test_choice_change_through_viewset_invalidates_results(self):
+        self.client.get(self.url)
+        self.client.force_authenticate(user=self.user)
+        self.client.post('/api/choices/', {'text': "Candidate C", 'question': self.question.id})
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data['results'][0]['choices']), 3)
+
+    @override_settings(POLLS_RESULTS_STALE_SECONDS=60)
+    def test_hot_poll_served_stale_within_window(self):
+        self.client.get(self.url)
+        Vote.objects.create(question=self.question, choice=self.choice1, ip_address='1.1.1.1')
+        response = self.client.get(self.url)
+        self.assertEqual(self.votes_for(response), [0, 0])
+        self.assertEqual(results_cache_stats()['stale_hits'], 1)
+
+    def test_only_lock_holder_recomputes(self):
+        self.client.get(self.url)
+        Vote.objects.create(question=self.question, choice=self.choice1, ip_address='1.1.1.1')
+        cache.add(f"polls:results:{self.poll.id}:lock", True, 5)
+
+        # Another worker is recomputing: serve the previous entry without querying
+        with self.assertNumQueries(0):
+            payload = get_poll_results(self.poll.id)
+        self.assertEqual(payload['results'][0]['winner']['votes'], 0)
+
+    @override_settings(POLLS_RESULTS_LOCK_TIMEOUT=0.2)
+    def test_cold_miss_waits_for_lock_then_computes(self):
+        cache.add(f"polls:results:{self.poll.id}:lock", True, 5)
+        payload = get_poll_results(self.poll.id)
+        self.assertEqual(payload['poll'], "Election")
+
+    def test_missing_poll(self):
+        self.assertIsNone(get_poll_results(self.poll.id + 100))
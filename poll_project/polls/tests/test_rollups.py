@@ -0,0 +1,96 @@
+from io import StringIO
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from polls.models import User, Poll, Question, Choice, Vote, VoteRollup
+from polls.rollups import rollup_votes
+
+
+class VoteRollupTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='owner', email='owner@example.com', password='pass1234')
+        self.poll = Poll.objects.create(title="Poll", user=self.user, expiry=timezone.now() + timedelta(days=1))
+        self.question = Question.objects.create(text="Which?", poll=self.poll)
+        self.choice1 = Choice.objects.create(text="A", question=self.question)
+        self.choice2 = Choice.objects.create(text="B", question=self.question)
+
+        self.start = datetime(2025, 8, 9, 16, 0, tzinfo=dt_timezone.utc)
+        # Minutes after start for each vote: three 5-minute buckets for A, one for B
+        votes = [(self.choice1, 0), (self.choice1, 1), (self.choice1, 1), (self.choice1, 7), (self.choice1, 12),
+                 (self.choice2, 4)]
+        Vote.objects.bulk_create([
+            Vote(question=self.question, choice=choice, ip_address=f'1.1.1.{i}',
+                 voted_at=self.start + timedelta(minutes=minute, seconds=30),
+                 inserted_at=self.start + timedelta(minutes=minute, seconds=31))
+            for i, (choice, minute) in enumerate(votes)
+        ])
+        # Too recent to be counted yet
+        Vote.objects.create(question=self.question, choice=self.choice2, ip_address='2.2.2.2')
+
+    def timeseries(self, **params):
+        return self.client.get(reverse('poll-timeseries', args=[self.poll.pk]), params)
+
+    def test_rollup_resumes_from_high_water_mark(self):
+        self.assertEqual(rollup_votes(chunk_size=2), 6)
+        self.assertEqual(VoteRollup.objects.get(choice=self.choice1, bucket=self.start + timedelta(minutes=1)).count, 2)
+        self.assertEqual(sum(VoteRollup.objects.values_list('count', flat=True)), 6)
+
+        # Nothing new settled: a second run counts nothing
+        self.assertEqual(rollup_votes(), 0)
+        Vote.objects.create(
+            question=self.question, choice=self.choice1, ip_address='3.3.3.3',
+            voted_at=self.start + timedelta(minutes=1, seconds=10)
+        )
+        # Settled votes after a recently inserted one wait for it, then both are counted
+        self.assertEqual(rollup_votes(), 0)
+        self.assertEqual(rollup_votes(lag_seconds=0), 2)
+        self.assertEqual(VoteRollup.objects.get(choice=self.choice1, bucket=self.start + timedelta(minutes=1)).count, 3)
+
+    def test_buffered_vote_waits_for_its_insert(self):
+        # Flushed long after its request: an old voted_at, but a fresh row
+        Vote.objects.filter(ip_address='2.2.2.2').update(voted_at=self.start)
+        self.assertEqual(rollup_votes(), 6)
+        self.assertFalse(VoteRollup.objects.filter(choice=self.choice2, bucket=self.start).exists())
+
+        # Rows from before the column existed count as settled
+        Vote.objects.filter(ip_address='2.2.2.2').update(inserted_at=None)
+        self.assertEqual(rollup_votes(), 1)
+        self.assertEqual(VoteRollup.objects.get(choice=self.choice2, bucket=self.start).count, 1)
+
+    def test_timeseries_rebuckets_rollups(self):
+        call_command('rollup_votes', stdout=StringIO())
+        response = self.timeseries(bucket='5m')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['bucket'], '5m')
+
+        series = {entry['choice']: entry['points'] for entry in response.data['series']}
+        self.assertEqual(series[self.choice1.pk], [
+            {"bucket": "2025-08-09T16:00:00+00:00", "votes": 3},
+            {"bucket": "2025-08-09T16:05:00+00:00", "votes": 1},
+            {"bucket": "2025-08-09T16:10:00+00:00", "votes": 1},
+        ])
+        self.assertEqual(series[self.choice2.pk], [{"bucket": "2025-08-09T16:00:00+00:00", "votes": 1}])
+
+        response = self.timeseries(bucket='1h', since='2025-08-09T16:20:00Z')
+        self.assertEqual(response.data['series'][0]['points'], [{"bucket": "2025-08-09T16:00:00+00:00", "votes": 5}])
+
+        response = self.timeseries(bucket='5m', since='2025-08-09T16:06:00Z')
+        self.assertEqual(len(response.data['series'][0]['points']), 2)
+
+    def test_timeseries_does_not_read_votes(self):
+        rollup_votes()
+        with self.assertNumQueries(3):
+            self.timeseries(bucket='1m')
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.timeseries(bucket='5s').status_code, 400)
+        self.assertEqual(self.timeseries(bucket='0m').status_code, 400)
+        self.assertEqual(self.timeseries(since='yesterday').status_code, 400)
+        response = self.client.get(reverse('poll-timeseries', args=[self.poll.pk + 100]))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,125 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from polls import routers
+from polls.models import User, Poll, Question, Choice
+from polls.routers import LAST_WRITE_COOKIE, ReplicaRouter, replica_reads, reset_replica_health
+
+# Unless replicas are configured, a second connection to the test database
+# stands in for one. Added on import, before the test databases are set up.
+REPLICA = 'replica1'
+if REPLICA not in connections:
+    connections.settings[REPLICA] = {**connections.settings['default'], 'TEST': {'MIRROR': 'default'}}
+
+
+@override_settings(POLLS_READ_REPLICAS=['replica1', 'replica2'], POLLS_REPLICA_LAG_SECONDS=5)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        reset_replica_health()
+        self.router = ReplicaRouter()
+        # The aliases are not real connections; report them as caught up
+        patcher = mock.patch.object(routers, 'replica_lag', return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reads_use_replicas_only_inside_block(self):
+        self.assertIsNone(self.router.db_for_read(Poll))
+        with replica_reads():
+            alias = self.router.db_for_read(Poll)
+            self.assertIn(alias, ['replica1', 'replica2'])
+            # One replica for the whole block
+            self.assertEqual({self.router.db_for_read(Choice) for _ in range(20)}, {alias})
+            self.assertEqual(self.router.db_for_write(Poll), 'default')
+        self.assertIsNone(self.router.db_for_read(Poll))
+
+    def test_recent_writer_reads_from_primary(self):
+        with replica_reads(last_write=time.time() - 1):
+            self.assertEqual(self.router.db_for_read(Poll), 'default')
+        with replica_reads(last_write=time.time() - 6):
+            self.assertNotEqual(self.router.db_for_read(Poll), 'default')
+
+    @override_settings(POLLS_READ_REPLICAS=[])
+    def test_without_replicas(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Poll), 'default')
+
+    def test_lagging_replicas_are_skipped(self):
+        lags = {'replica1': 30.0, 'replica2': 0.5}
+        with mock.patch.object(routers, 'replica_lag', side_effect=lags.get) as replica_lag:
+            for _ in range(10):
+                with replica_reads():
+                    self.assertEqual(self.router.db_for_read(Poll), 'replica2')
+        # Lag is checked once per interval, not per request
+        self.assertEqual(replica_lag.call_count, 2)
+
+        reset_replica_health()
+        with mock.patch.object(routers, 'replica_lag', side_effect=DatabaseError):
+            with replica_reads():
+                self.assertEqual(self.router.db_for_read(Poll), 'default')
+
+
+@override_settings(POLLS_READ_REPLICAS=[REPLICA])
+class ReplicaRoutingTests(TransactionTestCase):
+    databases = {'default', REPLICA}
+
+    def setUp(self):
+        cache.clear()
+        reset_replica_health()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='owner', email='owner@example.com', password='pass1234')
+        self.poll = Poll.objects.create(title="Poll", user=self.user, expiry=timezone.now() + timedelta(days=1))
+        self.question = Question.objects.create(text="Which?", poll=self.poll)
+        self.choice = Choice.objects.create(text="A", question=self.question)
+
+    def queries(self, method, *args, **kwargs):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = getattr(self.client, method)(*args, **kwargs)
+        return response, len(primary), len(replica)
+
+    def test_reads_go_to_replica(self):
+        response, primary, replica = self.queries('get', reverse('poll-results', args=[self.poll.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+        for url in (reverse('poll-list'), reverse('poll-detail', args=[self.poll.pk])):
+            response, primary, replica = self.queries('get', url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual((primary, replica > 0), (0, True))
+
+    def test_writes_go_to_primary_and_stick(self):
+        response, primary, replica = self.queries(
+            'post', f"/api/questions/{self.question.pk}/vote/", {'choice': self.choice.pk},
+            REMOTE_ADDR='1.1.1.1', format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(replica, 0)
+        self.assertIn(LAST_WRITE_COOKIE, response.cookies)
+
+        # The voter reads its own vote from the primary
+        response, primary, replica = self.queries('get', reverse('poll-results', args=[self.poll.pk]))
+        self.assertEqual(response.data['results'][0]['choices'][0]['votes'], 1)
+        self.assertEqual((primary > 0, replica), (True, 0))
+
+        # Once the lag tolerance has passed, reads move back to the replica
+        self.client.cookies[LAST_WRITE_COOKIE] = str(time.time() - 60)
+        response, primary, replica = self.queries('get', reverse('poll-list'))
+        self.assertEqual((primary, replica > 0), (0, True))
+
+    def test_failed_writes_do_not_stick(self):
+        response = self.client.post(
+            f"/api/questions/{self.question.pk}/vote/", {'choice': self.choice.pk + 100},
+            REMOTE_ADDR='1.1.1.1', format='json'
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn(LAST_WRITE_COOKIE, response.cookies)
@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+class OpenAPISchemaTests(SimpleTestCase):
+    def test_prebuilt_schema_is_up_to_date(self):
+        # Fails when views changed without `manage.py build_openapi_schema`
+        call_command('build_openapi_schema', '--check', stdout=StringIO())
+
+    def test_serving_the_api_does_not_import_drf_yasg_generation(self):
+        code = (
+            "import sys, django; django.setup(); import poll_project.urls; "
+            "print(sorted(name for name in sys.modules if name.startswith('drf_yasg.')))"
+        )
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'poll_project.settings'}
+        result = subprocess.run([sys.executable, '-c', code], cwd=BASE_DIR, env=env,
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), '[]')
+
+    def test_docs_page_uses_static_schema(self):
+        response = self.client.get('/api/docs/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '/static/polls/openapi.json')
+        self.assertIn('max-age=3600', response['Cache-Control'])
+
+        response = self.client.get('/api/docs/', {'format': 'openapi'})
+        self.assertRedirects(response, '/static/polls/openapi.json', fetch_redirect_response=False)
@@ -0,0 +1,92 @@
+import gzip
+import os
+import shutil
+import tempfile
+from io import StringIO
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from polls.closing import close_expired_polls
+from polls.models import User, Poll, Question, Choice, Vote
+from polls import snapshots
+
+
+class ResultSnapshotFileTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.snapshot_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.snapshot_root)
+        override = override_settings(POLLS_SNAPSHOT_ROOT=self.snapshot_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='owner', email='owner@example.com', password='pass1234')
+        self.poll = Poll.objects.create(title="Shared poll", user=self.user, expiry=timezone.now() - timedelta(hours=1))
+        for i in range(5):
+            question = Question.objects.create(text=f"Question number {i}?", poll=self.poll)
+            choices = [Choice.objects.create(text=f"Choice {j} of question {i}", question=question) for j in range(4)]
+            Vote.objects.create(question=question, choice=choices[i % 4], ip_address='1.1.1.1')
+        self.results_url = f"/api/polls/{self.poll.id}/results/"
+        self.expected = self.client.get(self.results_url).content
+
+    def close(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            close_expired_polls(grace_seconds=0)
+        return snapshots.snapshot_path(self.poll.id)
+
+    def test_closing_writes_precompressed_results(self):
+        path = self.close()
+        with open(path, 'rb') as file:
+            self.assertEqual(file.read(), self.expected)
+        with gzip.open(path + '.gz') as file:
+            self.assertEqual(file.read(), self.expected)
+        self.assertEqual(os.path.exists(path + '.br'), snapshots.brotli is not None)
+
+    def test_results_views_redirect_to_snapshot(self):
+        self.close()
+        url = f"/snapshots/results/{self.poll.id}.json"
+        for results_url in (self.results_url, f"{self.results_url}async/"):
+            response = self.client.get(results_url)
+            self.assertEqual(response.status_code, 302)
+            self.assertEqual(response['Location'], url)
+            self.assertIn('max-age=86400', response['Cache-Control'])
+
+    def test_snapshots_are_served_compressed_and_revalidated(self):
+        self.close()
+        url = f"/snapshots/results/{self.poll.id}.json"
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Cache-Control'], 'max-age=3600, public')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), self.expected)
+
+        response = self.client.get(url)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(b''.join(response.streaming_content), self.expected)
+
+        self.assertEqual(self.client.get(url + '.gz').status_code, 404)
+        self.assertEqual(self.client.get('/snapshots/results/../../poll_project/settings.py').status_code, 404)
+
+    def test_command_regenerates_files_and_deletion_removes_them(self):
+        path = self.close()
+        os.unlink(path)
+        out = StringIO()
+        call_command('build_result_snapshots', '--workers', '2', stdout=out)
+        self.assertIn("Wrote 1 results snapshots", out.getvalue())
+        self.assertEqual(snapshots.regenerate_snapshot_files(workers=2, chunk_size=1), 1)
+        with open(path, 'rb') as file:
+            self.assertEqual(file.read(), self.expected)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.poll.delete()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(os.path.exists(path + '.gz'))
@@ -0,0 +1,153 @@
+import asyncio
+import json
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from poll_project.asgi import application
+from polls.models import Poll, Choice, Vote, User
+from polls import streaming
+from polls.streaming import broadcaster
+
+
+class StreamClient:
+    """Minimal in-process ASGI client for reading a Server-Sent Events response."""
+
+    def __init__(self, path):
+        self.path = path
+        self.inbox = asyncio.Queue()
+        self.disconnect = asyncio.Event()
+        self.buffer = b""
+        self.start = None
+
+    async def receive(self):
+        await self.disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        await self.inbox.put(message)
+
+    async def open(self):
+        scope = {'type': 'http', 'method': 'GET', 'path': self.path, 'headers': [], 'query_string': b''}
+        self.task = asyncio.ensure_future(application(scope, self.receive, self.send))
+        self.start = await asyncio.wait_for(self.inbox.get(), timeout=5)
+        return self.start
+
+    async def next_event(self):
+        while b"\n\n" not in self.buffer:
+            message = await asyncio.wait_for(self.inbox.get(), timeout=5)
+            self.buffer += message.get('body', b'')
+        raw, self.buffer = self.buffer.split(b"\n\n", 1)
+        lines = dict(line.split(": ", 1) for line in raw.decode().splitlines())
+        return lines['event'], json.loads(lines['data'])
+
+    async def close(self):
+        self.disconnect.set()
+        await asyncio.wait_for(self.task, timeout=5)
+
+
+@override_settings(POLLS_STREAM_TICK=0.01)
+class ResultsStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.poll = Poll.objects.create(
+            title="Election",
+            expiry=timezone.now() + timedelta(days=1),
+            user=self.user
+        )
+        self.question = self.poll.questions.create(text="Who should win?")
+        self.choice1 = self.question.choices.create(text="Candidate A")
+        self.choice2 = self.question.choices.create(text="Candidate B")
+        self.path = f"/api/polls/{self.poll.id}/stream/"
+
+    async def test_snapshot_then_updates(self):
+        client = StreamClient(self.path)
+        start = await client.open()
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/event-stream'), start['headers'])
+
+        event, data = await client.next_event()
+        self.assertEqual(event, 'snapshot')
+        self.assertEqual(data['poll'], "Election")
+        self.assertEqual(data['counts'], {str(self.choice1.id): 0, str(self.choice2.id): 0})
+
+        await sync_to_async(Vote.objects.create)(question=self.question, choice=self.choice2, ip_address='1.1.1.1')
+        while True:
+            event, data = await client.next_event()
+            if data['counts'].get(str(self.choice2.id)) == 1:
+                break
+        self.assertEqual(event, 'update')
+
+        await client.close()
+        self.assertNotIn(self.poll.id, broadcaster.feeds)
+
+    async def test_sees_votes_of_other_workers(self):
+        client = StreamClient(self.path)
+        await client.open()
+        await client.next_event()
+
+        def vote_elsewhere():
+            # Counters and version move in the database only; this process's cache never hears of it
+            Choice.objects.filter(pk=self.choice1.pk).update(vote_count=F('vote_count') + 1)
+            Poll.objects.filter(pk=self.poll.pk).update(version=F('version') + 1)
+
+        await sync_to_async(vote_elsewhere)()
+        while True:
+            event, data = await client.next_event()
+            if data['counts'].get(str(self.choice1.id)) == 1:
+                break
+        self.assertEqual(event, 'update')
+        await client.close()
+
+    async def test_connections_share_one_feed(self):
+        first, second = StreamClient(self.path), StreamClient(self.path)
+        await first.open()
+        await second.open()
+        self.assertEqual(len(broadcaster.feeds[self.poll.id].subscribers), 2)
+
+        await first.close()
+        self.assertEqual(len(broadcaster.feeds[self.poll.id].subscribers), 1)
+        await second.close()
+        self.assertNotIn(self.poll.id, broadcaster.feeds)
+
+    async def test_missing_poll(self):
+        client = StreamClient(f"/api/polls/{self.poll.id + 100}/stream/")
+        start = await client.open()
+        self.assertEqual(start['status'], 404)
+        await asyncio.wait_for(client.task, timeout=5)
+        self.assertNotIn(self.poll.id + 100, broadcaster.feeds)
+
+    async def test_feed_survives_read_errors(self):
+        client = StreamClient(self.path)
+        await client.open()
+        await client.next_event()
+        feed = broadcaster.feeds[self.poll.id]
+        while feed.version is None:
+            await asyncio.sleep(0.01)
+
+        read_counts = streaming.get_choice_counts
+        calls = []
+
+        def flaky_counts(poll_id):
+            calls.append(poll_id)
+            if len(calls) == 1:
+                raise ConnectionError("connection dropped")
+            return read_counts(poll_id)
+
+        with mock.patch.object(streaming, 'get_choice_counts', flaky_counts), \
+                self.assertLogs('polls.streaming', 'ERROR') as logs:
+            await sync_to_async(Vote.objects.create)(question=self.question, choice=self.choice2, ip_address='1.1.1.1')
+            while True:
+                event, data = await client.next_event()
+                if data['counts'].get(str(self.choice2.id)) == 1:
+                    break
+        self.assertEqual(event, 'update')
+        self.assertIn("Results feed of poll", logs.output[0])
+        self.assertIs(broadcaster.feeds[self.poll.id], feed)
+        await client.close()
@@ -0,0 +1,107 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from polls import throttling
+from polls.models import User, Poll, Question, Choice
+
+RATES = {
+    'DEFAULT_AUTHENTICATION_CLASSES': ['rest_framework.authentication.TokenAuthentication'],
+    'DEFAULT_THROTTLE_CLASSES': ['polls.throttling.SlidingWindowThrottle'],
+    'DEFAULT_THROTTLE_RATES': {'vote': '2/min', 'results': '3/min'},
+}
+
+
+class SlidingWindowTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def hit_at(self, now):
+        with mock.patch.object(throttling.time, 'time', return_value=now):
+            return throttling.hit('polls:ratelimit:test', 4, 60)
+
+    def test_previous_window_is_weighted(self):
+        # Four requests late in one window fill the limit
+        self.assertEqual([self.hit_at(6050 + i) for i in range(4)], [0, 0, 0, 0])
+        self.assertEqual(self.hit_at(6055), 5)
+
+        # 15s into the next window, 3/4 of the previous five still count: 3.75 + 1
+        self.assertGreater(self.hit_at(6075), 0)
+        # Halfway through: 2.5 + 2
+        self.assertGreater(self.hit_at(6090), 0)
+        # Halfway through the window after: 1 + 1
+        self.assertEqual(self.hit_at(6150), 0)
+
+
+@override_settings(REST_FRAMEWORK=RATES)
+class RateLimitedViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='owner', email='owner@example.com', password='pass1234')
+        self.poll = Poll.objects.create(title="Poll", user=self.user, expiry=timezone.now() + timedelta(days=1))
+        self.questions = [Question.objects.create(text=f"Q{i}", poll=self.poll) for i in range(3)]
+        self.choices = [Choice.objects.create(text="A", question=question) for question in self.questions]
+
+    def vote(self, index, ip_address='1.1.1.1', path=''):
+        return self.client.post(
+            f"/api/questions/{self.questions[index].id}/vote/{path}", {'choice': self.choices[index].id},
+            REMOTE_ADDR=ip_address, format='json'
+        )
+
+    def test_votes_limited_per_ip(self):
+        self.assertEqual(self.vote(0).status_code, 201)
+        self.assertEqual(self.vote(1).status_code, 201)
+        # Shed before any query runs
+        with self.assertNumQueries(0):
+            response = self.vote(2)
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+
+        # Another address behind its own limit
+        self.client = APIClient()
+        self.assertEqual(self.vote(2, ip_address='2.2.2.2').status_code, 201)
+
+    @override_settings(REST_FRAMEWORK={**RATES, 'NUM_PROXIES': 1})
+    def test_forwarded_address_is_the_key(self):
+        # The proxy appends the address it saw; anything before it came from the client
+        for spoofed in ('1.1.1.1', ' 2.2.2.2'):
+            self.client.get(reverse('poll-results', args=[self.poll.pk]), HTTP_X_FORWARDED_FOR=f'{spoofed}, 9.9.9.9')
+        self.client.get(reverse('poll-results', args=[self.poll.pk]), HTTP_X_FORWARDED_FOR='9.9.9.9')
+        response = self.client.get(reverse('poll-results', args=[self.poll.pk]), HTTP_X_FORWARDED_FOR='3.3.3.3, 9.9.9.9')
+        self.assertEqual(response.status_code, 429)
+        response = self.client.get(reverse('poll-results', args=[self.poll.pk]), HTTP_X_FORWARDED_FOR='9.9.9.9, 8.8.8.8')
+        self.assertEqual(response.status_code, 200)
+
+    def test_forwarded_header_ignored_without_trusted_proxies(self):
+        for i in range(3):
+            response = self.client.get(reverse('poll-results', args=[self.poll.pk]), HTTP_X_FORWARDED_FOR=f'9.9.9.{i}')
+            self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse('poll-results', args=[self.poll.pk]), HTTP_X_FORWARDED_FOR='9.9.9.9')
+        self.assertEqual(response.status_code, 429)
+
+    def test_user_limit_holds_across_addresses(self):
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(self.vote(0, ip_address='3.3.3.1').status_code, 201)
+        self.assertEqual(self.vote(1, ip_address='3.3.3.2').status_code, 201)
+        self.assertEqual(self.vote(2, ip_address='3.3.3.3').status_code, 429)
+
+    def test_async_views_share_the_limits(self):
+        self.assertEqual(self.vote(0, path='async/').status_code, 201)
+        self.assertEqual(self.vote(1).status_code, 201)
+        response = self.vote(2, path='async/')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertIn('throttled', response.json()['detail'])
+
+    @override_settings(REST_FRAMEWORK={**RATES, 'DEFAULT_THROTTLE_RATES': {}})
+    def test_unconfigured_scope_is_not_limited(self):
+        for index in range(3):
+            self.assertEqual(self.vote(index).status_code, 201)
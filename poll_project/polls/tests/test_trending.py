@@ -0,0 +1,93 @@
+from io import StringIO
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from polls.models import User, Poll, Question, Choice, increment_vote_counts
+from polls.trending import trending_polls, compact_trending_scores
+
+
+@override_settings(POLLS_TRENDING_HALF_LIFE=3600)
+class TrendingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='owner', email='owner@example.com', password='pass1234')
+        self.now = timezone.now()
+        self.choices = {}
+        for name in ('old', 'new', 'quiet'):
+            poll = Poll.objects.create(title=name, user=self.user, expiry=self.now + timedelta(days=1))
+            question = Question.objects.create(text="Which?", poll=poll)
+            self.choices[name] = Choice.objects.create(text="A", question=question)
+
+    def vote(self, name, votes, hours_ago=0):
+        with mock.patch('django.utils.timezone.now', return_value=self.now - timedelta(hours=hours_ago)):
+            increment_vote_counts([self.choices[name].id] * votes)
+
+    def poll(self, name):
+        return Poll.objects.get(title=name)
+
+    def test_recent_votes_outrank_older_ones(self):
+        self.vote('old', 8, hours_ago=2)
+        self.vote('new', 3)
+        self.vote('quiet', 1, hours_ago=1)
+        self.vote('new', 1, hours_ago=1)
+
+        with self.assertNumQueries(1):
+            polls = trending_polls(now=self.now)
+        self.assertEqual([poll['title'] for poll in polls], ['new', 'old', 'quiet'])
+        # Each vote counts half as much per hour
+        self.assertEqual([poll['score'] for poll in polls], [3.5, 2.0, 0.5])
+        self.assertEqual(polls[1]['vote_count'], 8)
+
+    def test_trending_endpoint(self):
+        response = self.client.post(
+            f"/api/questions/{self.choices['quiet'].question_id}/vote/",
+            {'choice': self.choices['quiet'].id}, REMOTE_ADDR='10.0.0.1', format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.vote('new', 2)
+        Poll.objects.filter(title='old').update(trend_score=0, expiry=self.now - timedelta(minutes=1))
+
+        response = self.client.get('/api/polls/trending/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([poll['title'] for poll in response.data['polls']], ['new', 'quiet'])
+
+        response = self.client.get('/api/polls/trending/', {'limit': 1})
+        self.assertEqual([poll['title'] for poll in response.data['polls']], ['new'])
+        self.assertEqual(self.client.get('/api/polls/trending/', {'limit': 0}).status_code, 400)
+
+    def test_saves_keep_trend_score(self):
+        poll = self.poll('new')
+        self.vote('new', 2)
+        poll.title = 'renamed'
+        poll.save()
+        poll.refresh_from_db()
+        self.assertIsNotNone(poll.trend_score)
+
+    def test_compaction_drops_cold_expired_and_overflowing_polls(self):
+        self.vote('old', 1, hours_ago=3)
+        self.vote('new', 4)
+        self.vote('quiet', 2)
+
+        # 'old' decayed to 1/8 of a vote
+        self.assertEqual(compact_trending_scores(min_score=0.5, now=self.now), 1)
+        self.assertIsNone(self.poll('old').trend_score)
+
+        self.assertEqual(compact_trending_scores(min_score=0.5, capacity=1, now=self.now), 1)
+        self.assertEqual([poll['title'] for poll in trending_polls(now=self.now)], ['new'])
+
+        Poll.objects.filter(title='new').update(expiry=self.now - timedelta(seconds=1))
+        out = StringIO()
+        call_command('compact_trending', stdout=out)
+        self.assertIn("Dropped 1 polls", out.getvalue())
+        self.assertFalse(Poll.objects.filter(trend_score__isnull=False).exists())
+
+        # Dropped polls start over on their next vote
+        self.vote('old', 1)
+        self.assertEqual(trending_polls(now=self.now)[0]['score'], 1.0)
@@ -0,0 +1,42 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.db import OperationalError, connections
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from polls import warmup
+from polls.dedup import might_have_voted, reset_voter_filter
+from polls.models import User, Poll, Question, Choice, Vote
+
+
+@override_settings(POLLS_VOTE_FILTER='local')
+class WarmUpTests(TestCase):
+    def setUp(self):
+        reset_voter_filter()
+        self.addCleanup(reset_voter_filter)
+        self.user = User.objects.create_user(username='owner', email='owner@example.com', password='pass1234')
+        self.poll = Poll.objects.create(title="Poll", user=self.user, expiry=timezone.now() + timedelta(days=1))
+        self.question = Question.objects.create(text="Which?", poll=self.poll)
+        choice = Choice.objects.create(text="A", question=self.question)
+        Vote.objects.create(question=self.question, choice=choice, ip_address='1.1.1.1')
+        expired = Poll.objects.create(title="Old", user=self.user, expiry=timezone.now() - timedelta(days=1))
+        Question.objects.create(text="Old?", poll=expired)
+
+    def test_warms_connections_and_voter_filters(self):
+        # The main thread serves no requests, so it keeps no connection with or without a pool
+        with mock.patch.object(connections['default'], 'close') as close:
+            report = warmup.warm_up()
+        close.assert_called()
+        self.assertIsInstance(report['default'], float)
+        # Only the open poll's question
+        self.assertEqual(report['voter_filters'], 1)
+        with self.assertNumQueries(0):
+            self.assertTrue(might_have_voted(self.question.id, '1.1.1.1'))
+            self.assertFalse(might_have_voted(self.question.id, '2.2.2.2'))
+
+    def test_database_errors_are_reported(self):
+        with mock.patch.object(warmup, '_run_hot_queries', side_effect=OperationalError("down")):
+            report = warmup.warm_up()
+        self.assertIsInstance(report['default'], OperationalError)
+        self.assertEqual(report['voter_filters'], 0)
@@ -0,0 +1,147 @@
+"""
+throttling.py
+
+Sliding-window rate limits for the vote and results endpoints.
+
+Each limited view names a scope (``throttle_scope``) whose rate comes from
+REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], e.g. ``'vote': '30/min'``. The
+rate applies separately to the client's IP address, its session and, when
+authenticated, its user, and a request is refused with 429 and Retry-After
+as soon as any of them is over.
+
+Counts live in the POLLS_RATE_LIMIT_CACHE cache, so limits hold across
+workers when that is a shared backend. A check costs two cache operations
+per key whatever the rate: requests are counted per fixed window, and the
+previous window's count is weighted by how much of it still overlaps the
+sliding window. Refused requests are counted too, so a client that keeps
+hammering stays limited. Checks run before the view touches the database.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.exceptions import Throttled
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .utils import get_client_ip
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """Parse a DRF rate string such as '30/min' into (limit, window seconds)."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def get_rate(scope):
+    """Return (limit, window) of a scope, or None if it is not limited."""
+    rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope) if scope else None
+    return parse_rate(rate) if rate else None
+
+
+def _cache():
+    return caches[settings.POLLS_RATE_LIMIT_CACHE]
+
+
+def _window_keys(key, window, now):
+    index, offset = divmod(now, window)
+    return f'{key}:{int(index)}', f'{key}:{int(index) - 1}', offset
+
+
+def _wait(limit, window, current, previous, offset):
+    """Seconds until the weighted count is within the limit again, or 0 if it already is."""
+    if previous * (1 - offset / window) + current <= limit:
+        return 0
+    if current >= limit or not previous:
+        return window - offset
+    return window * (1 - (limit - current) / previous) - offset
+
+
+def hit(key, limit, window):
+    """
+    Count a request against a key.
+
+    Returns:
+        float: Seconds to wait before retrying, or 0 if the request is allowed.
+    """
+    cache = _cache()
+    current_key, previous_key, offset = _window_keys(key, window, time.time())
+    try:
+        current = cache.incr(current_key)
+    except ValueError:
+        # The window's first request; kept for one more window to weigh the next one
+        current = 1 if cache.add(current_key, 1, window * 2) else cache.incr(current_key)
+    return _wait(limit, window, current, cache.get(previous_key, 0), offset)
+
+
+async def ahit(key, limit, window):
+    """Async variant of hit."""
+    cache = _cache()
+    current_key, previous_key, offset = _window_keys(key, window, time.time())
+    try:
+        current = await cache.aincr(current_key)
+    except ValueError:
+        current = 1 if await cache.aadd(current_key, 1, window * 2) else await cache.aincr(current_key)
+    return _wait(limit, window, current, await cache.aget(previous_key, 0), offset)
+
+
+def _client_keys(request, scope, user):
+    prefix = f'polls:ratelimit:{scope}'
+    keys = [f'{prefix}:ip:{get_client_ip(request)}']
+    session_key = request.session.session_key if hasattr(request, 'session') else None
+    if session_key:
+        keys.append(f'{prefix}:session:{session_key}')
+    if user is not None and user.is_authenticated:
+        keys.append(f'{prefix}:user:{user.pk}')
+    return keys
+
+
+def _retry_after(waits):
+    wait = max(waits)
+    return math.ceil(wait) if wait > 0 else None
+
+
+def check_rate_limits(request, scope, user=None):
+    """
+    Count a request against the limits of a scope.
+
+    Returns:
+        int | None: Seconds to wait before retrying, or None if allowed.
+    """
+    rate = get_rate(scope)
+    if rate is None:
+        return None
+    return _retry_after([hit(key, *rate) for key in _client_keys(request, scope, user)])
+
+
+async def acheck_rate_limits(request, scope):
+    """
+    Async variant of check_rate_limits for the plain Django views.
+    Those take no token authentication, so only IP and session are keyed.
+    """
+    rate = get_rate(scope)
+    if rate is None:
+        return None
+    return _retry_after([await ahit(key, *rate) for key in _client_keys(request, scope, None)])
+
+
+def throttled_detail(wait):
+    """The body DRF returns for a throttled request, for views outside DRF."""
+    return Throttled(wait).detail
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    DRF throttle applying the limits of the view's ``throttle_scope``.
+    Views without a scope, or whose scope has no rate, are not limited.
+    """
+
+    def allow_request(self, request, view):
+        self.retry_after = check_rate_limits(request, getattr(view, 'throttle_scope', None), request.user)
+        return self.retry_after is None
+
+    def wait(self):
+        return self.retry_after
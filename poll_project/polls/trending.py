@@ -0,0 +1,81 @@
+"""
+trending.py
+
+Trending polls leaderboard.
+
+Each vote adds to its poll's trend_score in the same UPDATE that bumps the
+vote counters (see increment_vote_counts), so ranking never aggregates
+Vote. The scores live in log space relative to a fixed epoch: they only
+grow, ranking by them ranks by decayed vote count, and the partial index
+on the scored polls hands out the top entries directly.
+
+Polls cooling off keep their score until `compact_trending_scores` clears
+it, which bounds the scored set and the index to the polls worth ranking.
+"""
+import math
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Poll, trend_log_weight
+
+
+def decayed_votes(trend_score, now):
+    """Vote count of a trend score, each vote halved for every half-life since it was cast."""
+    return math.exp(trend_score - trend_log_weight(now))
+
+
+def trending_polls(limit=None, now=None):
+    """
+    The open polls with the highest trending scores.
+
+    Returns:
+        list: Dicts with the poll id, title, expiry, vote count and decayed
+        vote count (``score``), highest score first.
+    """
+    limit = limit or settings.POLLS_TRENDING_SIZE
+    now = now or timezone.now()
+    polls = (
+        Poll.objects.filter(trend_score__isnull=False, expiry__gt=now)
+        .order_by('-trend_score', '-id')
+        .values('id', 'title', 'expiry', 'vote_count', 'trend_score')
+        [:limit]
+    )
+    return [
+        {
+            'id': poll['id'],
+            'title': poll['title'],
+            'expiry': poll['expiry'],
+            'vote_count': poll['vote_count'],
+            'score': round(decayed_votes(poll['trend_score'], now), 3),
+        }
+        for poll in polls
+    ]
+
+
+def compact_trending_scores(min_score=None, capacity=None, now=None):
+    """
+    Clear the trending scores of cold and expired polls.
+
+    Polls whose decayed vote count fell below `min_score` or whose expiry
+    passed are dropped, then all but the `capacity` highest scores.
+
+    Returns:
+        int: Number of polls dropped.
+    """
+    min_score = settings.POLLS_TRENDING_MIN_SCORE if min_score is None else min_score
+    capacity = settings.POLLS_TRENDING_CAPACITY if capacity is None else capacity
+    now = now or timezone.now()
+
+    scored = Poll.objects.filter(trend_score__isnull=False)
+    cold = Q(expiry__lte=now)
+    if min_score > 0:
+        cold |= Q(trend_score__lt=trend_log_weight(now) + math.log(min_score))
+    dropped = scored.filter(cold).update(trend_score=None)
+
+    # Ties with the last kept score go too, so at most `capacity` remain
+    cutoff = scored.order_by('-trend_score').values_list('trend_score', flat=True)[capacity:capacity + 1]
+    for score in cutoff:
+        dropped += scored.filter(trend_score__lte=score).update(trend_score=None)
+    return dropped
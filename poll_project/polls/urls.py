@@ -1,15 +1,32 @@
 from rest_framework.routers import DefaultRouter
+from django.conf import settings
 from django.urls import path
-from .views import PollViewSet, QuestionViewSet, ChoiceViewSet, VoteAPIView, PollResultsAPIView
+from .views import PollViewSet, QuestionViewSet, ChoiceViewSet, VoteAPIView, BallotAPIView, PollResultsAPIView, PollTimeseriesAPIView
+from . import async_views
 
 router = DefaultRouter()
 router.register(r'polls', PollViewSet, basename='poll')
 router.register(r'questions', QuestionViewSet, basename='question')
 router.register(r'choices', ChoiceViewSet, basename='choice')
 
+# POLLS_ASYNC_VIEWS serves the main vote and results routes with the async views.
+# Buffered ingestion is handled by the sync vote view, so it keeps that route.
+if settings.POLLS_ASYNC_VIEWS and not settings.POLLS_VOTE_BUFFERING:
+    vote_view = async_views.vote_view
+else:
+    vote_view = VoteAPIView.as_view()
+if settings.POLLS_ASYNC_VIEWS:
+    poll_results_view = async_views.poll_results_view
+else:
+    poll_results_view = PollResultsAPIView.as_view()
+
 
 urlpatterns = router.urls + [
-    path('questions/<int:question_id>/vote/', VoteAPIView.as_view(), name='vote'),
+    path('questions/<int:question_id>/vote/', vote_view, name='vote'),
     path('polls/<int:pk>/vote/', VoteAPIView.as_view(), name='vote'),
-    path('polls/<int:pk>/results/', PollResultsAPIView.as_view(), name='poll-results'),
+    path('polls/<int:pk>/ballot/', BallotAPIView.as_view(), name='poll-ballot'),
+    path('polls/<int:pk>/results/', poll_results_view, name='poll-results'),
+    path('polls/<int:pk>/timeseries/', PollTimeseriesAPIView.as_view(), name='poll-timeseries'),
+    path('questions/<int:question_id>/vote/async/', async_views.vote_view, name='vote-async'),
+    path('polls/<int:pk>/results/async/', async_views.poll_results_view, name='poll-results-async'),
 ]
@@ -0,0 +1,29 @@
+"""
+utils.py
+
+Request helpers shared by the serializers, views and throttles.
+"""
+from rest_framework.settings import api_settings
+
+
+def get_client_ip(request):
+    """
+    Extract the IP address of the client from the request.
+
+    Behind NUM_PROXIES trusted proxies (REST_FRAMEWORK setting) the address
+    they appended to X-Forwarded-For is used. Without NUM_PROXIES the header
+    is ignored, since clients can send any value in it, and REMOTE_ADDR is
+    used; deployments behind a proxy must set NUM_PROXIES, or every client
+    shares the proxy's address and its rate limits.
+
+    Returns:
+        str: IP address of the client.
+    """
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    num_proxies = api_settings.NUM_PROXIES
+    if num_proxies is not None:
+        if num_proxies == 0 or not x_forwarded_for:
+            return request.META.get('REMOTE_ADDR')
+        addresses = x_forwarded_for.split(',')
+        return addresses[-min(num_proxies, len(addresses))].strip()
+    return request.META.get('REMOTE_ADDR')
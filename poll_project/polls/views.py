@@ -4,54 +4,141 @@ views.py
 Contains API views for Polls, Questions, Choices, Voting, and Poll Results.
 Implements both ViewSets and APIViews with Swagger documentation.
 """
+from django.conf import settings
+from django.http import Http404
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, generics, status
+from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, AllowAny
-from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.utils import timezone
-from django.db.models import Count
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
 
 from .models import Poll, Question, Choice, Vote
-from .serializers import PollSerializer, QuestionSerializer, ChoiceSerializer, VoteSerializer
+from .serializers import (
+    PollSerializer, QuestionSerializer, ChoiceSerializer, VoteSerializer, BallotSerializer, TimeseriesQuerySerializer,
+    TrendingQuerySerializer, PollCreateSerializer,
+)
+from .results import get_poll_results_entry
+from .conditional import poll_etag, current_poll_version, etag_matches, not_modified
+from .ingest import get_question_info, buffer_vote
+from .dedup import might_have_voted, record_voter
+from .rollups import build_timeseries
+from .trending import trending_polls
+from .authoring import parse_poll_upload
+from .schema import swagger_auto_schema, openapi
+from .snapshots import snapshot_url, snapshot_redirect
+from .pagination import PollKeysetPagination, IdKeysetPagination
+from .routers import replica_reads, last_write_time
+
+class ReplicaReadMixin:
+    """
+    Serves the listed viewset actions (or HTTP methods, for plain API views)
+    from the read replicas, unless the client wrote within the lag tolerance.
+    """
+    replica_actions = ('list', 'retrieve')
+
+    def dispatch(self, request, *args, **kwargs):
+        action_map = getattr(self, 'action_map', None)
+        action = action_map.get(request.method.lower()) if action_map else request.method.lower()
+        if action not in self.replica_actions:
+            return super().dispatch(request, *args, **kwargs)
+        with replica_reads(last_write_time(request)):
+            return super().dispatch(request, *args, **kwargs)
 
-class PollViewSet(viewsets.ModelViewSet):
+class PollViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing Polls.
     Supports listing, retrieving, creating, updating, and deleting polls.
-    Enforces that expiry date must be in the future upon creation.
+    Polls are created with their questions and choices in one request, or
+    many at once through the import action; either way the expiry must be
+    in the future and everything is inserted with one query per model.
+    Owners are joined and questions and choices prefetched, so a page of
+    polls costs a fixed number of queries however much it nests.
     """
-    queryset = Poll.objects.all()
+    queryset = Poll.objects.select_related('user').prefetch_related(
+        Prefetch(
+            'questions',
+            queryset=Question.objects.order_by('id').prefetch_related(
+                Prefetch('choices', queryset=Choice.objects.order_by('id'))
+            ),
+        )
+    )
     serializer_class = PollSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = PollKeysetPagination
+    replica_actions = ('list', 'retrieve', 'trending')
 
     @swagger_auto_schema(
         operation_summary="List all polls",
-        operation_description="Returns a list of all polls.",
-        responses={200: PollSerializer(many=True)}
+        operation_description="Returns a page of polls, newest first. Follow `next` for the following page.",
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
     @swagger_auto_schema(
         operation_summary="Retrieve a poll",
-        operation_description="Returns detailed information about a single poll.",
-        responses={200: PollSerializer()}
+        operation_description="Returns detailed information about a single poll. Supports If-None-Match with the returned ETag.",
+        responses={200: PollSerializer(), 304: "Poll not modified"}
     )
     def retrieve(self, request, *args, **kwargs):
-        return super().retrieve(request, *args, **kwargs)
+        # Revalidations are answered from the version alone, before the nested prefetches run
+        pk = kwargs[self.lookup_field]
+        version = current_poll_version(pk)
+        if version is None:
+            return super().retrieve(request, *args, **kwargs)
+        etag = poll_etag('poll', pk, version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        response = super().retrieve(request, *args, **kwargs)
+        # Only tag the body if the poll did not change while it was serialized
+        if current_poll_version(pk) == version:
+            response['ETag'] = etag
+        return response
+
+    def get_serializer_class(self):
+        if self.action in ('create', 'import_polls'):
+            return PollCreateSerializer
+        return super().get_serializer_class()
 
     @swagger_auto_schema(
         operation_summary="Create a new poll",
-        operation_description="Creates a poll. Expiry date must be in the future.",
+        operation_description="Creates a poll, optionally with its questions and their choices. Expiry date must be in the future.",
         responses={201: PollSerializer(), 400: "Validation Error"}
     )
     def create(self, request, *args, **kwargs):
         return super().create(request, *args, **kwargs)
 
+    @swagger_auto_schema(
+        operation_summary="Import polls in bulk",
+        operation_description="Creates many polls with their questions and choices from a JSON list of polls, "
+                              "as sent to the create endpoint, or from an uploaded `file`: the same JSON, or CSV "
+                              "with title, expiry, question and choice columns and one row per choice. "
+                              "Nothing is created unless every poll is valid.",
+        request_body=PollCreateSerializer(many=True),
+        responses={
+            201: openapi.Response(
+                description="Polls created",
+                examples={"application/json": {"created": 2, "ids": [41, 42]}}
+            ),
+            400: openapi.Response(description="Invalid file or polls; errors are listed per poll")
+        }
+    )
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[JSONParser, MultiPartParser, FormParser])
+    def import_polls(self, request):
+        upload = request.FILES.get('file')
+        data = parse_poll_upload(upload) if upload is not None else request.data
+        serializer = self.get_serializer(
+            data=data, many=True, allow_empty=False, max_length=settings.POLLS_IMPORT_MAX_POLLS,
+        )
+        serializer.is_valid(raise_exception=True)
+        polls = serializer.save(user=request.user)
+        return Response({"created": len(polls), "ids": [poll.id for poll in polls]}, status=status.HTTP_201_CREATED)
+
     @swagger_auto_schema(
         operation_summary="Update a poll",
         operation_description="Updates the title, expiry, or other fields of a poll.",
@@ -68,20 +155,46 @@ class PollViewSet(viewsets.ModelViewSet):
     def destroy(self, request, *args, **kwargs):
         return super().destroy(request, *args, **kwargs)
 
+    @swagger_auto_schema(
+        operation_summary="List trending polls",
+        operation_description="Returns the open polls with the most recent votes, each vote counting half as much "
+                              "every POLLS_TRENDING_HALF_LIFE seconds. `score` is that decayed vote count.",
+        query_serializer=TrendingQuerySerializer,
+        responses={
+            200: openapi.Response(
+                description="Trending polls, highest score first",
+                examples={
+                    "application/json": {
+                        "polls": [
+                            {"id": 1, "title": "Your Favorite Programming Language",
+                             "expiry": "2025-08-10T16:00:00Z", "vote_count": 120, "score": 42.5}
+                        ]
+                    }
+                }
+            ),
+            400: openapi.Response(description="Invalid limit")
+        }
+    )
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def trending(self, request):
+        query = TrendingQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        return Response({"polls": trending_polls(query.validated_data.get('limit'))})
+
     def perform_create(self, serializer):
-        expiry = serializer.validated_data.get('expiry')
-        if expiry and expiry < timezone.now():
-            raise ValidationError("Expiry date must be in the future.")
         serializer.save(user=self.request.user)
 
-class QuestionViewSet(viewsets.ModelViewSet):
+class QuestionViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing Questions under polls.
     Supports standard CRUD operations.
     """
-    queryset = Question.objects.all()
+    queryset = Question.objects.prefetch_related(
+        Prefetch('choices', queryset=Choice.objects.order_by('id'))
+    )
     serializer_class = QuestionSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = IdKeysetPagination
 
     @swagger_auto_schema(operation_summary="List all questions")
     def list(self, request, *args, **kwargs):
@@ -103,7 +216,7 @@ class QuestionViewSet(viewsets.ModelViewSet):
     def destroy(self, request, *args, **kwargs):
         return super().destroy(request, *args, **kwargs)
 
-class ChoiceViewSet(viewsets.ModelViewSet):
+class ChoiceViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing Choices under Questions.
     Supports standard CRUD operations.
@@ -111,6 +224,7 @@ class ChoiceViewSet(viewsets.ModelViewSet):
     queryset = Choice.objects.all()
     serializer_class = ChoiceSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = IdKeysetPagination
 
     @swagger_auto_schema(operation_summary="List all choices")
     def list(self, request, *args, **kwargs):
@@ -137,7 +251,12 @@ class VoteAPIView(APIView):
     API view to submit a vote for a given question.
     Prevents multiple votes from the same session or IP.
     Accepts the ID of a choice in the request body.
+    With POLLS_VOTE_BUFFERING enabled, votes are buffered and flushed in
+    batches, and the response is 202 with a receipt.
+    Rate limited under the 'vote' throttle scope.
     """
+    throttle_scope = 'vote'
+
     @swagger_auto_schema(
         operation_summary="Submit a vote for a specific question",
         operation_description="Allows an anonymous or authenticated user to vote for a choice in a poll question. Prevents duplicate votes from the same session or IP.",
@@ -153,20 +272,25 @@ class VoteAPIView(APIView):
         ),
         responses={
             201: openapi.Response(description="Vote submitted successfully"),
-            400: openapi.Response(description="Invalid request or duplicate vote")
+            202: openapi.Response(description="Vote accepted into the write buffer (buffered mode)"),
+            400: openapi.Response(description="Invalid request or duplicate vote"),
+            429: openapi.Response(description="Too many requests; retry after the Retry-After header's seconds")
         }
     )
     def post(self, request, question_id):
+        if settings.POLLS_VOTE_BUFFERING:
+            return self.buffered_post(request, question_id)
+
         question = get_object_or_404(Question, id=question_id)
         poll = question.poll
 
-        # Check if poll expired
-        if poll.expiry and poll.expiry < timezone.now():
+        # Check if poll expired or closed
+        if poll.has_expired():
             return Response({"error": "This poll has expired."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # IP detection
+        # IP detection; the voter filter skips the query for first-time voters
         ip_address = request.META.get('REMOTE_ADDR')
-        if Vote.objects.filter(question=question, ip_address=ip_address).exists():
+        if might_have_voted(question.id, ip_address) and Vote.objects.filter(question=question, ip_address=ip_address).exists():
             return Response({"error": "You have already voted from this IP."}, status=status.HTTP_400_BAD_REQUEST)
 
         # Session detection
@@ -177,20 +301,143 @@ class VoteAPIView(APIView):
         choice_id = request.data.get("choice")
         choice = get_object_or_404(Choice, id=choice_id, question=question)
 
-        Vote.objects.create(
-            question=question,
-            choice=choice,
-            ip_address=ip_address
-        )
+        try:
+            with transaction.atomic():
+                Vote.objects.create(
+                    question=question,
+                    choice=choice,
+                    ip_address=ip_address
+                )
+        except IntegrityError:
+            # Voted through another worker the filter has not heard of
+            return Response({"error": "You have already voted from this IP."}, status=status.HTTP_400_BAD_REQUEST)
+        record_voter(question.id, ip_address)
         request.session[session_key] = True  # Set session flag
 
         return Response({"message": "Vote submitted successfully."}, status=status.HTTP_201_CREATED)
 
-class PollResultsAPIView(APIView):
+    def buffered_post(self, request, question_id):
+        """
+        Validate the vote against cached state and append it to the write buffer.
+        Costs a single insert in the common case.
+        """
+        info = get_question_info(question_id)
+        if info is None:
+            raise Http404("No Question matches the given query.")
+
+        if info.get("closed") or (info["expiry"] and info["expiry"] < timezone.now()):
+            return Response({"error": "This poll has expired."}, status=status.HTTP_400_BAD_REQUEST)
+
+        session_key = f"has_voted_question_{question_id}"
+        if request.session.get(session_key):
+            return Response({"error": "You have already voted in this session."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            choice_id = int(request.data.get("choice"))
+        except (TypeError, ValueError):
+            raise Http404("No Choice matches the given query.")
+        if choice_id not in info["choice_ids"]:
+            raise Http404("No Choice matches the given query.")
+
+        ip_address = request.META.get('REMOTE_ADDR')
+        receipt = buffer_vote(question_id, choice_id, ip_address=ip_address)
+        if receipt is None:
+            return Response({"error": "You have already voted from this IP."}, status=status.HTTP_400_BAD_REQUEST)
+        request.session[session_key] = True
+
+        return Response(
+            {"message": "Vote accepted.", "receipt": str(receipt)},
+            status=status.HTTP_202_ACCEPTED
+        )
+
+class BallotAPIView(APIView):
+    """
+    API view to submit votes for several questions of a poll at once.
+    Checks expiry once, validates all choices and existing votes with one
+    query each and inserts every new vote with a single bulk_create.
+    Rate limited under the 'vote' throttle scope, like single votes.
+    """
+    throttle_scope = 'vote'
+
+    @swagger_auto_schema(
+        operation_summary="Submit a whole ballot for a poll",
+        operation_description="Votes for one choice per question in a single request. Returns the outcome for every question: recorded, invalid_choice or already_voted.",
+        request_body=BallotSerializer,
+        responses={
+            201: openapi.Response(description="At least one vote was recorded"),
+            400: openapi.Response(description="Invalid request, expired poll or no vote recorded"),
+            404: openapi.Response(description="Poll not found")
+        }
+    )
+    def post(self, request, pk):
+        poll = get_object_or_404(Poll, pk=pk)
+        if poll.has_expired():
+            return Response({"error": "This poll has expired."}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = BallotSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        selections = serializer.validated_data['selections']
+
+        # Choices that exist, belong to this poll and to the question they were selected for
+        valid = set(
+            Choice.objects.filter(pk__in=selections.values(), question__poll=poll)
+            .values_list('question_id', 'id')
+        )
+
+        ip_address = request.META.get('REMOTE_ADDR')
+        # Only questions of this poll with a valid choice are worth a filter or a query
+        maybe_voted = [question_id for question_id, _ in valid if might_have_voted(question_id, ip_address)]
+        voted = set(
+            Vote.objects.filter(question_id__in=maybe_voted, ip_address=ip_address)
+            .values_list('question_id', flat=True)
+        ) if maybe_voted else set()
+
+        outcomes = {}
+        votes = []
+        for question_id, choice_id in selections.items():
+            if (question_id, choice_id) not in valid:
+                outcomes[question_id] = "invalid_choice"
+            elif question_id in voted or request.session.get(f"has_voted_question_{question_id}"):
+                outcomes[question_id] = "already_voted"
+            else:
+                outcomes[question_id] = "recorded"
+                votes.append(Vote(question_id=question_id, choice_id=choice_id, ip_address=ip_address))
+
+        if votes:
+            try:
+                with transaction.atomic():
+                    Vote.objects.bulk_create(votes)
+            except IntegrityError:
+                # A concurrent request from the same voter won the race
+                return Response({"error": "Duplicate vote detected for this ballot."}, status=status.HTTP_400_BAD_REQUEST)
+            for vote in votes:
+                record_voter(vote.question_id, ip_address)
+                request.session[f"has_voted_question_{vote.question_id}"] = True
+
+        return Response(
+            {
+                "poll": poll.id,
+                "outcomes": [
+                    {"question": question_id, "choice": selections[question_id], "status": outcome}
+                    for question_id, outcome in outcomes.items()
+                ]
+            },
+            status=status.HTTP_201_CREATED if votes else status.HTTP_400_BAD_REQUEST
+        )
+
+class PollResultsAPIView(ReplicaReadMixin, APIView):
     """
     API view to compute and return poll results.
-    Aggregates votes per choice and determines the winner per question.
+    Aggregates votes per choice and determines the winner per question
+    from the denormalized vote counters, independent of the number of votes.
+    Responses are served from the results cache until the poll changes,
+    and carry an ETag of the poll version they were computed at.
+    Cache misses are computed on a read replica. Closed polls redirect to
+    their static results snapshot.
     """
+    replica_actions = ('get',)
+    throttle_scope = 'results'
+
     @swagger_auto_schema(
         operation_summary="Get poll results with winners",
         operation_description="Returns vote counts and winners for each question in a poll.",
@@ -213,33 +460,74 @@ class PollResultsAPIView(APIView):
                     }
                 }
             ),
-            404: openapi.Response(description="Poll not found")
+            302: openapi.Response(description="Poll closed: final results at the Location URL"),
+            304: openapi.Response(description="Results not modified since the ETag in If-None-Match"),
+            404: openapi.Response(description="Poll not found"),
+            429: openapi.Response(description="Too many requests; retry after the Retry-After header's seconds")
         }
     )
     def get(self, request, pk):
-        try:
-            poll = Poll.objects.prefetch_related('questions__choices__votes').get(pk=pk)
-        except Poll.DoesNotExist:
+        # Closed polls' results are static files, served without Django
+        url = snapshot_url(pk)
+        if url is not None:
+            return snapshot_redirect(url)
+
+        # Revalidations are answered from the poll version without building the results
+        if request.META.get('HTTP_IF_NONE_MATCH'):
+            version = current_poll_version(pk)
+            if version is not None and etag_matches(request, poll_etag('results', pk, version)):
+                return not_modified(poll_etag('results', pk, version))
+
+        entry = get_poll_results_entry(pk)
+        if entry is None:
             return Response({"detail": "Poll not found."}, status=status.HTTP_404_NOT_FOUND)
 
-        results = []
-        for question in poll.questions.all():
-            choices = question.choices.annotate(vote_count=Count('votes')).order_by('-vote_count')
-            winner = choices.first()
-
-            results.append({
-                "question": question.text,
-                "choices": [
-                    {"choice": c.text, "votes": c.vote_count}
-                    for c in choices
-                ],
-                "winner": {
-                    "choice": winner.text,
-                    "votes": winner.vote_count
-                } if winner else None
-            })
+        response = Response(entry['payload'])
+        if entry.get('poll_version') is not None:
+            response['ETag'] = poll_etag('results', pk, entry['poll_version'])
+        return response
+
+class PollTimeseriesAPIView(ReplicaReadMixin, APIView):
+    """
+    API view returning votes per choice over time for a poll.
+    Built from the per-minute vote rollups and re-bucketed to the requested
+    size, so raw votes are never scanned. Read from a replica.
+    """
+    replica_actions = ('get',)
+
+    @swagger_auto_schema(
+        operation_summary="Get votes per choice over time",
+        operation_description="Returns vote counts per choice in time buckets, from the per-minute rollups. Votes from the last POLLS_ROLLUP_LAG_SECONDS or so are not included yet.",
+        query_serializer=TimeseriesQuerySerializer,
+        responses={
+            200: openapi.Response(
+                description="Time series returned successfully",
+                examples={
+                    "application/json": {
+                        "poll": 1,
+                        "bucket": "5m",
+                        "series": [
+                            {
+                                "question": 1,
+                                "choice": 1,
+                                "text": "Python",
+                                "points": [{"bucket": "2025-08-09T16:20:00+00:00", "votes": 12}]
+                            }
+                        ]
+                    }
+                }
+            ),
+            400: openapi.Response(description="Invalid bucket or since"),
+            404: openapi.Response(description="Poll not found")
+        }
+    )
+    def get(self, request, pk):
+        poll = get_object_or_404(Poll.objects.only('id'), pk=pk)
+        query = TimeseriesQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
 
         return Response({
-            "poll": poll.title,
-            "results": results
-        })
\ No newline at end of file
+            "poll": poll.id,
+            "bucket": query.initial_data.get('bucket', '1m'),
+            "series": build_timeseries(poll, query.validated_data['bucket'], query.validated_data.get('since')),
+        })
@@ -0,0 +1,96 @@
+"""
+warmup.py
+
+Per-process warm-up, run by gunicorn in every worker before it accepts
+requests (see gunicorn.conf.py).
+
+A fresh worker otherwise pays for importing the views, for building the
+voter filters of the polls being voted on and, with connection pooling,
+for opening connections, all inside its first requests. Warming up moves
+that work to boot: it imports the URLconf, connects to the primary and the
+read replicas, runs the vote, version and results queries once on each
+(which also pulls their tables and indexes into the server's cache), and
+builds the voter filters of the most recent open polls.
+
+Connections are per thread, and warm-up runs on the worker's main thread
+before its request threads start. Its connections are therefore always
+closed afterwards: with POLLS_DB_POOL they return to the pool that the
+request threads draw from, warm. Without pooling each request thread still
+opens its own connection on its first request, so warm-up saves only the
+import, voter filter and server cache work.
+"""
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.urls import get_resolver
+from django.utils import timezone
+
+from .dedup import get_voter_filter, might_have_voted
+from .models import Poll, Question, Vote
+from .results import _result_rows
+
+
+def _open_polls(alias, limit):
+    return list(
+        Poll.objects.using(alias)
+        .filter(expiry__gt=timezone.now())
+        .order_by('-created_at', '-id')
+        .only('id', 'title', 'version')[:limit]
+    )
+
+
+def _run_hot_queries(alias, poll):
+    """Run the statements of the vote and results paths once on a connection."""
+    poll_id = poll.id if poll else 0
+    question = Question.objects.using(alias).select_related('poll').filter(poll_id=poll_id).first()
+    question_id = question.id if question else 0
+    Vote.objects.using(alias).filter(question_id=question_id, ip_address='0.0.0.0').exists()
+    Poll.objects.using(alias).filter(pk=poll_id).values_list('version', flat=True).first()
+    if poll is not None:
+        list(_result_rows(poll).using(alias))
+
+
+def warm_up():
+    """
+    Warm up this process's connections, hot queries and voter filters.
+
+    Failures are reported rather than raised, so a database that is down
+    at boot does not keep the worker from starting.
+
+    Returns:
+        dict: Seconds spent per database alias, or the error it raised,
+        plus the number of voter filters built under ``voter_filters``.
+    """
+    get_resolver().url_patterns  # Imports the URLconf, views and serializers
+
+    report = {}
+    polls = []
+    for alias in [DEFAULT_DB_ALIAS, *settings.POLLS_READ_REPLICAS]:
+        start = time.perf_counter()
+        try:
+            connections[alias].ensure_connection()
+            alias_polls = _open_polls(alias, settings.POLLS_WARMUP_POLLS)
+            _run_hot_queries(alias, alias_polls[0] if alias_polls else None)
+            report[alias] = time.perf_counter() - start
+        except DatabaseError as exc:
+            report[alias] = exc
+            continue
+        finally:
+            # Back to the pool for the request threads, or not kept by a thread that serves none
+            connections[alias].close()
+        if alias == DEFAULT_DB_ALIAS:
+            polls = alias_polls
+
+    built = 0
+    if polls and get_voter_filter() is not None:
+        try:
+            for question_id in Question.objects.filter(poll__in=polls).values_list('id', flat=True):
+                might_have_voted(question_id, '0.0.0.0')
+                built += 1
+        except DatabaseError as exc:
+            report[DEFAULT_DB_ALIAS] = exc
+        finally:
+            connections[DEFAULT_DB_ALIAS].close()
+    report['voter_filters'] = built
+    return report